@@ -0,0 +1,100 @@
+"""Measure patch application latency as page size grows.
+
+Run from apps/api: ``python scripts/bench_patch_apply.py [--repeat N]``. Compares
+copy-on-write ``apply_ops_to_page`` against deep-copying the page first, which is
+what every commit used to pay, and times a bulk patchset whose replacements all
+need bbox-expansion collision checks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.schemas.ir import IRPage, IRPrimitive
+from forge_api.schemas.patch import PatchReplaceText, PatchSetStyle
+
+PAGE_WIDTH = 612.0
+PAGE_HEIGHT = 792.0
+SIZES = (100, 1_000, 5_000, 20_000)
+BULK_OPS = 200
+
+
+def _page(rng: random.Random, count: int) -> IRPage:
+    primitives = []
+    for idx in range(count):
+        x0 = rng.uniform(0, PAGE_WIDTH - 120)
+        y0 = rng.uniform(0, PAGE_HEIGHT - 12)
+        if idx % 4:
+            primitives.append(
+                IRPrimitive(
+                    id=f"t{idx}",
+                    kind="text",
+                    bbox=[x0, y0, x0 + 110.0, y0 + 12.0],
+                    z_index=idx,
+                    style={"font": "helv", "size": 10.0, "color": 0},
+                    signature_fields={"text": f"word {idx}", "ops": [idx, idx + 1]},
+                    text=f"word {idx}",
+                )
+            )
+        else:
+            primitives.append(
+                IRPrimitive(
+                    id=f"p{idx}",
+                    kind="path",
+                    bbox=[x0, y0, x0 + 40.0, y0 + 8.0],
+                    z_index=idx,
+                    style={"stroke_color": "#000000", "stroke_width": 1.0},
+                    signature_fields={"segments": [[x0, y0], [x0 + 40.0, y0 + 8.0]]},
+                )
+            )
+    return IRPage(
+        doc_id="bench",
+        page_index=0,
+        width_pt=PAGE_WIDTH,
+        height_pt=PAGE_HEIGHT,
+        rotation=0,
+        primitives=primitives,
+    )
+
+
+def _time_ms(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'primitives':>10} {'cow ms':>9} {'deep copy ms':>13} {f'bulk {BULK_OPS} ms':>13}")
+    for size in SIZES:
+        page = _page(rng, size)
+        ops = [
+            PatchReplaceText(op="replace_text", target_id="t1", new_text="word 1", policy="FIT_IN_BOX"),
+            PatchSetStyle(op="set_style", target_id="p0", stroke_color=[1.0, 0.0, 0.0]),
+        ]
+        cow_ms = _time_ms(lambda: apply_ops_to_page(page, ops), args.repeat)
+        deep_ms = _time_ms(lambda: apply_ops_to_page(page.model_copy(deep=True), ops), args.repeat)
+        bulk = [
+            PatchReplaceText(
+                op="replace_text",
+                target_id=f"t{idx}",
+                new_text="a much longer replacement",
+                policy="FIT_IN_BOX",
+            )
+            for idx in range(1, size, 4)[:BULK_OPS]
+        ]
+        bulk_ms = _time_ms(lambda: apply_ops_to_page(page, bulk), args.repeat)
+        print(f"{size:>10} {cow_ms:>9.3f} {deep_ms:>13.3f} {bulk_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare hit-test latency of the grid and R-tree spatial indexes.
+
+Run from apps/api: ``python scripts/bench_spatial_index.py [--queries N]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from forge_api.core.ir.model import PageIR, PathPrimitive, PathStyle
+from forge_api.core.ir.spatial_index import build_spatial_index, hit_test_point, hit_test_rect
+
+PAGE_WIDTH = 612.0
+PAGE_HEIGHT = 792.0
+
+
+def _primitive(idx: int, bbox: tuple[float, float, float, float]) -> PathPrimitive:
+    return PathPrimitive(
+        id=f"p{idx}",
+        kind="path",
+        bbox=bbox,
+        z_index=idx,
+        style=PathStyle(stroke_color=None, fill_color=None, stroke_width=1.0),
+        signature_fields={},
+    )
+
+
+def _page(boxes: list[tuple[float, float, float, float]]) -> PageIR:
+    return PageIR(
+        doc_id="bench",
+        page_index=0,
+        width_pt=PAGE_WIDTH,
+        height_pt=PAGE_HEIGHT,
+        rotation=0,
+        primitives=[_primitive(idx, bbox) for idx, bbox in enumerate(boxes)],
+    )
+
+
+def _text_like(rng: random.Random, count: int, region: tuple[float, float, float, float]) -> list[tuple[float, float, float, float]]:
+    x_min, y_min, x_max, y_max = region
+    boxes = []
+    for _ in range(count):
+        x0 = rng.uniform(x_min, x_max - 40)
+        y0 = rng.uniform(y_min, y_max - 10)
+        boxes.append((x0, y0, x0 + rng.uniform(8, 40), y0 + rng.uniform(6, 10)))
+    return boxes
+
+
+def _scenarios(rng: random.Random) -> dict[str, PageIR]:
+    full_page = (0.0, 0.0, PAGE_WIDTH, PAGE_HEIGHT)
+    giant = [(0.0, 0.0, PAGE_WIDTH, PAGE_HEIGHT), (10.0, 10.0, PAGE_WIDTH - 10, PAGE_HEIGHT - 10)]
+    giant += [(rng.uniform(0, 300), rng.uniform(0, 400), rng.uniform(300, 612), rng.uniform(400, 792)) for _ in range(200)]
+    return {
+        "sparse (50)": _page(_text_like(rng, 50, full_page)),
+        "dense (2k)": _page(_text_like(rng, 2000, full_page)),
+        "dense cluster (5k in 150pt)": _page(_text_like(rng, 5000, (200.0, 300.0, 350.0, 450.0))),
+        "giant primitives (200 + 1k)": _page(giant + _text_like(rng, 1000, full_page)),
+    }
+
+
+def _time_queries(page: PageIR, kind: str, points: list[tuple[float, float]], rects: list[tuple[float, ...]]) -> tuple[float, float, float]:
+    started = time.perf_counter()
+    index = build_spatial_index(page, kind)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for x, y in points:
+        hit_test_point(page, index, x, y)
+    point_us = (time.perf_counter() - started) / len(points) * 1e6
+
+    started = time.perf_counter()
+    for rect in rects:
+        hit_test_rect(page, index, *rect)
+    rect_us = (time.perf_counter() - started) / len(rects) * 1e6
+    return build_ms, point_us, rect_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    points = [(rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT)) for _ in range(args.queries)]
+    rects = []
+    for _ in range(args.queries):
+        x0, y0 = rng.uniform(0, PAGE_WIDTH - 60), rng.uniform(0, PAGE_HEIGHT - 60)
+        rects.append((x0, y0, x0 + rng.uniform(5, 60), y0 + rng.uniform(5, 60)))
+
+    print(f"{'scenario':<30} {'index':<6} {'build ms':>9} {'point us':>10} {'rect us':>10}")
+    for name, page in _scenarios(rng).items():
+        for kind in ("grid", "rtree"):
+            build_ms, point_us, rect_us = _time_queries(page, kind, points, rects)
+            print(f"{name:<30} {kind:<6} {build_ms:>9.2f} {point_us:>10.1f} {rect_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+# Bump the matching version whenever a decoder change alters the artifact it produces.
+# Readers keep serving older artifacts and queue a background regeneration.
+ArtifactKind = Literal["decode", "decoded", "manifest", "ir"]
+
+DECODE_VERSION = 1  # documents/{doc_id}/decode.json
+DECODED_VERSION = 2  # documents/{doc_id}/decoded/v1*.json (v2: profile-independent OCR fallback flag)
+MANIFEST_VERSION = 2  # docs/{doc_id}/forge/manifest.json (v2: element content hashes)
+IR_VERSION = 2  # documents/{doc_id}/ir/page_N.columnar (v2: columnar binary, was page_N.json)
+# Composite pages are derived from IR plus patch ops; bump when op application changes.
+COMPOSITE_VERSION = 3  # documents/{doc_id}/composite/page_N.json (v2: per-glyph text widths, v3: embedded font metrics)
+
+ARTIFACT_VERSIONS: dict[str, int] = {
+    "decode": DECODE_VERSION,
+    "decoded": DECODED_VERSION,
+    "manifest": MANIFEST_VERSION,
+    "ir": IR_VERSION,
+}
+
+VERSION_FIELD = "decoder_version"
+
+
+def artifact_version(payload: Any) -> int:
+    """Version stamped on a cached artifact; unstamped artifacts predate versioning."""
+    if isinstance(payload, dict):
+        value = payload.get(VERSION_FIELD, 0)
+    else:
+        value = getattr(payload, VERSION_FIELD, 0)
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_stale(kind: ArtifactKind, payload: Any) -> bool:
+    return artifact_version(payload) < ARTIFACT_VERSIONS[kind]
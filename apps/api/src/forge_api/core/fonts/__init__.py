@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from forge_api.core.fonts.inventory import BUILTIN_INVENTORY, FontInventory
 from forge_api.core.fonts.resolve import normalize_pdf_font_name, resolve_builtin_font
 
-__all__ = ["normalize_pdf_font_name", "resolve_builtin_font"]
+__all__ = ["BUILTIN_INVENTORY", "FontInventory", "normalize_pdf_font_name", "resolve_builtin_font"]
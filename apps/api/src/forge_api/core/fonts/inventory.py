@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any
+
+import fitz
+
+from forge_api.core.fonts.metrics import GlyphAdvances, glyph_advances
+from forge_api.core.fonts.resolve import normalize_pdf_font_name, resolve_builtin_font
+
+SANS_CSS = "Helvetica, Arial, sans-serif"
+SERIF_CSS = '"Times New Roman", Times, serif'
+MONO_CSS = '"Courier New", Courier, monospace'
+
+# Font programs a browser can load from an @font-face rule (TrueType / OpenType).
+_SFNT_MAGIC = (b"\x00\x01\x00\x00", b"true", b"OTTO")
+
+
+def font_key(raw: str | None) -> str:
+    """Matching key for a PDF font name.
+
+    ``page.get_fonts`` reports "ABCDEF+Nimbus Roman Regular" where text spans say
+    "NimbusRoman-Regular"; dropping the subset prefix, case and separators lines them up.
+    """
+    return normalize_pdf_font_name(raw).replace("-", "")
+
+
+def _css_family(raw: str | None) -> str:
+    if not raw:
+        return SANS_CSS
+    lower = raw.lower()
+    if "times" in lower or "serif" in lower:
+        return SERIF_CSS
+    if "courier" in lower or "mono" in lower:
+        return MONO_CSS
+    return SANS_CSS
+
+
+def _overlay_font(raw: str | None) -> str:
+    if not raw:
+        return "helv"
+    lower = raw.lower()
+    if "bold" in lower or "black" in lower:
+        return "helvB"
+    return "helv"
+
+
+@dataclass(frozen=True, eq=False)
+class EmbeddedFont:
+    """A font program extracted from the source PDF.
+
+    Embedded fonts are usually subsets, so callers check :meth:`covers` for the text at hand and
+    fall back to the builtin font otherwise. The ``fitz.Font`` is loaded on first use; fonts MuPDF
+    cannot load cover nothing.
+    """
+
+    name: str
+    ext: str
+    alias: str
+    buffer: bytes = field(repr=False)
+    _glyphs: dict[int, bool] = field(default_factory=dict, repr=False)
+    _state: dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    @property
+    def is_sfnt(self) -> bool:
+        return self.buffer[:4] in _SFNT_MAGIC
+
+    def _font(self) -> fitz.Font | None:
+        if "font" not in self._state:
+            try:
+                self._state["font"] = fitz.Font(fontbuffer=self.buffer)
+            except (RuntimeError, ValueError):
+                self._state["font"] = None
+        return self._state["font"]
+
+    def covers(self, text: str) -> bool:
+        with self._lock:
+            font = self._font()
+            if font is None:
+                return False
+            for char in text:
+                codepoint = ord(char)
+                present = self._glyphs.get(codepoint)
+                if present is None:
+                    present = self._glyphs[codepoint] = bool(font.has_glyph(codepoint))
+                if not present:
+                    return False
+            return True
+
+    def unit_width(self, text: str) -> float:
+        with self._lock:
+            return self._font().text_length(text, fontsize=1.0)
+
+
+@dataclass(frozen=True)
+class FontEntry:
+    """Everything derived from one raw font name, computed once per inventory."""
+
+    raw_name: str | None
+    builtin: str
+    fidelity: float
+    reason: str
+    css_family: str
+    overlay_font: str
+    embedded: EmbeddedFont | None = None
+
+    @property
+    def advances(self) -> GlyphAdvances:
+        return glyph_advances(self.builtin)
+
+
+class FontInventory:
+    """Fonts of one document: builtin fallbacks, embedded programs and metrics behind dict lookups.
+
+    Entries are built on first lookup of a raw name and kept for the inventory's lifetime, so
+    fitting and export over thousands of elements resolve each distinct font once.
+    """
+
+    def __init__(self, embedded: dict[str, EmbeddedFont] | None = None) -> None:
+        self.embedded = embedded or {}
+        self._entries: dict[str | None, FontEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entry(self, raw: str | None) -> FontEntry:
+        cached = self._entries.get(raw)
+        if cached is None:
+            builtin, fidelity, reason = resolve_builtin_font(raw)
+            cached = self._entries.setdefault(
+                raw,
+                FontEntry(
+                    raw_name=raw,
+                    builtin=builtin,
+                    fidelity=fidelity,
+                    reason=reason,
+                    css_family=_css_family(raw),
+                    overlay_font=_overlay_font(raw),
+                    embedded=self.embedded.get(font_key(raw)),
+                ),
+            )
+        return cached
+
+    def builtin(self, raw: str | None) -> str:
+        return self.entry(raw).builtin
+
+    def css_family(self, raw: str | None) -> str:
+        entry = self.entry(raw)
+        if entry.embedded is not None and entry.embedded.is_sfnt:
+            return f"{entry.embedded.alias}, {entry.css_family}"
+        return entry.css_family
+
+    def overlay_font(self, raw: str | None, is_bold: bool = False) -> str:
+        if is_bold:
+            return "helvB"
+        return self.entry(raw).overlay_font
+
+    def embedded_for(self, raw: str | None, text: str) -> EmbeddedFont | None:
+        """The embedded program for ``raw`` if it has a glyph for every character of ``text``."""
+        embedded = self.entry(raw).embedded
+        if embedded is not None and embedded.covers(text):
+            return embedded
+        return None
+
+    @classmethod
+    def from_document(cls, doc: fitz.Document) -> "FontInventory":
+        embedded: dict[str, EmbeddedFont] = {}
+        basefonts: list[str] = []
+        seen: set[int] = set()
+        for page in doc:
+            for font in page.get_fonts(full=True):
+                xref, ext, _, basefont = font[:4]
+                if xref in seen:
+                    continue
+                seen.add(xref)
+                basefonts.append(basefont)
+                key = font_key(basefont)
+                if ext in {"n/a", ""} or not key or key in embedded:
+                    continue
+                try:
+                    buffer = doc.extract_font(xref)[3] or b""
+                except Exception:
+                    buffer = b""
+                if buffer:
+                    embedded[key] = EmbeddedFont(
+                        name=basefont, ext=ext, alias=f"FgEmb{len(embedded)}", buffer=buffer
+                    )
+        inventory = cls(embedded)
+        for basefont in basefonts:
+            inventory.entry(basefont)
+        return inventory
+
+    @classmethod
+    def from_pdf_bytes(cls, data: bytes) -> "FontInventory":
+        doc = fitz.open(stream=data, filetype="pdf")
+        try:
+            return cls.from_document(doc)
+        finally:
+            doc.close()
+
+
+# Shared inventory for pages without a source document; it only ever resolves builtin fallbacks.
+BUILTIN_INVENTORY = FontInventory()
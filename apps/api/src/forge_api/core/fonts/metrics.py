@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import fitz
+
+LATIN_CODEPOINTS = 256
+
+
+def _unit_advance(font_name: str, codepoint: int) -> float:
+    return fitz.get_text_length(chr(codepoint), fontname=font_name, fontsize=1.0)
+
+
+@dataclass(frozen=True)
+class GlyphAdvances:
+    """Per-codepoint advance widths of a builtin font at 1pt.
+
+    Latin-1 code points live in a flat array filled up front; anything else is measured
+    once on first use. Widths are the sum of advances times the font size, as MuPDF computes them.
+    """
+
+    font_name: str
+    latin: array
+    _extra: dict[int, float] = field(default_factory=dict, repr=False)
+
+    def advance(self, codepoint: int) -> float:
+        if codepoint < LATIN_CODEPOINTS:
+            return self.latin[codepoint]
+        value = self._extra.get(codepoint)
+        if value is None:
+            value = self._extra[codepoint] = _unit_advance(self.font_name, codepoint)
+        return value
+
+    def unit_width(self, text: str) -> float:
+        try:
+            codepoints = text.encode("latin-1")
+        except UnicodeEncodeError:
+            return sum(self.advance(ord(char)) for char in text)
+        return sum(map(self.latin.__getitem__, codepoints))
+
+    def text_width(self, text: str, font_size: float) -> float:
+        return self.unit_width(text) * font_size
+
+
+@lru_cache(maxsize=64)
+def glyph_advances(font_name: str) -> GlyphAdvances:
+    """Advance table for a builtin font; raises like ``fitz.get_text_length`` for unsupported names."""
+    latin = array("d", (_unit_advance(font_name, codepoint) for codepoint in range(LATIN_CODEPOINTS)))
+    return GlyphAdvances(font_name=font_name, latin=latin)
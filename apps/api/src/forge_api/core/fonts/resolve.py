@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 
 BUILTIN_FONTS = {
@@ -19,6 +20,7 @@ BUILTIN_FONTS = {
 }
 
 
+@lru_cache(maxsize=1024)
 def normalize_pdf_font_name(raw: str | None) -> str:
     if not raw:
         return ""
@@ -47,6 +49,7 @@ def _detect_family(tokens: list[str], normalized: str) -> tuple[str, str]:
     return "helv", "unknown_fallback"
 
 
+@lru_cache(maxsize=1024)
 def resolve_builtin_font(raw: str | None) -> tuple[str, float, str]:
     normalized = normalize_pdf_font_name(raw)
     if not normalized:
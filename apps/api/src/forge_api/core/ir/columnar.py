@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from forge_api.schemas.ir import IRPage, IRPrimitive
+
+BBox = tuple[float, float, float, float]
+
+MAGIC = b"FGIR"
+FORMAT_VERSION = 1
+KINDS = ("text", "path")
+
+_PREAMBLE = struct.Struct("<4sII")
+_ALIGN = 8
+_HAS_TEXT = 1
+# (name, array typecode); offsets columns hold n + 1 entries into the blob that follows them.
+_COLUMNS = (
+    ("bboxes", "d"),
+    ("z_index", "q"),
+    ("kinds", "B"),
+    ("style_ids", "I"),
+    ("flags", "B"),
+    ("id_offsets", "Q"),
+    ("text_offsets", "Q"),
+    ("extra_offsets", "Q"),
+    ("ids", "B"),
+    ("texts", "B"),
+    ("extras", "B"),
+)
+
+
+def _padding(length: int) -> int:
+    return -length % _ALIGN
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+@dataclass(frozen=True, eq=False)
+class ColumnarPage:
+    """An IR page as flat columns over one buffer, usually a read-only mmap of the stored artifact.
+
+    Per primitive there are four bbox floats, a z-index, a kind code, a style id into the interned
+    ``styles`` table and byte ranges into the id, text and extras blobs. Spatial indexes and hit
+    tests read the columns directly; :meth:`to_ir_page` builds pydantic models for JSON responses.
+    """
+
+    doc_id: str
+    page_index: int
+    width_pt: float
+    height_pt: float
+    rotation: int
+    decoder_version: int
+    styles: tuple[dict[str, Any], ...]
+    bboxes: memoryview
+    z_index: memoryview
+    kinds: memoryview
+    style_ids: memoryview
+    flags: memoryview
+    id_offsets: memoryview
+    text_offsets: memoryview
+    extra_offsets: memoryview
+    ids: memoryview
+    texts: memoryview
+    extras: memoryview
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def primitive_id(self, idx: int) -> str:
+        return str(self.ids[self.id_offsets[idx] : self.id_offsets[idx + 1]], "utf-8")
+
+    def kind(self, idx: int) -> str:
+        return KINDS[self.kinds[idx]]
+
+    def bbox(self, idx: int) -> BBox:
+        base = 4 * idx
+        return (self.bboxes[base], self.bboxes[base + 1], self.bboxes[base + 2], self.bboxes[base + 3])
+
+    def boxes(self) -> list[BBox]:
+        coords = iter(self.bboxes)
+        return list(zip(coords, coords, coords, coords))
+
+    def text(self, idx: int) -> str | None:
+        if not self.flags[idx] & _HAS_TEXT:
+            return None
+        return str(self.texts[self.text_offsets[idx] : self.text_offsets[idx + 1]], "utf-8")
+
+    def style(self, idx: int) -> dict[str, Any]:
+        return self.styles[self.style_ids[idx]]
+
+    def _extra(self, idx: int) -> dict[str, Any]:
+        return json.loads(str(self.extras[self.extra_offsets[idx] : self.extra_offsets[idx + 1]], "utf-8"))
+
+    def primitive(self, idx: int) -> IRPrimitive:
+        extra = self._extra(idx)
+        return IRPrimitive(
+            id=self.primitive_id(idx),
+            kind=self.kind(idx),
+            bbox=list(self.bbox(idx)),
+            z_index=self.z_index[idx],
+            style=dict(self.style(idx)),
+            signature_fields=extra.get("signature_fields") or {},
+            text=self.text(idx),
+            patch_meta=extra.get("patch_meta"),
+            font_ref=extra.get("font_ref"),
+        )
+
+    def to_ir_page(self) -> IRPage:
+        return IRPage(
+            doc_id=self.doc_id,
+            page_index=self.page_index,
+            width_pt=self.width_pt,
+            height_pt=self.height_pt,
+            rotation=self.rotation,
+            primitives=[self.primitive(idx) for idx in range(len(self))],
+            decoder_version=self.decoder_version,
+        )
+
+    @classmethod
+    def from_ir_page(cls, page: IRPage) -> "ColumnarPage":
+        return cls.decode(encode_columnar_page(page))
+
+    @classmethod
+    def decode(cls, buffer: bytes | bytearray | mmap.mmap | memoryview) -> "ColumnarPage":
+        """Wrap an encoded page without copying; raises ``ValueError`` for foreign or corrupt data."""
+        view = memoryview(buffer)
+        if len(view) < _PREAMBLE.size:
+            raise ValueError("Columnar IR page is truncated")
+        magic, version, header_length = _PREAMBLE.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a columnar IR page")
+        start = _PREAMBLE.size
+        header = json.loads(str(view[start : start + header_length], "utf-8"))
+        if header.get("byteorder") != sys.byteorder:
+            raise ValueError("Columnar IR page has foreign byte order")
+        columns: dict[str, memoryview] = {}
+        for name, typecode in _COLUMNS:
+            offset, length = header["columns"][name]
+            if offset + length > len(view):
+                raise ValueError("Columnar IR page is truncated")
+            columns[name] = view[offset : offset + length].cast(typecode)
+        return cls(
+            doc_id=header["doc_id"],
+            page_index=int(header["page_index"]),
+            width_pt=float(header["width_pt"]),
+            height_pt=float(header["height_pt"]),
+            rotation=int(header["rotation"]),
+            decoder_version=int(header.get("decoder_version", 0)),
+            styles=tuple(header["styles"]),
+            **columns,
+        )
+
+
+def encode_columnar_page(page: IRPage) -> bytes:
+    return encode_columnar(
+        {
+            "doc_id": page.doc_id,
+            "page_index": page.page_index,
+            "width_pt": page.width_pt,
+            "height_pt": page.height_pt,
+            "rotation": page.rotation,
+            "decoder_version": page.decoder_version,
+        },
+        page.primitives,
+    )
+
+
+def encode_columnar(meta: dict[str, Any], primitives: Iterable[Any]) -> bytes:
+    """Encode page ``meta`` and primitives exposing the ``IRPrimitive`` attributes."""
+    columns = {name: array(typecode) for name, typecode in _COLUMNS}
+    style_table: dict[str, int] = {}
+    styles: list[dict[str, Any]] = []
+    for offsets in ("id_offsets", "text_offsets", "extra_offsets"):
+        columns[offsets].append(0)
+
+    for primitive in primitives:
+        columns["bboxes"].extend(float(value) for value in primitive.bbox)
+        columns["z_index"].append(int(primitive.z_index))
+        columns["kinds"].append(KINDS.index(primitive.kind))
+        style_key = _dumps(primitive.style)
+        style_id = style_table.get(style_key)
+        if style_id is None:
+            style_id = style_table[style_key] = len(styles)
+            styles.append(primitive.style)
+        columns["style_ids"].append(style_id)
+        columns["flags"].append(_HAS_TEXT if primitive.text is not None else 0)
+        columns["ids"].frombytes(primitive.id.encode("utf-8"))
+        columns["id_offsets"].append(len(columns["ids"]))
+        if primitive.text is not None:
+            columns["texts"].frombytes(primitive.text.encode("utf-8"))
+        columns["text_offsets"].append(len(columns["texts"]))
+        extra = {
+            "signature_fields": primitive.signature_fields,
+            "patch_meta": primitive.patch_meta,
+            "font_ref": primitive.font_ref,
+        }
+        extra = {key: value for key, value in extra.items() if value is not None}
+        columns["extras"].frombytes(_dumps(extra).encode("utf-8"))
+        columns["extra_offsets"].append(len(columns["extras"]))
+
+    # The header records absolute column offsets, which depend on the header's own length;
+    # reserve a fixed-width slot per offset so one pass settles the layout.
+    header: dict[str, Any] = {**meta, "byteorder": sys.byteorder, "styles": styles}
+    sizes = {name: len(column) * column.itemsize for name, column in columns.items()}
+    header["columns"] = {name: [10**15, size] for name, size in sizes.items()}
+    header_length = len(_dumps(header).encode("utf-8"))
+    header_length += _padding(_PREAMBLE.size + header_length)
+    position = _PREAMBLE.size + header_length
+    layout: dict[str, list[int]] = {}
+    for name, _ in _COLUMNS:
+        layout[name] = [position, sizes[name]]
+        position += sizes[name] + _padding(sizes[name])
+    header["columns"] = layout
+    encoded_header = _dumps(header).encode("utf-8")
+    encoded_header += b" " * (header_length - len(encoded_header))
+
+    chunks = [_PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_length), encoded_header]
+    for name, _ in _COLUMNS:
+        chunks.append(columns[name].tobytes())
+        chunks.append(b"\0" * _padding(sizes[name]))
+    return b"".join(chunks)
+
+
+def open_columnar_page(path: str) -> ColumnarPage:
+    """Map a stored page read-only; its columns stay valid for as long as the page is referenced."""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return ColumnarPage.decode(mapped)
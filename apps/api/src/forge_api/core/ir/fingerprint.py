@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+import fitz
+
+
+_TEXT_OBJECT_RE = re.compile(rb"\bBT\b.*?\bET\b", re.S)
+_REFERENCE_RE = re.compile(r"\b(\d+) 0 R\b")
+# Page resources that change how drawings render without showing up in the content stream.
+_RENDER_RESOURCES = ("ExtGState", "Pattern", "Shading", "ColorSpace")
+
+
+class LayerCache(Protocol):
+    def get(self, namespace: str, key: str) -> Any | None:
+        ...
+
+    def put(self, namespace: str, key: str, payload: Any) -> None:
+        ...
+
+
+@dataclass(frozen=True)
+class PageFingerprint:
+    """Content addressed identity of a page.
+
+    ``static_hash`` covers everything except text objects (drawings, images,
+    form xobjects and page geometry), so two fills of the same template share
+    it. ``content_hash`` additionally covers the text objects, fonts, annotations
+    and form widgets and is only shared by pages that render identically.
+    """
+
+    static_hash: str
+    content_hash: str
+
+
+def _digest(parts: list[bytes]) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+def _geometry_signature(page: fitz.Page) -> bytes:
+    rect = page.rect
+    mediabox = page.mediabox
+    values = (rect.x0, rect.y0, rect.x1, rect.y1, mediabox.x0, mediabox.y0, mediabox.x1, mediabox.y1)
+    return (",".join(f"{value:.3f}" for value in values) + f"|{page.rotation}").encode("ascii")
+
+
+def _image_signatures(doc: fitz.Document, page: fitz.Page) -> list[bytes]:
+    signatures: list[bytes] = []
+    for image in page.get_images(full=True):
+        xref = image[0]
+        name = image[7] if len(image) > 7 else ""
+        try:
+            stream = doc.xref_stream_raw(xref) or b""
+        except Exception:
+            stream = b""
+        signatures.append(f"image|{name}|{image[2]}x{image[3]}|".encode("utf-8") + hashlib.sha256(stream).digest())
+    return signatures
+
+
+def _xobject_signatures(doc: fitz.Document, page: fitz.Page) -> list[bytes]:
+    signatures: list[bytes] = []
+    for xobject in page.get_xobjects():
+        xref, name = xobject[0], xobject[1]
+        try:
+            stream = doc.xref_stream(xref) or b""
+        except Exception:
+            stream = b""
+        signatures.append(f"xobject|{name}|".encode("utf-8") + hashlib.sha256(stream).digest())
+    return signatures
+
+
+def _font_signatures(doc: fitz.Document, page: fitz.Page) -> list[bytes]:
+    signatures: list[bytes] = []
+    for font in page.get_fonts(full=True):
+        xref, ext, font_type, basefont, name, encoding = font[:6]
+        buffer = b""
+        if ext not in {"n/a", ""}:
+            try:
+                buffer = doc.extract_font(xref)[3] or b""
+            except Exception:
+                buffer = b""
+        signatures.append(
+            f"font|{name}|{basefont}|{font_type}|{encoding}|".encode("utf-8") + hashlib.sha256(buffer).digest()
+        )
+    return signatures
+
+
+def _object_signature(doc: fitz.Document, xref: int) -> bytes:
+    """Object source plus, for streams, a digest of the stream bytes."""
+    try:
+        source = doc.xref_object(xref, compressed=True)
+        stream = doc.xref_stream(xref) if doc.xref_is_stream(xref) else None
+    except Exception:
+        return f"missing|{xref}".encode("ascii")
+    digest = hashlib.sha256(stream).hexdigest() if stream is not None else ""
+    return f"{source}|{digest}".encode("utf-8")
+
+
+def _referenced_signatures(doc: fitz.Document, source: str) -> list[bytes]:
+    # Xref numbers differ between documents, so each referenced object is hashed by content.
+    return [_object_signature(doc, int(xref)) for xref in _REFERENCE_RE.findall(source)]
+
+
+def _resource_signatures(doc: fitz.Document, page: fitz.Page) -> list[bytes]:
+    signatures: list[bytes] = []
+    for name in _RENDER_RESOURCES:
+        kind, value = doc.xref_get_key(page.xref, f"Resources/{name}")
+        if kind == "null":
+            continue
+        if kind == "xref":
+            value = doc.xref_object(int(value.split()[0]), compressed=True)
+        signatures.append(f"resource|{name}|{value}|".encode("utf-8"))
+        signatures.extend(_referenced_signatures(doc, value))
+    return signatures
+
+
+def _annotation_signatures(doc: fitz.Document, page: fitz.Page) -> list[bytes]:
+    """Every annotation and form widget: its object, appearance streams and field value."""
+    signatures: list[bytes] = []
+    annots = [(annot.xref, "") for annot in page.annots()]
+    annots += [(widget.xref, str(widget.field_value)) for widget in page.widgets()]
+    for xref, field_value in annots:
+        source = doc.xref_object(xref, compressed=True)
+        signatures.append(f"annot|{source}|{field_value}|".encode("utf-8"))
+        kind, appearance = doc.xref_get_key(xref, "AP")
+        if kind == "xref":
+            appearance = doc.xref_object(int(appearance.split()[0]), compressed=True)
+        if kind != "null":
+            signatures.extend(_referenced_signatures(doc, appearance))
+    return signatures
+
+
+def _page_contents(doc: fitz.Document, page: fitz.Page) -> bytes:
+    # page.read_contents() raises on pages without a /Contents entry, so join the streams directly.
+    return b"\n".join(doc.xref_stream(xref) or b"" for xref in page.get_contents())
+
+
+def fingerprint_page(page: fitz.Page) -> PageFingerprint:
+    doc = page.parent
+    contents = _page_contents(doc, page)
+    static_parts = [
+        _geometry_signature(page),
+        _TEXT_OBJECT_RE.sub(b"", contents),
+        *sorted(_image_signatures(doc, page)),
+        *sorted(_xobject_signatures(doc, page)),
+        *_resource_signatures(doc, page),
+    ]
+    static_hash = _digest(static_parts)
+    content_hash = _digest(
+        [
+            static_hash.encode("ascii"),
+            contents,
+            *sorted(_font_signatures(doc, page)),
+            *_annotation_signatures(doc, page),
+        ]
+    )
+    return PageFingerprint(static_hash=static_hash, content_hash=content_hash)
+
+
+def _serialize_path_item(item: tuple[Any, ...]) -> list[Any]:
+    op = item[0]
+    if op == "re":
+        rect = item[1]
+        return [op, [rect.x0, rect.y0, rect.x1, rect.y1], *item[2:]]
+    if op == "qu":
+        quad = item[1]
+        return [op, [[point.x, point.y] for point in (quad.ul, quad.ur, quad.ll, quad.lr)]]
+    return [op, *[[point.x, point.y] for point in item[1:]]]
+
+
+def _deserialize_path_item(item: list[Any]) -> tuple[Any, ...]:
+    op = item[0]
+    if op == "re":
+        return (op, fitz.Rect(item[1]), *item[2:])
+    if op == "qu":
+        return (op, fitz.Quad(*[fitz.Point(point) for point in item[1]]))
+    return (op, *[fitz.Point(point) for point in item[1:]])
+
+
+def serialize_drawings(drawings: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    payload: list[dict[str, Any]] = []
+    for drawing in drawings:
+        entry: dict[str, Any] = {}
+        for key, value in drawing.items():
+            if key == "items":
+                entry[key] = [_serialize_path_item(item) for item in value]
+            elif isinstance(value, fitz.Rect):
+                entry[key] = {"rect": [value.x0, value.y0, value.x1, value.y1]}
+            elif isinstance(value, tuple):
+                entry[key] = list(value)
+            else:
+                entry[key] = value
+        payload.append(entry)
+    return payload
+
+
+def deserialize_drawings(payload: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    drawings: list[dict[str, Any]] = []
+    for entry in payload:
+        drawing: dict[str, Any] = {}
+        for key, value in entry.items():
+            if key == "items":
+                drawing[key] = [_deserialize_path_item(item) for item in value]
+            elif isinstance(value, dict) and "rect" in value:
+                drawing[key] = fitz.Rect(value["rect"])
+            elif isinstance(value, list):
+                drawing[key] = tuple(value)
+            else:
+                drawing[key] = value
+        drawings.append(drawing)
+    return drawings
+
+
+def page_drawings(
+    page: fitz.Page,
+    layer_cache: LayerCache | None = None,
+    fingerprint: PageFingerprint | None = None,
+) -> list[dict[str, Any]]:
+    """Return ``page.get_drawings()``, served from the static layer cache when possible."""
+    if layer_cache is None:
+        return page.get_drawings()
+    fingerprint = fingerprint or fingerprint_page(page)
+    cached = layer_cache.get("drawings", fingerprint.static_hash)
+    if cached is not None:
+        return deserialize_drawings(cached)
+    drawings = page.get_drawings()
+    layer_cache.put("drawings", fingerprint.static_hash, serialize_drawings(drawings))
+    return drawings
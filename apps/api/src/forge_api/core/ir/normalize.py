@@ -5,10 +5,13 @@ from typing import Any
 
 import fitz
 
+from forge_api.core.artifact_versions import IR_VERSION
+from forge_api.core.ir.fingerprint import LayerCache, PageFingerprint, fingerprint_page, page_drawings
 from forge_api.core.ir.model import BBox, PageIR, PathPrimitive, PathStyle, TextRun, TextStyle
 
 
 ROUND_PRECISION = 3
+_ITEMS_NAMESPACE = f"ir-items.v{IR_VERSION}"
 
 
 def _coerce_float(value: Any, default: float = 0.0) -> float:
@@ -102,7 +105,7 @@ def _sort_key(item: dict[str, Any]) -> tuple:
     )
 
 
-def normalize_page(doc_id: str, page_index: int, page: fitz.Page) -> PageIR:
+def _extract_text_items(page: fitz.Page) -> list[dict[str, Any]]:
     text_items: list[dict[str, Any]] = []
     text_dict = page.get_text("dict")
     for block in text_dict.get("blocks", []):
@@ -121,9 +124,16 @@ def normalize_page(doc_id: str, page_index: int, page: fitz.Page) -> PageIR:
                         "bbox": _normalize_bbox(span.get("bbox")),
                     }
                 )
+    return text_items
 
+
+def _extract_path_items(
+    page: fitz.Page,
+    layer_cache: LayerCache | None,
+    fingerprint: PageFingerprint | None,
+) -> list[dict[str, Any]]:
     path_items: list[dict[str, Any]] = []
-    for drawing in page.get_drawings():
+    for drawing in page_drawings(page, layer_cache, fingerprint):
         rect = drawing.get("rect")
         if rect is None:
             continue
@@ -136,9 +146,30 @@ def normalize_page(doc_id: str, page_index: int, page: fitz.Page) -> PageIR:
                 "fill_color": _normalize_color(drawing.get("fill")),
             }
         )
-
-    raw_items = text_items + path_items
-    raw_items.sort(key=_sort_key)
+    return path_items
+
+
+def _restore_item(item: dict[str, Any]) -> dict[str, Any]:
+    return {**item, "bbox": tuple(item["bbox"])}
+
+
+def normalize_page(
+    doc_id: str,
+    page_index: int,
+    page: fitz.Page,
+    layer_cache: LayerCache | None = None,
+) -> PageIR:
+    # Raw items carry no doc specific data, so identical pages reuse them outright and
+    # template fills (same static layer) only re-extract their text.
+    fingerprint = fingerprint_page(page) if layer_cache is not None else None
+    cached_items = layer_cache.get(_ITEMS_NAMESPACE, fingerprint.content_hash) if fingerprint else None
+    if cached_items is not None:
+        raw_items = [_restore_item(item) for item in cached_items]
+    else:
+        raw_items = _extract_text_items(page) + _extract_path_items(page, layer_cache, fingerprint)
+        raw_items.sort(key=_sort_key)
+        if fingerprint is not None:
+            layer_cache.put(_ITEMS_NAMESPACE, fingerprint.content_hash, raw_items)
 
     primitives: list[TextRun | PathPrimitive] = []
     for z_index, item in enumerate(raw_items):
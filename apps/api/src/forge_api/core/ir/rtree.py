@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import base64
+import heapq
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from forge_api.core.ir.columnar import ColumnarPage
+
+BBox = tuple[float, float, float, float]
+
+
+def _box_distance_sq(x: float, y: float, x0: float, y0: float, x1: float, y1: float) -> float:
+    dx = x0 - x if x < x0 else (x - x1 if x > x1 else 0.0)
+    dy = y0 - y if y < y0 else (y - y1 if y > y1 else 0.0)
+    return dx * dx + dy * dy
+
+
+@dataclass(frozen=True)
+class PackedRTree:
+    """Static R-tree bulk loaded with Sort-Tile-Recursive packing.
+
+    Nodes live in flat arrays, leaves first and the root last: ``boxes`` holds
+    four coordinates per node and ``indices`` the item index for leaves or the
+    position of the first child for internal nodes. ``level_bounds`` marks the
+    end position of each level.
+    """
+
+    node_size: int
+    num_items: int
+    boxes: array
+    indices: array
+    level_bounds: tuple[int, ...]
+
+    @classmethod
+    def from_boxes(cls, boxes: Sequence[BBox], node_size: int = 16) -> "PackedRTree":
+        node_size = max(2, node_size)
+        num_items = len(boxes)
+        order = list(range(num_items))
+        if num_items:
+            leaf_count = math.ceil(num_items / node_size)
+            slice_count = max(1, math.ceil(math.sqrt(leaf_count)))
+            slice_items = slice_count * node_size
+            order.sort(key=lambda idx: boxes[idx][0] + boxes[idx][2])
+            packed: list[int] = []
+            for start in range(0, num_items, slice_items):
+                tile = order[start : start + slice_items]
+                tile.sort(key=lambda idx: boxes[idx][1] + boxes[idx][3])
+                packed.extend(tile)
+            order = packed
+
+        flat = array("d")
+        indices = array("q")
+        for idx in order:
+            x0, y0, x1, y1 = boxes[idx]
+            flat.extend((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+            indices.append(idx)
+
+        level_bounds = [num_items]
+        level_start = 0
+        level_end = num_items
+        while level_end - level_start > 1:
+            for child in range(level_start, level_end, node_size):
+                child_end = min(child + node_size, level_end)
+                x0 = min(flat[4 * pos] for pos in range(child, child_end))
+                y0 = min(flat[4 * pos + 1] for pos in range(child, child_end))
+                x1 = max(flat[4 * pos + 2] for pos in range(child, child_end))
+                y1 = max(flat[4 * pos + 3] for pos in range(child, child_end))
+                flat.extend((x0, y0, x1, y1))
+                indices.append(child)
+            level_start = level_end
+            level_end = len(indices)
+            level_bounds.append(level_end)
+
+        return cls(
+            node_size=node_size,
+            num_items=num_items,
+            boxes=flat,
+            indices=indices,
+            level_bounds=tuple(level_bounds),
+        )
+
+    @classmethod
+    def build(cls, page: ColumnarPage, node_size: int = 16) -> "PackedRTree":
+        return cls.from_boxes(page.boxes(), node_size=node_size)
+
+    def _children(self, pos: int) -> range:
+        start = self.indices[pos]
+        for bound in self.level_bounds:
+            if start < bound:
+                return range(start, min(start + self.node_size, bound))
+        return range(0)
+
+    def _search(self, x0: float, y0: float, x1: float, y1: float, contained: bool = False) -> list[int]:
+        if not self.num_items:
+            return []
+        boxes = self.boxes
+        results: list[int] = []
+        stack = [len(self.indices) - 1]
+        while stack:
+            pos = stack.pop()
+            if pos < self.num_items:
+                children: Iterable[int] = (pos,)
+            else:
+                children = self._children(pos)
+            for child in children:
+                bx0, by0, bx1, by1 = boxes[4 * child : 4 * child + 4]
+                if bx1 < x0 or bx0 > x1 or by1 < y0 or by0 > y1:
+                    continue
+                if child < self.num_items:
+                    if not contained or (bx0 >= x0 and by0 >= y0 and bx1 <= x1 and by1 <= y1):
+                        results.append(self.indices[child])
+                elif child != pos:
+                    stack.append(child)
+        results.sort()
+        return results
+
+    def query_point(self, x: float, y: float) -> list[int]:
+        """Items whose box contains the point."""
+        return self._search(x, y, x, y)
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        """Items whose box intersects the rectangle."""
+        return self._search(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+    def query_contained(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        """Items whose box lies entirely inside the rectangle."""
+        return self._search(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1), contained=True)
+
+    def nearest(self, x: float, y: float, k: int = 1, max_distance: float | None = None) -> list[int]:
+        """Up to ``k`` items ordered by distance from the point to their box."""
+        if not self.num_items or k <= 0:
+            return []
+        boxes = self.boxes
+        limit = max_distance * max_distance if max_distance is not None else math.inf
+        root = len(self.indices) - 1
+        heap: list[tuple[float, int, int]] = [(0.0, 0, root)]
+        results: list[int] = []
+        while heap and len(results) < k:
+            distance, is_item, pos = heapq.heappop(heap)
+            if distance > limit:
+                break
+            if is_item:
+                results.append(self.indices[pos])
+                continue
+            children = (pos,) if pos < self.num_items else self._children(pos)
+            for child in children:
+                child_distance = _box_distance_sq(x, y, *boxes[4 * child : 4 * child + 4])
+                if child < self.num_items:
+                    heapq.heappush(heap, (child_distance, 1, child))
+                elif child != pos:
+                    heapq.heappush(heap, (child_distance, 0, child))
+        return results
+
+    def candidate_indices_for_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        return self.query_rect(x0, y0, x1, y1)
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "node_size": self.node_size,
+            "num_items": self.num_items,
+            "boxes": base64.b64encode(self.boxes.tobytes()).decode("ascii"),
+            "indices": base64.b64encode(self.indices.tobytes()).decode("ascii"),
+            "level_bounds": list(self.level_bounds),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "PackedRTree":
+        boxes = array("d")
+        boxes.frombytes(base64.b64decode(payload["boxes"]))
+        indices = array("q")
+        indices.frombytes(base64.b64decode(payload["indices"]))
+        return cls(
+            node_size=int(payload["node_size"]),
+            num_items=int(payload["num_items"]),
+            boxes=boxes,
+            indices=indices,
+            level_bounds=tuple(int(bound) for bound in payload["level_bounds"]),
+        )
@@ -2,9 +2,13 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Any, Iterable, Protocol, Sequence
 
-from forge_api.core.ir.model import PageIR
+from forge_api.core.ir.columnar import BBox, ColumnarPage
+from forge_api.core.ir.rtree import PackedRTree
+
+# Point hits also return boxes this close to the point, so a click just outside a thin stroke still lands.
+POINT_HIT_TOLERANCE_PT = 12.0
 
 
 @dataclass(frozen=True)
@@ -15,6 +19,20 @@ class HitTestCandidate:
     kind: str
 
 
+class PageSpatialIndex(Protocol):
+    """Candidate lookup shared by the grid and R-tree backends.
+
+    ``candidate_indices_for_rect`` returns at least every box touching the closed rectangle;
+    the hit tests apply the exact test, so both backends answer every query identically.
+    """
+
+    def candidate_indices_for_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        ...
+
+    def to_payload(self) -> dict[str, Any]:
+        ...
+
+
 @dataclass(frozen=True)
 class SpatialIndex:
     cell_size: float
@@ -23,15 +41,15 @@ class SpatialIndex:
     bins: dict[tuple[int, int], list[int]]
 
     @classmethod
-    def build(cls, page: PageIR, cell_size: float = 96.0) -> "SpatialIndex":
+    def build(cls, page: ColumnarPage, cell_size: float = 96.0) -> "SpatialIndex":
         bins: dict[tuple[int, int], list[int]] = {}
         max_x = max(page.width_pt, 1.0)
         max_y = max(page.height_pt, 1.0)
         cols = max(1, math.ceil(max_x / cell_size))
         rows = max(1, math.ceil(max_y / cell_size))
 
-        for idx, primitive in enumerate(page.primitives):
-            x0, y0, x1, y1 = primitive.bbox
+        for idx, box in enumerate(page.boxes()):
+            x0, y0, x1, y1 = _normalized(box)
             start_x = max(0, min(int(x0 // cell_size), cols - 1))
             end_x = max(0, min(int(x1 // cell_size), cols - 1))
             start_y = max(0, min(int(y0 // cell_size), rows - 1))
@@ -42,29 +60,35 @@ class SpatialIndex:
 
         return cls(cell_size=cell_size, page_width=page.width_pt, page_height=page.height_pt, bins=bins)
 
-    def _cells_for_point(self, x: float, y: float) -> Iterable[tuple[int, int]]:
-        cx = int(x // self.cell_size)
-        cy = int(y // self.cell_size)
-        for dy in (-1, 0, 1):
-            for dx in (-1, 0, 1):
-                yield (cx + dx, cy + dy)
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "cell_size": self.cell_size,
+            "page_width": self.page_width,
+            "page_height": self.page_height,
+            "bins": [[cx, cy, indices] for (cx, cy), indices in self.bins.items()],
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "SpatialIndex":
+        return cls(
+            cell_size=float(payload["cell_size"]),
+            page_width=float(payload["page_width"]),
+            page_height=float(payload["page_height"]),
+            bins={(int(cx), int(cy)): list(indices) for cx, cy, indices in payload["bins"]},
+        )
 
     def _cells_for_rect(self, x0: float, y0: float, x1: float, y1: float) -> Iterable[tuple[int, int]]:
-        start_x = int(min(x0, x1) // self.cell_size)
-        end_x = int(max(x0, x1) // self.cell_size)
-        start_y = int(min(y0, y1) // self.cell_size)
-        end_y = int(max(y0, y1) // self.cell_size)
+        # Clamp like ``build`` does, so boxes reaching past the page edge are still found.
+        cols = max(1, math.ceil(max(self.page_width, 1.0) / self.cell_size))
+        rows = max(1, math.ceil(max(self.page_height, 1.0) / self.cell_size))
+        start_x = max(0, min(int(min(x0, x1) // self.cell_size), cols - 1))
+        end_x = max(0, min(int(max(x0, x1) // self.cell_size), cols - 1))
+        start_y = max(0, min(int(min(y0, y1) // self.cell_size), rows - 1))
+        end_y = max(0, min(int(max(y0, y1) // self.cell_size), rows - 1))
         for cx in range(start_x, end_x + 1):
             for cy in range(start_y, end_y + 1):
                 yield (cx, cy)
 
-    def candidate_indices_for_point(self, x: float, y: float) -> list[int]:
-        ordered: dict[int, None] = {}
-        for cell in self._cells_for_point(x, y):
-            for idx in self.bins.get(cell, []):
-                ordered.setdefault(idx, None)
-        return list(ordered.keys())
-
     def candidate_indices_for_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
         ordered: dict[int, None] = {}
         for cell in self._cells_for_rect(x0, y0, x1, y1):
@@ -73,12 +97,43 @@ class SpatialIndex:
         return list(ordered.keys())
 
 
-def _bbox_center(bbox: tuple[float, float, float, float]) -> tuple[float, float]:
+SPATIAL_INDEX_KINDS = ("grid", "rtree")
+
+
+def build_spatial_index(page: ColumnarPage, kind: str = "grid") -> PageSpatialIndex:
+    if kind == "rtree":
+        return PackedRTree.build(page)
+    return SpatialIndex.build(page)
+
+
+def spatial_index_from_payload(kind: str, payload: dict[str, Any]) -> PageSpatialIndex:
+    if kind == "rtree":
+        return PackedRTree.from_payload(payload)
+    return SpatialIndex.from_payload(payload)
+
+
+def _normalized(bbox: BBox) -> BBox:
+    x0, y0, x1, y1 = bbox
+    return (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+
+def _bbox_center(bbox: BBox) -> tuple[float, float]:
     x0, y0, x1, y1 = bbox
     return ((x0 + x1) / 2.0, (y0 + y1) / 2.0)
 
 
-def _intersection_area(a: tuple[float, float, float, float], b: tuple[float, float, float, float]) -> float:
+def _overlaps(rect: BBox, bbox: BBox) -> bool:
+    """Closed-interval intersection, the same test ``PackedRTree`` applies: touching edges count."""
+    return bbox[0] <= rect[2] and rect[0] <= bbox[2] and bbox[1] <= rect[3] and rect[1] <= bbox[3]
+
+
+def _point_distance_sq(x: float, y: float, bbox: BBox) -> float:
+    dx = max(bbox[0] - x, 0.0, x - bbox[2])
+    dy = max(bbox[1] - y, 0.0, y - bbox[3])
+    return dx * dx + dy * dy
+
+
+def _intersection_area(a: BBox, b: BBox) -> float:
     ax0, ay0, ax1, ay1 = a
     bx0, by0, bx1, by1 = b
     x_left = max(ax0, bx0)
@@ -90,50 +145,104 @@ def _intersection_area(a: tuple[float, float, float, float], b: tuple[float, flo
     return (x_right - x_left) * (y_bottom - y_top)
 
 
-def hit_test_point(page: PageIR, index: SpatialIndex, x: float, y: float) -> list[HitTestCandidate]:
-    z_index_by_id = {primitive.id: primitive.z_index for primitive in page.primitives}
-    candidates: list[HitTestCandidate] = []
-    for idx in index.candidate_indices_for_point(x, y):
-        primitive = page.primitives[idx]
-        cx, cy = _bbox_center(primitive.bbox)
-        distance = (x - cx) ** 2 + (y - cy) ** 2
-        candidates.append(
-            HitTestCandidate(
-                id=primitive.id,
-                score=distance,
-                bbox=primitive.bbox,
-                kind=primitive.kind,
-            )
-        )
+def _point_rect(x: float, y: float) -> BBox:
+    tolerance = POINT_HIT_TOLERANCE_PT
+    return (x - tolerance, y - tolerance, x + tolerance, y + tolerance)
 
-    candidates.sort(key=lambda item: (item.score, z_index_by_id.get(item.id, 0)))
-    return candidates
+
+def _score_point(bbox: BBox, z_index: int, idx: int, x: float, y: float) -> tuple[float, int, int] | None:
+    """``(centre distance, z_index, idx)`` for a box within the point tolerance, else ``None``."""
+    if _point_distance_sq(x, y, bbox) > POINT_HIT_TOLERANCE_PT * POINT_HIT_TOLERANCE_PT:
+        return None
+    cx, cy = _bbox_center(bbox)
+    return ((x - cx) ** 2 + (y - cy) ** 2, z_index, idx)
+
+
+def _score_rect(bbox: BBox, z_index: int, idx: int, rect: BBox) -> tuple[float, int, int] | None:
+    """``(-overlap area, z_index, idx)`` for a box touching ``rect``, else ``None``."""
+    if not _overlaps(rect, bbox):
+        return None
+    return (-_intersection_area(rect, bbox), z_index, idx)
+
+
+def _candidate(page: ColumnarPage, idx: int, score: float) -> HitTestCandidate:
+    return HitTestCandidate(id=page.primitive_id(idx), score=score, bbox=page.bbox(idx), kind=page.kind(idx))
+
+
+def hit_test_point(page: ColumnarPage, index: PageSpatialIndex, x: float, y: float) -> list[HitTestCandidate]:
+    """Boxes within ``POINT_HIT_TOLERANCE_PT`` of the point, nearest centre first, then z-index and page order."""
+    scored = [
+        _score_point(_normalized(page.bbox(idx)), page.z_index[idx], idx, x, y)
+        for idx in index.candidate_indices_for_rect(*_point_rect(x, y))
+    ]
+    ranked = sorted(item for item in scored if item is not None)
+    return [_candidate(page, idx, distance) for distance, _, idx in ranked]
 
 
 def hit_test_rect(
-    page: PageIR,
-    index: SpatialIndex,
+    page: ColumnarPage,
+    index: PageSpatialIndex,
     x0: float,
     y0: float,
     x1: float,
     y1: float,
 ) -> list[HitTestCandidate]:
-    z_index_by_id = {primitive.id: primitive.z_index for primitive in page.primitives}
-    rect = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
-    candidates: list[HitTestCandidate] = []
-    for idx in index.candidate_indices_for_rect(*rect):
-        primitive = page.primitives[idx]
-        area = _intersection_area(rect, primitive.bbox)
-        if area <= 0:
-            continue
-        candidates.append(
-            HitTestCandidate(
-                id=primitive.id,
-                score=area,
-                bbox=primitive.bbox,
-                kind=primitive.kind,
-            )
-        )
-
-    candidates.sort(key=lambda item: (-item.score, z_index_by_id.get(item.id, 0)))
-    return candidates
+    """Boxes touching the rectangle, largest overlap first, then z-index and page order."""
+    rect = _normalized((x0, y0, x1, y1))
+    scored = [
+        _score_rect(_normalized(page.bbox(idx)), page.z_index[idx], idx, rect)
+        for idx in index.candidate_indices_for_rect(*rect)
+    ]
+    ranked = sorted(item for item in scored if item is not None)
+    return [_candidate(page, idx, -negative_area) for negative_area, _, idx in ranked]
+
+
+def hit_test_batch(
+    page: ColumnarPage,
+    queries: Sequence[tuple[float, float] | tuple[float, float, float, float]],
+) -> list[list[HitTestCandidate]]:
+    """Answer point ``(x, y)`` and rect ``(x0, y0, x1, y1)`` queries against one page in one sweep.
+
+    Every query becomes a closed rectangle (points widened by ``POINT_HIT_TOLERANCE_PT``). The
+    page's bbox column is read once and swept by x together with the queries, pairing each query
+    with the boxes it overlaps; no per-query index lookups. Candidates are then scored exactly as
+    :func:`hit_test_point` and :func:`hit_test_rect` score them, so results are identical.
+    """
+    rects = [_point_rect(*query) if len(query) == 2 else _normalized(query) for query in queries]
+    boxes = [_normalized(box) for box in page.boxes()]
+
+    # (x, is_end, is_query, item): starts sort before ends at the same x, so touching edges pair up.
+    events = [(box[0], 0, 0, idx) for idx, box in enumerate(boxes)]
+    events += [(box[2], 1, 0, idx) for idx, box in enumerate(boxes)]
+    events += [(rect[0], 0, 1, pos) for pos, rect in enumerate(rects)]
+    events += [(rect[2], 1, 1, pos) for pos, rect in enumerate(rects)]
+    events.sort()
+
+    matches: list[list[int]] = [[] for _ in queries]
+    open_boxes: dict[int, None] = {}
+    open_queries: dict[int, None] = {}
+    for _, is_end, is_query, item in events:
+        if is_end:
+            (open_queries if is_query else open_boxes).pop(item, None)
+        elif is_query:
+            _, y0, _, y1 = rects[item]
+            matches[item].extend(idx for idx in open_boxes if boxes[idx][1] <= y1 and y0 <= boxes[idx][3])
+            open_queries[item] = None
+        else:
+            _, y0, _, y1 = boxes[item]
+            for pos in open_queries:
+                if rects[pos][1] <= y1 and y0 <= rects[pos][3]:
+                    matches[pos].append(item)
+            open_boxes[item] = None
+
+    results: list[list[HitTestCandidate]] = []
+    for query, rect, candidates in zip(queries, rects, matches):
+        if len(query) == 2:
+            scored = [_score_point(boxes[idx], page.z_index[idx], idx, *query) for idx in candidates]
+            ranked = sorted(item for item in scored if item is not None)
+            results.append([_candidate(page, idx, distance) for distance, _, idx in ranked])
+        else:
+            scored = [_score_rect(boxes[idx], page.z_index[idx], idx, rect) for idx in candidates]
+            ranked = sorted(item for item in scored if item is not None)
+            results.append([_candidate(page, idx, -negative_area) for negative_area, _, idx in ranked])
+    return results
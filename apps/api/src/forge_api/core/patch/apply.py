@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import logging
+import math
+from typing import Iterator
 
-import fitz
-
-from forge_api.core.fonts.resolve import resolve_builtin_font
+from forge_api.core.fonts.inventory import BUILTIN_INVENTORY, EmbeddedFont, FontInventory
+from forge_api.core.fonts.metrics import GlyphAdvances, glyph_advances
 from forge_api.core.patch.fonts import DEFAULT_FONT
 from forge_api.schemas.ir import IRPage, IRPrimitive
 from forge_api.schemas.patch import PatchOp, PatchOpResult, PatchReplaceText, PatchSetStyle
@@ -15,6 +16,7 @@ MIN_FONT_SCALE = 0.70
 MAX_BBOX_EXPAND = 1.50
 COLLISION_MARGIN = 2.0
 FONT_SIZE_STEP_PT = 0.5
+COLLISION_CELL_PT = 64.0
 
 logger = logging.getLogger("forge_api")
 _font_fallback_logged: set[tuple[str | None, int | None, str | None, str | None]] = set()
@@ -27,6 +29,7 @@ class FontContext:
     fidelity: float
     reason: str
     warnings: list[dict[str, object]]
+    embedded: EmbeddedFont | None = None
 
 
 @dataclass(frozen=True)
@@ -62,38 +65,47 @@ def _log_font_warning(
     )
 
 
-def _resolve_font(raw_font: str | None) -> FontContext:
-    builtin_font, fidelity, reason = resolve_builtin_font(raw_font)
+def _resolve_font(raw_font: str | None, text: str, fonts: FontInventory) -> FontContext:
+    entry = fonts.entry(raw_font)
+    # The source PDF's own font measures the text when it has every glyph; export draws with it too.
+    embedded = fonts.embedded_for(raw_font, text)
+    if embedded is not None:
+        return FontContext(
+            raw_font=raw_font,
+            font_name=entry.builtin,
+            fidelity=1.0,
+            reason="embedded",
+            warnings=[],
+            embedded=embedded,
+        )
     warnings: list[dict[str, object]] = []
-    if reason != "builtin":
+    if entry.reason != "builtin":
         warnings.append(
             {
                 "code": "font_fallback",
                 "raw_font": raw_font,
-                "used": builtin_font,
-                "fidelity": fidelity,
-                "reason": reason,
+                "used": entry.builtin,
+                "fidelity": entry.fidelity,
+                "reason": entry.reason,
             }
         )
     return FontContext(
         raw_font=raw_font,
-        font_name=builtin_font,
-        fidelity=fidelity,
-        reason=reason,
+        font_name=entry.builtin,
+        fidelity=entry.fidelity,
+        reason=entry.reason,
         warnings=warnings,
     )
 
 
-def _measure_text_width(
-    text: str,
+def _glyph_advances(
     font: FontContext,
-    font_size: float,
     doc_id: str,
     page_index: int,
     primitive_id: str,
-) -> float:
+) -> GlyphAdvances:
     try:
-        return fitz.get_text_length(text, fontname=font.font_name, fontsize=font_size)
+        return glyph_advances(font.font_name)
     except (RuntimeError, ValueError) as exc:
         _log_font_warning(doc_id, page_index, primitive_id, font.raw_font, exc)
         if font.font_name != DEFAULT_FONT:
@@ -107,22 +119,34 @@ def _measure_text_width(
                 }
             )
         font.font_name = DEFAULT_FONT
-        return fitz.get_text_length(text, fontname=DEFAULT_FONT, fontsize=font_size)
+        return glyph_advances(DEFAULT_FONT)
 
 
-def _fits_bbox(
-    text: str,
-    font: FontContext,
-    font_size: float,
-    bbox: list[float],
-    doc_id: str,
-    page_index: int,
-    primitive_id: str,
-) -> bool:
-    width = _measure_text_width(text, font, font_size, doc_id, page_index, primitive_id)
+def _fits_bbox(unit_width: float, font_size: float, bbox: list[float]) -> bool:
     max_width = bbox[2] - bbox[0]
     max_height = bbox[3] - bbox[1]
-    return width <= max_width and font_size <= max_height
+    return unit_width * font_size <= max_width and font_size <= max_height
+
+
+def _step_sizes(font_size: float, min_size: float) -> list[float]:
+    sizes: list[float] = []
+    next_size = font_size
+    while next_size - FONT_SIZE_STEP_PT >= min_size:
+        next_size = round(next_size - FONT_SIZE_STEP_PT, 2)
+        sizes.append(next_size)
+    return sizes
+
+
+def _largest_fitting_size(unit_width: float, sizes: list[float], bbox: list[float]) -> float | None:
+    # Sizes descend and width is linear in size, so the fitting sizes form a suffix.
+    lo, hi = 0, len(sizes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _fits_bbox(unit_width, sizes[mid], bbox):
+            hi = mid
+        else:
+            lo = mid + 1
+    return sizes[lo] if lo < len(sizes) else None
 
 
 def _bbox_overlaps(a: list[float], b: list[float], margin: float) -> bool:
@@ -136,18 +160,69 @@ def _bbox_overlaps(a: list[float], b: list[float], margin: float) -> bool:
     )
 
 
-def _bbox_collides(
-    candidate: list[float],
-    primitives: list[IRPrimitive],
-    target_id: str,
-    margin: float,
-) -> bool:
-    for primitive in primitives:
-        if primitive.id == target_id:
-            continue
-        if _bbox_overlaps(candidate, primitive.bbox, margin):
-            return True
-    return False
+class CollisionIndex:
+    """Uniform grid over a page's primitives for bbox-expansion collision checks.
+
+    The grid is built on the first query of a patch application and kept current as
+    ops move primitives, so each check only looks at primitives near the candidate.
+    """
+
+    def __init__(
+        self,
+        primitives: list[IRPrimitive],
+        page_width: float,
+        page_height: float,
+        cell_size: float = COLLISION_CELL_PT,
+    ) -> None:
+        self.primitives = primitives
+        self.cell_size = cell_size
+        # Off-page coordinates clamp into the edge cells, as in the hit-test grid.
+        self._max_cx = max(1, math.ceil(max(page_width, 1.0) / cell_size)) - 1
+        self._max_cy = max(1, math.ceil(max(page_height, 1.0) / cell_size)) - 1
+        self._bins: dict[tuple[int, int], set[int]] | None = None
+
+    def _cells(self, bbox: list[float], margin: float = 0.0) -> Iterator[tuple[int, int]]:
+        x0, y0, x1, y1 = bbox
+        size = self.cell_size
+
+        def _span(low: float, high: float, max_cell: int) -> range:
+            start = max(0, min(math.floor(low / size), max_cell))
+            end = max(0, min(math.floor(high / size), max_cell))
+            return range(start, end + 1)
+
+        for cx in _span(x0 - margin, x1 + margin, self._max_cx):
+            for cy in _span(y0 - margin, y1 + margin, self._max_cy):
+                yield (cx, cy)
+
+    def _grid(self) -> dict[tuple[int, int], set[int]]:
+        if self._bins is None:
+            bins: dict[tuple[int, int], set[int]] = {}
+            for idx, primitive in enumerate(self.primitives):
+                for cell in self._cells(primitive.bbox):
+                    bins.setdefault(cell, set()).add(idx)
+            self._bins = bins
+        return self._bins
+
+    def move(self, idx: int, old_bbox: list[float], new_bbox: list[float]) -> None:
+        if self._bins is None or old_bbox == new_bbox:
+            return
+        for cell in self._cells(old_bbox):
+            self._bins.get(cell, set()).discard(idx)
+        for cell in self._cells(new_bbox):
+            self._bins.setdefault(cell, set()).add(idx)
+
+    def collides(self, candidate: list[float], target_id: str, margin: float) -> bool:
+        bins = self._grid()
+        seen: set[int] = set()
+        for cell in self._cells(candidate, margin):
+            for idx in bins.get(cell, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                primitive = self.primitives[idx]
+                if primitive.id != target_id and _bbox_overlaps(candidate, primitive.bbox, margin):
+                    return True
+        return False
 
 
 def _fit_text_to_box(
@@ -156,12 +231,16 @@ def _fit_text_to_box(
     font_size: float,
     bbox: list[float],
     page_width: float,
-    primitives: list[IRPrimitive],
+    collisions: CollisionIndex,
     doc_id: str,
     page_index: int,
     primitive_id: str,
 ) -> TextFitResult:
-    if _fits_bbox(text, font, font_size, bbox, doc_id, page_index, primitive_id):
+    if font.embedded is not None:
+        unit_width = font.embedded.unit_width(text)
+    else:
+        unit_width = _glyph_advances(font, doc_id, page_index, primitive_id).unit_width(text)
+    if _fits_bbox(unit_width, font_size, bbox):
         return TextFitResult(
             ok=True,
             font_size=font_size,
@@ -172,26 +251,24 @@ def _fit_text_to_box(
         )
 
     min_size = round(font_size * MIN_FONT_SCALE, 2)
-    next_size = font_size
-    while next_size - FONT_SIZE_STEP_PT >= min_size:
-        next_size = round(next_size - FONT_SIZE_STEP_PT, 2)
-        if _fits_bbox(text, font, next_size, bbox, doc_id, page_index, primitive_id):
-            return TextFitResult(
-                ok=True,
-                font_size=next_size,
-                bbox=bbox,
-                overflow=False,
-                font_adjusted=True,
-                bbox_adjusted=False,
-            )
+    fitted_size = _largest_fitting_size(unit_width, _step_sizes(font_size, min_size), bbox)
+    if fitted_size is not None:
+        return TextFitResult(
+            ok=True,
+            font_size=fitted_size,
+            bbox=bbox,
+            overflow=False,
+            font_adjusted=True,
+            bbox_adjusted=False,
+        )
 
     x0, y0, x1, y1 = bbox
     width = x1 - x0
     max_width = min(page_width, x0 + width * MAX_BBOX_EXPAND) - x0
     expanded_bbox = [x0, y0, x0 + max_width, y1]
     if max_width > width:
-        if not _bbox_collides(expanded_bbox, primitives, primitive_id, COLLISION_MARGIN):
-            if _fits_bbox(text, font, min_size, expanded_bbox, doc_id, page_index, primitive_id):
+        if not collisions.collides(expanded_bbox, primitive_id, COLLISION_MARGIN):
+            if _fits_bbox(unit_width, min_size, expanded_bbox):
                 return TextFitResult(
                     ok=True,
                     font_size=min_size,
@@ -228,18 +305,20 @@ def _apply_replace_text(
     page: IRPage,
     primitive: IRPrimitive,
     op: PatchReplaceText,
-    primitives: list[IRPrimitive],
+    collisions: CollisionIndex,
+    position: int,
+    fonts: FontInventory,
 ) -> PatchOpResult:
     font_name = primitive.style.get("font") if isinstance(primitive.style, dict) else None
     font_size = float(primitive.style.get("size") or 0.0)
-    font = _resolve_font(font_name)
+    font = _resolve_font(font_name, op.new_text, fonts)
     fit = _fit_text_to_box(
         op.new_text,
         font,
         font_size,
         primitive.bbox,
         page.width_pt,
-        primitives,
+        collisions,
         page.doc_id,
         page.page_index,
         primitive.id,
@@ -261,6 +340,7 @@ def _apply_replace_text(
 
     primitive.text = op.new_text
     primitive.style["size"] = fit.font_size
+    collisions.move(position, primitive.bbox, fit.bbox)
     primitive.bbox = fit.bbox
     primitive.patch_meta = {
         "overflow": fit.overflow,
@@ -280,19 +360,50 @@ def _apply_replace_text(
     )
 
 
-def apply_ops_to_page(page: IRPage, ops: list[PatchOp]) -> tuple[IRPage, list[PatchOpResult]]:
-    patched_page = page.model_copy(deep=True)
-    primitive_by_id = {primitive.id: primitive for primitive in patched_page.primitives}
+def _clone_for_write(primitive: IRPrimitive) -> IRPrimitive:
+    # Ops only reassign bbox/text/patch_meta and write into style, so a shallow copy with its
+    # own style dict is enough; signature_fields and font_ref stay shared with the source.
+    return primitive.model_copy(update={"style": dict(primitive.style)})
+
+
+def apply_ops_to_page(
+    page: IRPage,
+    ops: list[PatchOp],
+    fonts: FontInventory | None = None,
+) -> tuple[IRPage, list[PatchOpResult]]:
+    """Apply ``ops`` copy-on-write: the result shares every untouched primitive with ``page``.
+
+    ``page`` is never modified, and neither may the returned page be modified in place, since
+    its primitives can be shared with cached pages. ``fonts`` is the document's font inventory;
+    without one, text is fitted with builtin fonts only.
+    """
+    if fonts is None:
+        fonts = BUILTIN_INVENTORY
+    primitives = list(page.primitives)
+    # Ops never add, remove or reorder primitives, so the copy inherits the id positions as-is.
+    index_by_id = page.primitive_positions()
+    patched_page = page.model_copy(update={"primitives": primitives})
+    collisions = CollisionIndex(primitives, page.width_pt, page.height_pt)
+    cloned: set[str] = set()
     results: list[PatchOpResult] = []
 
     for op in ops:
-        target = primitive_by_id.get(op.target_id)
-        if target is None:
+        idx = index_by_id.get(op.target_id)
+        if idx is None:
+            continue
+        target = primitives[idx]
+        applies = (op.op == "set_style" and target.kind == "path") or (
+            op.op == "replace_text" and target.kind == "text"
+        )
+        if not applies:
             continue
-        if op.op == "set_style" and target.kind == "path":
+        if target.id not in cloned:
+            target = primitives[idx] = _clone_for_write(target)
+            cloned.add(target.id)
+        if op.op == "set_style":
             _apply_set_style(target, op)
             results.append(PatchOpResult(target_id=target.id))
-        elif op.op == "replace_text" and target.kind == "text":
-            results.append(_apply_replace_text(patched_page, target, op, patched_page.primitives))
+        else:
+            results.append(_apply_replace_text(patched_page, target, op, collisions, idx, fonts))
 
     return patched_page, results
@@ -2,8 +2,7 @@ from __future__ import annotations
 
 import logging
 
-import fitz
-
+from forge_api.core.fonts.metrics import glyph_advances
 from forge_api.core.fonts.resolve import resolve_builtin_font
 
 
@@ -29,7 +28,7 @@ def safe_get_text_length(
 ) -> float:
     resolved_font, _, _ = resolve_builtin_font(font_name)
     try:
-        return fitz.get_text_length(text, fontname=resolved_font, fontsize=font_size)
+        return glyph_advances(resolved_font).text_width(text, font_size)
     except (RuntimeError, ValueError) as exc:
         logger.warning(
             "Unsupported font fallback doc_id=%s page_index=%s primitive_id=%s font=%s error=%s",
@@ -39,4 +38,4 @@ def safe_get_text_length(
             font_name,
             exc.__class__.__name__,
         )
-        return fitz.get_text_length(text, fontname=DEFAULT_FONT, fontsize=font_size)
+        return glyph_advances(DEFAULT_FONT).text_width(text, font_size)
@@ -4,6 +4,7 @@ import logging
 import traceback
 
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -15,6 +16,7 @@ from forge_api.routers.ai_overlay import router as ai_overlay_router
 from forge_api.routers.decoded import router as decoded_router
 from forge_api.routers.decode import router as decode_router
 from forge_api.routers.documents import router as documents_router
+from forge_api.routers.elements import router as elements_router
 from forge_api.routers.export import router as export_router
 from forge_api.routers.health import router as health_router
 from forge_api.routers.ir import router as ir_router
@@ -129,7 +131,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={
             "error": "validation_error",
             "message": "Invalid request payload",
-            "details": exc.errors(),
+            # Validator errors carry the raised exception in ``ctx``; render it as text.
+            "details": jsonable_encoder(exc.errors(), custom_encoder={Exception: str}),
             "request_id": request_id,
         },
     )
@@ -156,6 +159,7 @@ app.include_router(documents_router)
 app.include_router(forge_router)
 app.include_router(decode_router)
 app.include_router(decoded_router)
+app.include_router(elements_router)
 app.include_router(ir_router)
 app.include_router(patches_router)
 app.include_router(export_router)
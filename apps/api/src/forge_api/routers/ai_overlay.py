@@ -1,16 +1,15 @@
 from __future__ import annotations
 
 import logging
-import json
 from typing import Any
 
 from fastapi import APIRouter
 
 from forge_api.core.errors import APIError, AIError
 from forge_api.schemas.patch import DecodedSelection, OverlayPatchPlan, OverlayPatchPlanRequest
+from forge_api.services.decoded_store import read_cached_decoded_document
 from forge_api.services.forge_manifest import build_forge_manifest
 from forge_api.services.openai_client import OpenAIClient
-from forge_api.services.storage import get_storage
 
 router = APIRouter(prefix="/v1/ai", tags=["ai"])
 logger = logging.getLogger("forge_api.ai_overlay")
@@ -270,10 +269,10 @@ def plan_overlay_patch(payload: OverlayPatchPlanRequest) -> dict[str, Any]:
     decoded_doc: dict[str, Any] | None = None
     if payload.decoded_selection:
         try:
-            storage = get_storage()
-            decoded_key = f"documents/{payload.doc_id}/decoded/v1.json"
-            if storage.exists(decoded_key):
-                decoded_doc = json.loads(storage.get_bytes(decoded_key).decode("utf-8"))
+            # Prompt context only needs text runs, so the cheap profile is enough.
+            cached = read_cached_decoded_document(payload.doc_id, "text")
+            if cached is not None:
+                decoded_doc = cached.model_dump(mode="json")
         except Exception:
             decoded_doc = None
 
@@ -1,13 +1,11 @@
 from __future__ import annotations
 
-import json
 import logging
 
 from fastapi import APIRouter, HTTPException
-from pydantic import ValidationError
 
-from forge_api.schemas.decoded import DecodedDocument
-from forge_api.services.pdf_decode_v1 import decode_pdf_to_decoded_document
+from forge_api.schemas.decoded import DecodeProfile, DecodedDocument
+from forge_api.services.decoded_store import decode_and_store_decoded_document, read_cached_decoded_document
 from forge_api.services.storage import get_storage
 
 router = APIRouter(prefix="/v1/documents", tags=["decoded"])
@@ -18,24 +16,16 @@ def _pdf_path(doc_id: str) -> str:
     return f"documents/{doc_id}/original.pdf"
 
 
-def _decoded_path(doc_id: str) -> str:
-    return f"documents/{doc_id}/decoded/v1.json"
-
-
 @router.get("/{doc_id}/decoded", response_model=DecodedDocument)
-def get_decoded_document(doc_id: str, v: int = 1) -> DecodedDocument:
+def get_decoded_document(doc_id: str, v: int = 1, profile: DecodeProfile = "full") -> DecodedDocument:
     if v != 1:
         raise HTTPException(status_code=400, detail="Unsupported decoded version")
 
-    storage = get_storage()
-    decoded_key = _decoded_path(doc_id)
-    if storage.exists(decoded_key):
-        payload = json.loads(storage.get_bytes(decoded_key).decode("utf-8"))
-        try:
-            return DecodedDocument(**payload)
-        except ValidationError as exc:
-            logger.warning("Cached decoded payload invalid for doc_id=%s error=%s", doc_id, exc)
+    cached = read_cached_decoded_document(doc_id, profile)
+    if cached is not None:
+        return cached
 
+    storage = get_storage()
     pdf_key = _pdf_path(doc_id)
     if not storage.exists(pdf_key):
         raise HTTPException(status_code=404, detail="Document not found")
@@ -48,14 +38,7 @@ def get_decoded_document(doc_id: str, v: int = 1) -> DecodedDocument:
         raise HTTPException(status_code=500, detail="Failed to read document") from exc
 
     try:
-        decoded = decode_pdf_to_decoded_document(doc_id, pdf_bytes)
+        return decode_and_store_decoded_document(doc_id, pdf_bytes, profile)
     except Exception as exc:
-        logger.exception("Decode failed for doc_id=%s", doc_id)
+        logger.exception("Decode failed for doc_id=%s profile=%s", doc_id, profile)
         raise HTTPException(status_code=422, detail=f"Decode failed for document {doc_id}: {exc}") from exc
-
-    storage.put_bytes(
-        decoded_key,
-        decoded.model_dump_json().encode("utf-8"),
-        content_type="application/json",
-    )
-    return decoded
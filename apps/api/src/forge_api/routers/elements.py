@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+
+from fastapi import APIRouter, HTTPException
+
+from forge_api.schemas.elements import ElementQueryRequest, ElementQueryResponse
+from forge_api.services.decoded_store import decoded_page_version, load_decoded_document
+from forge_api.services.element_index import ElementPageIndex, get_element_index_cache, manifest_page_index
+from forge_api.services.forge_manifest import build_forge_manifest, forge_manifest_version
+
+router = APIRouter(prefix="/v1/documents", tags=["elements"])
+logger = logging.getLogger("forge_api.elements")
+
+
+# Cache keys come from storage versions, so a hit never loads or validates the document.
+def _manifest_page_index(doc_id: str, page_index: int) -> ElementPageIndex:
+    index = manifest_page_index(
+        doc_id,
+        forge_manifest_version(doc_id),
+        page_index,
+        lambda: build_forge_manifest(doc_id),
+    )
+    if index is None:
+        raise IndexError("Page index out of range")
+    return index
+
+
+def _decoded_page_index(doc_id: str, page_index: int, profile: str) -> ElementPageIndex:
+    version = decoded_page_version(doc_id, profile, page_index)
+    key = ("decoded", doc_id, profile, page_index, version)
+    cache = get_element_index_cache()
+    cached = cache.get(key) if version is not None else None
+    if cached is not None:
+        return cached
+    decoded = load_decoded_document(doc_id, profile)
+    if page_index >= len(decoded.pages):
+        raise IndexError("Page index out of range")
+    page = decoded.pages[page_index]
+    index = ElementPageIndex.build([element.model_dump(mode="json") for element in page.elements], "bbox_norm")
+    # Pages still waiting on OCR are rebuilt per query, so the load keeps queueing and retrying them.
+    if version is not None and page.ocr_status not in {"pending", "failed"}:
+        cache.put(key, index)
+    return index
+
+
+@router.post("/{doc_id}/elements/query", response_model=ElementQueryResponse)
+def query_elements(doc_id: str, payload: ElementQueryRequest) -> ElementQueryResponse:
+    try:
+        if payload.source == "manifest":
+            index = _manifest_page_index(doc_id, payload.page_index)
+        else:
+            index = _decoded_page_index(doc_id, payload.page_index, payload.profile)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail="Document not found") from exc
+    except IndexError as exc:
+        raise HTTPException(status_code=404, detail="Page not found") from exc
+    except (RuntimeError, ValueError) as exc:
+        # Unreadable PDFs (fitz raises RuntimeError subclasses) and invalid stored payloads.
+        logger.error("Element query failed doc_id=%s source=%s error=%s", doc_id, payload.source, exc)
+        raise HTTPException(status_code=422, detail=f"Decode failed for document {doc_id}: {exc}") from exc
+
+    if payload.point is not None:
+        if payload.k is not None:
+            elements = index.nearest(payload.point.x, payload.point.y, payload.k)
+        else:
+            elements = index.at_point(payload.point.x, payload.point.y)
+    else:
+        rect = payload.rect
+        elements = index.in_rect(rect.x0, rect.y0, rect.x1, rect.y1, contained=payload.contained)
+
+    return ElementQueryResponse(
+        doc_id=doc_id,
+        page_index=payload.page_index,
+        source=payload.source,
+        elements=elements,
+    )
@@ -8,17 +8,16 @@ from fastapi.responses import StreamingResponse
 
 from forge_api.core.errors import APIError
 from forge_api.schemas.patch import OverlayPatchCommitRequest, OverlayPatchCommitResponse
-from forge_api.services.forge_manifest import build_forge_manifest
+from forge_api.services.correspondence import resolve_selection
+from forge_api.services.forge_manifest import build_forge_manifest, forge_manifest_version
 from forge_api.services.forge_overlay import (
+    OverlayVersionConflict,
     append_overlay_patchset,
-    build_overlay_state,
-    load_overlay_patch_log,
-    load_overlay_custom_entries,
     load_overlay_version,
-    resolve_overlay_selection,
     upsert_overlay_custom_entries,
 )
-from forge_api.services.storage import get_storage
+from forge_api.services.overlay_state import load_overlay_pages
+from forge_api.services.storage import PreconditionFailed, get_storage
 
 router = APIRouter(prefix="/v1/documents", tags=["forge"])
 logger = logging.getLogger("forge_api.forge")
@@ -73,13 +72,7 @@ def get_forge_overlay(doc_id: str, page_index: int = Query(..., ge=0)) -> dict:
                 "suggestion": "Try re-saving the PDF or removing password protection.",
             },
         ) from exc
-    patchsets = load_overlay_patch_log(doc_id)
-    overlay_version = len(patchsets)
-    overlay_state = build_overlay_state(
-        manifest,
-        patchsets,
-        custom_entries=load_overlay_custom_entries(doc_id),
-    )
+    overlay_state, overlay_version = load_overlay_pages(doc_id, manifest, [page_index])
     page_overlay = overlay_state.get(page_index, {})
     page_primitives = page_overlay.get("primitives", {})
     entries = [
@@ -168,7 +161,13 @@ def commit_forge_overlay(doc_id: str, payload: OverlayPatchCommitRequest) -> Ove
                 "current_overlay_version": current_version,
             },
         )
-    resolved = resolve_overlay_selection(selection_payload, manifest_elements)
+    resolved = resolve_selection(
+        doc_id,
+        manifest,
+        forge_manifest_version(doc_id),
+        payload.page_index,
+        selection_payload,
+    )
     decoded_lookup = {
         element.id: element
         for element in (payload.decoded_selection.elements if payload.decoded_selection else [])
@@ -214,11 +213,7 @@ def commit_forge_overlay(doc_id: str, payload: OverlayPatchCommitRequest) -> Ove
     if custom_entries:
         upsert_overlay_custom_entries(doc_id, custom_entries)
 
-    overlay_state = build_overlay_state(
-        manifest,
-        load_overlay_patch_log(doc_id),
-        custom_entries=load_overlay_custom_entries(doc_id),
-    )
+    overlay_state, _ = load_overlay_pages(doc_id, manifest, [payload.page_index])
     page_primitives = overlay_state.get(payload.page_index, {}).get("primitives", {})
     allowed_ids = manifest_ids | {entry["element_id"] for entry in custom_entries}
 
@@ -260,12 +255,26 @@ def commit_forge_overlay(doc_id: str, payload: OverlayPatchCommitRequest) -> Ove
                 },
             )
 
-    record = append_overlay_patchset(doc_id, payload.ops)
-    overlay_state = build_overlay_state(
-        manifest,
-        load_overlay_patch_log(doc_id),
-        custom_entries=load_overlay_custom_entries(doc_id),
-    )
+    # The early version check fails fast; the conditional append enforces it across replicas.
+    try:
+        record = append_overlay_patchset(doc_id, payload.ops, base_version=current_version)
+    except OverlayVersionConflict as exc:
+        raise APIError(
+            status_code=409,
+            code="PATCH_CONFLICT",
+            message="Overlay version mismatch",
+            details={
+                "current_overlay_version": exc.current_version,
+            },
+        ) from exc
+    except PreconditionFailed as exc:
+        raise APIError(
+            status_code=409,
+            code="COMMIT_CONTENTION",
+            message="Overlay log is busy, retry the commit",
+            details={"doc_id": doc_id},
+        ) from exc
+    overlay_state, _ = load_overlay_pages(doc_id, manifest, [payload.page_index])
     page_overlay = overlay_state.get(payload.page_index, {})
     page_primitives = page_overlay.get("primitives", {})
     entries = [
@@ -2,8 +2,16 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException, Query
 
-from forge_api.core.ir.spatial_index import SpatialIndex, hit_test_point, hit_test_rect
-from forge_api.schemas.ir import HitTestRequest, HitTestResponse, IRPage
+from forge_api.core.ir.spatial_index import HitTestCandidate, hit_test_batch, hit_test_point, hit_test_rect
+from forge_api.schemas.ir import (
+    HitTestBatchRequest,
+    HitTestBatchResponse,
+    HitTestBatchResult,
+    HitTestRequest,
+    HitTestResponse,
+    IRPage,
+)
+from forge_api.services.ir_index import IndexedPage, get_indexed_page
 from forge_api.services.ir_pdf import get_page_ir
 
 router = APIRouter(prefix="/v1", tags=["ir"])
@@ -19,16 +27,25 @@ def get_ir(doc_id: str, page: int = Query(..., ge=0)) -> IRPage:
         raise HTTPException(status_code=404, detail="Page not found") from exc
 
 
+def _candidate_payload(candidate: HitTestCandidate) -> dict:
+    return {
+        "id": candidate.id,
+        "score": candidate.score,
+        "bbox": list(candidate.bbox),
+        "kind": candidate.kind,
+    }
+
+
 @router.post("/hittest/{doc_id}", response_model=HitTestResponse)
 def hit_test(doc_id: str, payload: HitTestRequest, page: int = Query(..., ge=0)) -> HitTestResponse:
     try:
-        page_ir = get_page_ir(doc_id, page)
+        indexed = get_indexed_page(doc_id, page)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail="Document not found") from exc
     except IndexError as exc:
         raise HTTPException(status_code=404, detail="Page not found") from exc
 
-    index = SpatialIndex.build(page_ir)
+    page_ir, index = indexed.page, indexed.index
     if payload.point:
         candidates = hit_test_point(page_ir, index, payload.point.x, payload.point.y)
     else:
@@ -38,13 +55,37 @@ def hit_test(doc_id: str, payload: HitTestRequest, page: int = Query(..., ge=0))
     return HitTestResponse(
         doc_id=doc_id,
         page_index=page,
-        candidates=[
-            {
-                "id": candidate.id,
-                "score": candidate.score,
-                "bbox": list(candidate.bbox),
-                "kind": candidate.kind,
-            }
-            for candidate in candidates
-        ],
+        candidates=[_candidate_payload(candidate) for candidate in candidates],
     )
+
+
+@router.post("/hittest/{doc_id}/batch", response_model=HitTestBatchResponse)
+def hit_test_many(doc_id: str, payload: HitTestBatchRequest) -> HitTestBatchResponse:
+    by_page: dict[int, list[int]] = {}
+    for position, query in enumerate(payload.queries):
+        by_page.setdefault(query.page_index, []).append(position)
+
+    results: list[HitTestBatchResult | None] = [None] * len(payload.queries)
+    for page_index, positions in by_page.items():
+        try:
+            indexed: IndexedPage = get_indexed_page(doc_id, page_index)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail="Document not found") from exc
+        except IndexError as exc:
+            raise HTTPException(status_code=404, detail=f"Page {page_index} not found") from exc
+
+        queries = []
+        for position in positions:
+            query = payload.queries[position]
+            if query.point:
+                queries.append((query.point.x, query.point.y))
+            else:
+                queries.append((query.rect.x0, query.rect.y0, query.rect.x1, query.rect.y1))
+        answers = hit_test_batch(indexed.page, queries)
+        for position, candidates in zip(positions, answers):
+            results[position] = HitTestBatchResult(
+                page_index=page_index,
+                candidates=[_candidate_payload(candidate) for candidate in candidates],
+            )
+
+    return HitTestBatchResponse(doc_id=doc_id, results=results)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 
 from botocore.exceptions import ClientError
 from fastapi import APIRouter, HTTPException, Query, Request
@@ -12,72 +13,92 @@ from forge_api.core.patch.validate import validate_patch_ops
 from forge_api.core.errors import APIError, StorageError
 from forge_api.core.request_context import get_request_id
 from forge_api.schemas.ir import IRPage
-from forge_api.schemas.patch import PatchCommitRequest, PatchCommitResponse, PatchsetListResponse
-from forge_api.services.ir_pdf import get_base_ir_page
-from forge_api.services.patch_store import append_patchset, load_patch_log, revert_last_patchset
+from forge_api.schemas.patch import (
+    BulkPatchCommitRequest,
+    BulkPatchCommitResponse,
+    PatchCommitRequest,
+    PatchCommitResponse,
+    PatchOpResult,
+    PatchsetInput,
+    PatchsetListResponse,
+    PatchsetRecord,
+    SelectionFingerprint,
+)
+from forge_api.services.composite_ir import get_composite_page, store_committed_composite
+from forge_api.services.font_inventory import get_font_inventory
+from forge_api.services.patch_compaction import maybe_schedule_compaction
+from forge_api.services.patch_store import (
+    PatchCursorNotFound,
+    PatchPagesChanged,
+    append_patchset_records,
+    build_patchset_record,
+    load_page_patchsets,
+    load_patch_log,
+    load_patch_log_page,
+    revert_last_patchset,
+)
+from forge_api.services.storage import PreconditionFailed
 
 router = APIRouter(prefix="/v1", tags=["patches"])
 logger = logging.getLogger("forge_api")
 
+MAX_PATCHSET_PAGE = 500
 
-@router.post("/patch/commit", response_model=PatchCommitResponse)
-def commit_patch(payload: dict, request: Request) -> PatchCommitResponse:
-    request_id = get_request_id(request)
-    try:
-        parsed = PatchCommitRequest.model_validate(payload)
-    except ValidationError as exc:
-        raise APIError(
-            status_code=400,
-            code="invalid_patch_payload",
-            message="Invalid patch payload",
-            details={"errors": exc.errors()},
-        ) from exc
 
-    patchset = parsed.patchset
+@dataclass
+class _PreparedCommit:
+    patchset: PatchsetInput
+    page_patchsets: list[PatchsetRecord]
+    next_composite: IRPage
+    record: PatchsetRecord
+    results: list[PatchOpResult]
+
+
+def _check_patchset(doc_id: str, patchset: PatchsetInput) -> None:
     if not patchset.ops:
         raise APIError(
             status_code=400,
             code="empty_patchset",
             message="Patchset is empty",
-            details={"doc_id": parsed.doc_id},
+            details={"doc_id": doc_id},
         )
     if patchset.selected_ids is not None and not patchset.selected_ids:
         raise APIError(
             status_code=400,
             code="missing_selection",
             message="selected_ids cannot be empty",
-            details={"doc_id": parsed.doc_id},
+            details={"doc_id": doc_id},
         )
 
-    logger.info(
-        "Patch commit request_id=%s doc_id=%s page_index=%s stage=commit",
-        request_id,
-        parsed.doc_id,
-        patchset.page_index,
-    )
 
+def _check_allowed_targets(doc_id: str, allowed_targets: list[SelectionFingerprint] | None) -> None:
+    if allowed_targets is not None and not allowed_targets:
+        raise APIError(
+            status_code=400,
+            code="missing_selection",
+            message="allowed_targets cannot be empty",
+            details={"doc_id": doc_id},
+        )
+
+
+def _prepare_commit(
+    doc_id: str,
+    patchset: PatchsetInput,
+    allowed_targets: list[SelectionFingerprint] | None,
+    page_patchsets: list[PatchsetRecord],
+) -> _PreparedCommit:
+    """Validate one page's patchset against its current composite and apply it, without persisting."""
     try:
-        base_page = get_base_ir_page(parsed.doc_id, patchset.page_index)
+        composite_page = get_composite_page(doc_id, patchset.page_index, page_patchsets)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail="Document not found") from exc
     except IndexError as exc:
         raise HTTPException(status_code=404, detail="Page not found") from exc
 
-    patch_log = load_patch_log(parsed.doc_id)
-    existing_ops = [op for record in patch_log if record.page_index == patchset.page_index for op in record.ops]
-    composite_page, _ = apply_ops_to_page(base_page, existing_ops)
-
     allowed_ids = None
-    if parsed.allowed_targets is not None:
-        if not parsed.allowed_targets:
-            raise APIError(
-                status_code=400,
-                code="missing_selection",
-                message="allowed_targets cannot be empty",
-                details={"doc_id": parsed.doc_id},
-            )
-        allowed_ids = {target.element_id for target in parsed.allowed_targets}
-        for target in parsed.allowed_targets:
+    if allowed_targets is not None:
+        allowed_ids = {target.element_id for target in allowed_targets}
+        for target in allowed_targets:
             if target.page_index != patchset.page_index:
                 raise APIError(
                     status_code=409,
@@ -86,7 +107,7 @@ def commit_patch(payload: dict, request: Request) -> PatchCommitResponse:
                     details={"element_id": target.element_id, "page_index": target.page_index},
                 )
         primitives_by_id = {primitive.id: primitive for primitive in composite_page.primitives}
-        for target in parsed.allowed_targets:
+        for target in allowed_targets:
             primitive = primitives_by_id.get(target.element_id)
             if primitive is None:
                 raise APIError(
@@ -155,66 +176,245 @@ def commit_patch(payload: dict, request: Request) -> PatchCommitResponse:
             details={"errors": validation.errors},
         )
 
-    _, results = apply_ops_to_page(composite_page, patchset.ops)
+    next_composite, results = apply_ops_to_page(composite_page, patchset.ops, get_font_inventory(doc_id))
     warnings = [
         f"Text did not fit for {result.target_id}"
         for result in results
         if getattr(result, "did_not_fit", False)
     ]
+    record = build_patchset_record(
+        patchset.ops,
+        patchset.page_index,
+        patchset.rationale_short,
+        validation_ids,
+        validation.diff_summary,
+        results,
+        warnings,
+    )
+    return _PreparedCommit(
+        patchset=patchset,
+        page_patchsets=page_patchsets,
+        next_composite=next_composite,
+        record=record,
+        results=results,
+    )
+
+
+def _persist_commits(doc_id: str, prepared: list[_PreparedCommit], request_id: str | None) -> int:
     try:
-        record = append_patchset(
-            parsed.doc_id,
-            patchset.ops,
-            patchset.page_index,
-            patchset.rationale_short,
-            validation_ids,
-            validation.diff_summary,
-            results,
-            warnings,
-        )
-        patch_log = load_patch_log(parsed.doc_id)
+        # Validation ran against these page logs; the append re-checks them under the write lock.
+        expected = {
+            item.patchset.page_index: [record.patchset_id for record in item.page_patchsets] for item in prepared
+        }
+        version = append_patchset_records(doc_id, [item.record for item in prepared], expected)
+        for item in prepared:
+            store_committed_composite(
+                doc_id,
+                item.patchset.page_index,
+                [*item.page_patchsets, item.record],
+                item.next_composite,
+            )
+    except PatchPagesChanged as exc:
+        # Nothing was appended; a retry revalidates every page against the newer log.
+        raise APIError(
+            status_code=409,
+            code="COMMIT_CONTENTION",
+            message="Pages changed while committing, retry the commit",
+            details={"doc_id": doc_id, "page_indexes": exc.page_indexes},
+        ) from exc
+    except PreconditionFailed as exc:
+        raise APIError(
+            status_code=409,
+            code="COMMIT_CONTENTION",
+            message="Patch log is busy, retry the commit",
+            details={"doc_id": doc_id},
+        ) from exc
     except (ClientError, OSError, ValueError) as exc:
         logger.warning(
             "Patch commit storage failure request_id=%s doc_id=%s page_index=%s stage=commit error=%s",
             request_id,
-            parsed.doc_id,
-            patchset.page_index,
+            doc_id,
+            ",".join(str(item.patchset.page_index) for item in prepared),
             exc.__class__.__name__,
         )
         raise StorageError(
             status_code=502,
             code="storage_error",
             message="Storage operation failed while committing patch",
-            details={"doc_id": parsed.doc_id},
+            details={"doc_id": doc_id},
         ) from exc
-    applied_ops = [result for result in results if result.ok]
-    rejected_ops = [result for result in results if not result.ok]
+    for item in prepared:
+        maybe_schedule_compaction(doc_id, [*item.page_patchsets, item.record])
+    return version
+
+
+@router.post("/patch/commit", response_model=PatchCommitResponse)
+def commit_patch(payload: dict, request: Request) -> PatchCommitResponse:
+    request_id = get_request_id(request)
+    try:
+        parsed = PatchCommitRequest.model_validate(payload)
+    except ValidationError as exc:
+        raise APIError(
+            status_code=400,
+            code="invalid_patch_payload",
+            message="Invalid patch payload",
+            details={"errors": exc.errors()},
+        ) from exc
+
+    patchset = parsed.patchset
+    _check_patchset(parsed.doc_id, patchset)
+
+    logger.info(
+        "Patch commit request_id=%s doc_id=%s page_index=%s stage=commit",
+        request_id,
+        parsed.doc_id,
+        patchset.page_index,
+    )
+
+    page_patchsets = load_page_patchsets(parsed.doc_id, patchset.page_index)
+    _check_allowed_targets(parsed.doc_id, parsed.allowed_targets)
+    prepared = _prepare_commit(parsed.doc_id, patchset, parsed.allowed_targets, page_patchsets)
+    version = _persist_commits(parsed.doc_id, [prepared], request_id)
+    applied_ops = [result for result in prepared.results if result.ok]
+    rejected_ops = [result for result in prepared.results if not result.ok]
     return PatchCommitResponse(
-        patchset=record,
-        patch_log=patch_log,
+        patchset=prepared.record,
+        version=version,
         applied_ops=applied_ops,
         rejected_ops=rejected_ops,
     )
 
 
+@router.post("/patch/commit_bulk", response_model=BulkPatchCommitResponse)
+def commit_patch_bulk(payload: dict, request: Request) -> BulkPatchCommitResponse:
+    """Commit patchsets for many pages as one atomic log append.
+
+    Every page is validated and applied before anything is written; any failure rejects the whole batch.
+    """
+    request_id = get_request_id(request)
+    try:
+        parsed = BulkPatchCommitRequest.model_validate(payload)
+    except ValidationError as exc:
+        raise APIError(
+            status_code=400,
+            code="invalid_patch_payload",
+            message="Invalid patch payload",
+            details={"errors": exc.errors()},
+        ) from exc
+
+    if not parsed.patchsets:
+        raise APIError(
+            status_code=400,
+            code="empty_patchset",
+            message="No patchsets to commit",
+            details={"doc_id": parsed.doc_id},
+        )
+    page_indexes = [patchset.page_index for patchset in parsed.patchsets]
+    duplicates = sorted({page_index for page_index in page_indexes if page_indexes.count(page_index) > 1})
+    if duplicates:
+        raise APIError(
+            status_code=400,
+            code="duplicate_page",
+            message="Each page may appear in only one patchset",
+            details={"page_indexes": duplicates},
+        )
+    for patchset in parsed.patchsets:
+        _check_patchset(parsed.doc_id, patchset)
+    _check_allowed_targets(parsed.doc_id, parsed.allowed_targets)
+
+    targets_by_page: dict[int, list[SelectionFingerprint]] = {page_index: [] for page_index in page_indexes}
+    for target in parsed.allowed_targets or []:
+        if target.page_index not in targets_by_page:
+            raise APIError(
+                status_code=409,
+                code="PATCH_OUT_OF_SCOPE",
+                message="Selection does not match page index",
+                details={"element_id": target.element_id, "page_index": target.page_index},
+            )
+        targets_by_page[target.page_index].append(target)
+
+    logger.info(
+        "Patch bulk commit request_id=%s doc_id=%s pages=%s stage=commit",
+        request_id,
+        parsed.doc_id,
+        len(page_indexes),
+    )
+
+    # One log read serves every page in the batch.
+    patch_log = load_patch_log(parsed.doc_id)
+    patchsets_by_page: dict[int, list[PatchsetRecord]] = {page_index: [] for page_index in page_indexes}
+    for record in patch_log:
+        if record.page_index in patchsets_by_page:
+            patchsets_by_page[record.page_index].append(record)
+
+    prepared = [
+        _prepare_commit(
+            parsed.doc_id,
+            patchset,
+            targets_by_page[patchset.page_index] if parsed.allowed_targets is not None else None,
+            patchsets_by_page[patchset.page_index],
+        )
+        for patchset in parsed.patchsets
+    ]
+    _persist_commits(parsed.doc_id, prepared, request_id)
+    results = [result for item in prepared for result in item.results]
+    return BulkPatchCommitResponse(
+        doc_id=parsed.doc_id,
+        patchsets=[item.record for item in prepared],
+        applied_ops=[result for result in results if result.ok],
+        rejected_ops=[result for result in results if not result.ok],
+    )
+
+
 @router.get("/patches/{doc_id}", response_model=PatchsetListResponse)
-def list_patchsets(doc_id: str) -> PatchsetListResponse:
-    return PatchsetListResponse(doc_id=doc_id, patchsets=load_patch_log(doc_id))
+def list_patchsets(
+    doc_id: str,
+    since: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=MAX_PATCHSET_PAGE),
+) -> PatchsetListResponse:
+    """Patchsets in commit order; ``since`` or ``cursor`` (a patchset id) starts after that record."""
+    if since is not None and cursor is not None:
+        raise APIError(
+            status_code=400,
+            code="invalid_cursor",
+            message="Pass either since or cursor, not both",
+            details={"doc_id": doc_id},
+        )
+    after = cursor if cursor is not None else since
+    try:
+        page = load_patch_log_page(doc_id, after, limit)
+    except PatchCursorNotFound as exc:
+        # Reverts and compaction drop records; the client has to reload from the start.
+        raise APIError(
+            status_code=410,
+            code="PATCH_CURSOR_EXPIRED",
+            message="Patchset is no longer in the log",
+            details={"doc_id": doc_id, "patchset_id": after},
+        ) from exc
+    next_cursor = page.patchsets[-1].patchset_id if page.has_more else None
+    return PatchsetListResponse(
+        doc_id=doc_id,
+        patchsets=page.patchsets,
+        version=page.version,
+        next_cursor=next_cursor,
+    )
 
 
 @router.post("/patch/revert_last", response_model=PatchsetListResponse)
 def revert_last(doc_id: str = Query(...)) -> PatchsetListResponse:
-    patchsets = revert_last_patchset(doc_id)
-    return PatchsetListResponse(doc_id=doc_id, patchsets=patchsets)
+    try:
+        reverted = revert_last_patchset(doc_id)
+    except PreconditionFailed as exc:
+        raise APIError(
+            status_code=409,
+            code="COMMIT_CONTENTION",
+            message="Patch log is busy, retry the revert",
+            details={"doc_id": doc_id},
+        ) from exc
+    return PatchsetListResponse(doc_id=doc_id, patchsets=reverted.patchsets, version=reverted.version)
 
 
 @router.get("/composite/ir/{doc_id}", response_model=IRPage)
 def get_composite_ir(doc_id: str, page: int = Query(..., ge=0)) -> IRPage:
-    base_page = get_base_ir_page(doc_id, page)
-    patchsets = load_patch_log(doc_id)
-    ops = []
-    for patchset in patchsets:
-        if patchset.page_index == page:
-            ops.extend(patchset.ops)
-    composite, _ = apply_ops_to_page(base_page, ops)
-    return composite
+    return get_composite_page(doc_id, page)
@@ -5,6 +5,9 @@ from typing import Annotated, Literal
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
+DecodeProfile = Literal["text", "text_vector", "full"]
+OCRStatus = Literal["pending", "done", "failed"]
+
 class DecodedStats(BaseModel):
     text_runs: int
     paths: int
@@ -18,7 +21,7 @@ class DecodedElementBase(BaseModel):
     id: str
     kind: Literal["text_run", "path", "image", "unknown"]
     bbox_norm: tuple[float, float, float, float]
-    source: Literal["pdf"]
+    source: Literal["pdf", "ocr"]
     content_hash: str
 
     model_config = ConfigDict(extra="forbid")
@@ -91,6 +94,8 @@ class DecodedPage(BaseModel):
     elements: list[DecodedElement]
     stats: DecodedStats
     needs_ocr_fallback: bool = False
+    ocr_status: OCRStatus | None = None
+    version: int = 0
 
     model_config = ConfigDict(extra="forbid")
 
@@ -99,6 +104,8 @@ class DecodedDocument(BaseModel):
     doc_id: str
     type: Literal["pdf"]
     version: Literal["v1"]
+    profile: DecodeProfile = "full"
+    decoder_version: int = 0
     page_count: int
     pages: list[DecodedPage]
     warnings: list[str] = Field(default_factory=list)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from forge_api.schemas.decoded import DecodeProfile
+from forge_api.schemas.ir import HitTestPoint, HitTestRect
+
+
+class ElementQueryRequest(BaseModel):
+    """Spatial query in normalized page coordinates (0..1, top-left origin)."""
+
+    source: Literal["manifest", "decoded"] = "manifest"
+    page_index: int = Field(ge=0)
+    profile: DecodeProfile = "full"
+    point: HitTestPoint | None = None
+    rect: HitTestRect | None = None
+    k: int | None = Field(default=None, ge=1, le=100)
+    contained: bool = False
+
+    model_config = ConfigDict(extra="forbid")
+
+    @model_validator(mode="after")
+    def validate_choice(self) -> "ElementQueryRequest":
+        if (self.point is None) == (self.rect is None):
+            raise ValueError("Provide exactly one of point or rect")
+        if self.k is not None and self.point is None:
+            raise ValueError("k-nearest queries require a point")
+        return self
+
+
+class ElementQueryResponse(BaseModel):
+    doc_id: str
+    page_index: int
+    source: Literal["manifest", "decoded"]
+    elements: list[dict[str, Any]] = Field(default_factory=list)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 
 class IRPrimitive(BaseModel):
@@ -24,6 +24,15 @@ class IRPage(BaseModel):
     height_pt: float
     rotation: int
     primitives: list[IRPrimitive]
+    decoder_version: int = 0
+
+    _positions: dict[str, int] | None = PrivateAttr(default=None)
+
+    def primitive_positions(self) -> dict[str, int]:
+        """Index of each primitive id in ``primitives``, computed once per page (and its copies)."""
+        if self._positions is None:
+            self._positions = {primitive.id: idx for idx, primitive in enumerate(self.primitives)}
+        return self._positions
 
 
 class HitTestPoint(BaseModel):
@@ -60,3 +69,21 @@ class HitTestResponse(BaseModel):
     doc_id: str
     page_index: int
     candidates: list[HitTestCandidate] = Field(default_factory=list)
+
+
+class HitTestBatchQuery(HitTestRequest):
+    page_index: int = Field(ge=0)
+
+
+class HitTestBatchRequest(BaseModel):
+    queries: list[HitTestBatchQuery] = Field(min_length=1, max_length=500)
+
+
+class HitTestBatchResult(BaseModel):
+    page_index: int
+    candidates: list[HitTestCandidate] = Field(default_factory=list)
+
+
+class HitTestBatchResponse(BaseModel):
+    doc_id: str
+    results: list[HitTestBatchResult] = Field(default_factory=list)
@@ -101,11 +101,17 @@ class PatchsetRecord(BaseModel):
     diff_summary: list[PatchDiffEntry] = Field(default_factory=list)
     results: list[PatchOpResult] = Field(default_factory=list)
     warnings: list[str] = Field(default_factory=list)
+    # Set on records written by log compaction; the archive holds the records they replaced.
+    archive_id: str | None = None
 
 
 class PatchsetListResponse(BaseModel):
     doc_id: str
     patchsets: list[PatchsetRecord]
+    # Log revision at read time, bumped by every append, revert and compaction; pass next_cursor
+    # back as ``cursor`` to fetch the following page.
+    version: int = 0
+    next_cursor: str | None = None
 
 
 class PatchCommitRequest(BaseModel):
@@ -117,11 +123,25 @@ class PatchCommitRequest(BaseModel):
 
 class PatchCommitResponse(BaseModel):
     patchset: PatchsetRecord
-    patch_log: list[PatchsetRecord]
+    # Log revision after the commit; one past the client's last known revision when no one else wrote.
+    version: int
     applied_ops: list[PatchOpResult] | None = None
     rejected_ops: list[PatchOpResult] | None = None
 
 
+class BulkPatchCommitRequest(BaseModel):
+    doc_id: str
+    patchsets: list[PatchsetInput]
+    allowed_targets: list[SelectionFingerprint] | None = None
+
+
+class BulkPatchCommitResponse(BaseModel):
+    doc_id: str
+    patchsets: list[PatchsetRecord]
+    applied_ops: list[PatchOpResult]
+    rejected_ops: list[PatchOpResult]
+
+
 class PatchPlanRequest(BaseModel):
     doc_id: str
     page_index: int
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Any
+
+from forge_api.core.artifact_versions import COMPOSITE_VERSION, IR_VERSION, is_stale
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.schemas.ir import IRPage
+from forge_api.schemas.patch import PatchsetRecord
+from forge_api.services.font_inventory import get_font_inventory
+from forge_api.services.ir_pdf import get_base_ir_page
+from forge_api.services.patch_store import load_page_patchsets
+from forge_api.services.storage import get_storage
+from forge_api.settings import get_settings
+
+logger = logging.getLogger("forge_api.composite_ir")
+
+# (doc_id, page_index, patchsets applied, last patchset id, IR version, composite version)
+CompositeKey = tuple[str, int, int, str | None, int, int]
+
+_SNAPSHOT_LOOKBACK = 2
+
+
+def composite_key(doc_id: str, page_index: int, patchsets: list[PatchsetRecord]) -> CompositeKey:
+    # The last patchset ID keeps a revert followed by a new commit from reusing the old entry.
+    last_id = patchsets[-1].patchset_id if patchsets else None
+    return (doc_id, page_index, len(patchsets), last_id, IR_VERSION, COMPOSITE_VERSION)
+
+
+def _storage_key(doc_id: str, page_index: int) -> str:
+    return f"documents/{doc_id}/composite/page_{page_index}.json"
+
+
+def _snapshot_key(doc_id: str, page_index: int, applied: int) -> str:
+    return f"documents/{doc_id}/composite/snapshots/page_{page_index}/{applied:08d}.json"
+
+
+def _latest_checkpoint(applied: int) -> int:
+    """Largest snapshot position at or below ``applied`` (0 when snapshots are off)."""
+    interval = get_settings().FORGE_SNAPSHOT_INTERVAL
+    if interval <= 0:
+        return 0
+    return (applied // interval) * interval
+
+
+def _key_payload(key: CompositeKey) -> list[Any]:
+    return list(key)
+
+
+class CompositePageCache:
+    """Composite IR pages keyed by the page's patch-log version, in process and in storage.
+
+    Storage keeps only the newest composite per page, which is what reads and commits need.
+    Cached pages are shared between requests; never mutate them.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CompositeKey, IRPage] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: CompositeKey) -> IRPage | None:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        page = self._read(_storage_key(key[0], key[1]), key)
+        if page is not None:
+            self._remember(key, page)
+        return page
+
+    def get_snapshot(self, key: CompositeKey) -> IRPage | None:
+        return self._read(_snapshot_key(key[0], key[1], key[2]), key)
+
+    def _read(self, storage_key: str, key: CompositeKey) -> IRPage | None:
+        storage = get_storage()
+        if not storage.exists(storage_key):
+            return None
+        try:
+            payload = json.loads(storage.get_bytes(storage_key).decode("utf-8"))
+            if payload.get("key") != _key_payload(key):
+                return None
+            return IRPage.model_validate(payload["page"])
+        except (FileNotFoundError, KeyError, ValueError) as exc:
+            logger.warning("Stored composite unreadable doc_id=%s page=%s error=%s", key[0], key[1], exc)
+            return None
+
+    def put(self, key: CompositeKey, page: IRPage) -> None:
+        # Composites over a stale base IR are rebuilt once the fresh IR lands.
+        if is_stale("ir", page):
+            return
+        self._remember(key, page)
+        self._write(_storage_key(key[0], key[1]), key, page)
+        if key[2] and _latest_checkpoint(key[2]) == key[2]:
+            self.put_snapshot(key, page)
+
+    def put_snapshot(self, key: CompositeKey, page: IRPage) -> None:
+        """Checkpoint kept per position, so a cold read replays at most one snapshot interval.
+
+        Reads look back ``_SNAPSHOT_LOOKBACK`` positions, so the checkpoint that just fell out of
+        that window is deleted.
+        """
+        if is_stale("ir", page):
+            return
+        self._write(_snapshot_key(key[0], key[1], key[2]), key, page)
+        expired = key[2] - _SNAPSHOT_LOOKBACK * get_settings().FORGE_SNAPSHOT_INTERVAL
+        if expired > 0:
+            get_storage().delete(_snapshot_key(key[0], key[1], expired))
+
+    def _write(self, storage_key: str, key: CompositeKey, page: IRPage) -> None:
+        payload = {"key": _key_payload(key), "page": page.model_dump(mode="json")}
+        get_storage().put_bytes(
+            storage_key,
+            json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            content_type="application/json",
+        )
+
+    def _remember(self, key: CompositeKey, page: IRPage) -> None:
+        with self._lock:
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@lru_cache
+def get_composite_cache() -> CompositePageCache:
+    return CompositePageCache(max_entries=get_settings().FORGE_COMPOSITE_CACHE_ENTRIES)
+
+
+def get_composite_page(
+    doc_id: str,
+    page_index: int,
+    patchsets: list[PatchsetRecord] | None = None,
+) -> IRPage:
+    """Base IR page with every committed patchset for the page applied.
+
+    ``patchsets`` are the page's patchsets in commit order (loaded when omitted). On a miss the
+    composite for all but the newest patchset is tried, then the newest checkpoint snapshot,
+    and only the patchsets after it are replayed.
+    """
+    if patchsets is None:
+        patchsets = load_page_patchsets(doc_id, page_index)
+    cache = get_composite_cache()
+    key = composite_key(doc_id, page_index, patchsets)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    fonts = get_font_inventory(doc_id)
+    previous = cache.get(composite_key(doc_id, page_index, patchsets[:-1])) if patchsets else None
+    if previous is not None:
+        page, _ = apply_ops_to_page(previous, patchsets[-1].ops, fonts)
+    else:
+        page, start = _nearest_snapshot(cache, doc_id, page_index, patchsets)
+        checkpoint = _latest_checkpoint(len(patchsets))
+        if start < checkpoint < len(patchsets):
+            # Leave a checkpoint behind so the next cold read starts from it.
+            page, _ = apply_ops_to_page(page, [op for record in patchsets[start:checkpoint] for op in record.ops], fonts)
+            cache.put_snapshot(composite_key(doc_id, page_index, patchsets[:checkpoint]), page)
+            start = checkpoint
+        page, _ = apply_ops_to_page(page, [op for record in patchsets[start:] for op in record.ops], fonts)
+    cache.put(key, page)
+    return page
+
+
+def _nearest_snapshot(
+    cache: CompositePageCache,
+    doc_id: str,
+    page_index: int,
+    patchsets: list[PatchsetRecord],
+) -> tuple[IRPage, int]:
+    """Newest usable checkpoint and the number of patchsets it covers, else the base page and 0."""
+    interval = get_settings().FORGE_SNAPSHOT_INTERVAL
+    position = _latest_checkpoint(len(patchsets))
+    # A revert or compaction invalidates later checkpoints; look back one interval before replaying it all.
+    for _ in range(_SNAPSHOT_LOOKBACK):
+        if position <= 0:
+            break
+        snapshot = cache.get_snapshot(composite_key(doc_id, page_index, patchsets[:position]))
+        if snapshot is not None:
+            return snapshot, position
+        position -= interval
+    return get_base_ir_page(doc_id, page_index), 0
+
+
+def store_committed_composite(
+    doc_id: str,
+    page_index: int,
+    patchsets: list[PatchsetRecord],
+    page: IRPage,
+) -> None:
+    """Record the composite a commit produced, so the next read is a cache hit."""
+    get_composite_cache().put(composite_key(doc_id, page_index, patchsets), page)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+from forge_api.services.decoded_store import decoded_artifact_key, load_decoded_document
+from forge_api.services.element_index import ElementPageIndex, manifest_page_index
+from forge_api.services.forge_overlay import resolve_overlay_selection
+from forge_api.services.redecode import get_redecode_scheduler
+from forge_api.services.storage import get_storage
+
+logger = logging.getLogger("forge_api.correspondence")
+
+# Decoded elements carry paths too; images are never overlay targets.
+CORRESPONDENCE_PROFILE = "text_vector"
+
+
+def _correspondence_key(doc_id: str) -> str:
+    return f"docs/{doc_id}/forge/correspondence.json"
+
+
+def _decoded_version(doc_id: str) -> str | None:
+    try:
+        return get_storage().get_version(decoded_artifact_key(doc_id, CORRESPONDENCE_PROFILE))
+    except FileNotFoundError:
+        return None
+
+
+def build_correspondence(doc_id: str, manifest: dict[str, Any], manifest_version: str) -> dict[str, Any]:
+    """Map decoded v1 elements to manifest elements (and back) for every page.
+
+    Each decoded element maps to the manifest element ``resolve_overlay_selection``
+    picks for it, or ``None`` when nothing overlaps well enough. The table records the
+    storage versions of both inputs so a rewrite of either one invalidates it.
+    """
+    # Read the version before the artifact: a concurrent redecode then leaves the table stale, never wrong.
+    decoded_version = _decoded_version(doc_id)
+    decoded = load_decoded_document(doc_id, CORRESPONDENCE_PROFILE)
+    if decoded_version is None:
+        decoded_version = _decoded_version(doc_id)
+    manifest_pages = {page.get("page_index"): page for page in manifest.get("pages", [])}
+    pages: dict[str, dict[str, Any]] = {}
+    for decoded_page in decoded.pages:
+        manifest_page = manifest_pages.get(decoded_page.page_index)
+        if manifest_page is None:
+            continue
+        manifest_elements = manifest_page.get("elements", [])
+        selection = [
+            {
+                "element_id": element.id,
+                "bbox": list(element.bbox_norm),
+                "text": getattr(element, "text", "") or "",
+            }
+            for element in decoded_page.elements
+        ]
+        resolved = resolve_overlay_selection(
+            selection,
+            manifest_elements,
+            index=ElementPageIndex.build(manifest_elements, "bbox"),
+        )
+        decoded_to_manifest: dict[str, str | None] = {}
+        manifest_to_decoded: dict[str, list[str]] = {}
+        for item in selection:
+            match = resolved.get(item["element_id"])
+            manifest_id = match.get("element_id") if match else None
+            decoded_to_manifest[item["element_id"]] = manifest_id
+            if manifest_id:
+                manifest_to_decoded.setdefault(manifest_id, []).append(item["element_id"])
+        pages[str(decoded_page.page_index)] = {
+            "decoded_to_manifest": decoded_to_manifest,
+            "manifest_to_decoded": manifest_to_decoded,
+        }
+    return {
+        "doc_id": doc_id,
+        "manifest_version": manifest_version,
+        "decoded_version": decoded_version,
+        "decoder_version": decoded.decoder_version,
+        "pages": pages,
+    }
+
+
+def store_correspondence(doc_id: str, manifest: dict[str, Any], manifest_version: str) -> dict[str, Any]:
+    table = build_correspondence(doc_id, manifest, manifest_version)
+    get_storage().put_bytes(
+        _correspondence_key(doc_id),
+        json.dumps(table, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        content_type="application/json",
+    )
+    return table
+
+
+def schedule_correspondence(doc_id: str, manifest: dict[str, Any], manifest_version: str | None) -> bool:
+    """Queue a table rebuild for ``manifest`` on the redecode scheduler; it may need a ``text_vector`` decode."""
+    if manifest_version is None:
+        return False
+    return get_redecode_scheduler().request(
+        _correspondence_key(doc_id),
+        lambda: store_correspondence(doc_id, manifest, manifest_version),
+    )
+
+
+def load_correspondence(
+    doc_id: str,
+    manifest: dict[str, Any],
+    manifest_version: str | None,
+) -> dict[str, Any] | None:
+    """Stored table for the current manifest and decoded artifact.
+
+    Missing or stale tables are queued for a rebuild and ``None`` is returned meanwhile.
+    """
+    storage = get_storage()
+    key = _correspondence_key(doc_id)
+    table = None
+    if storage.exists(key):
+        try:
+            table = json.loads(storage.get_bytes(key).decode("utf-8"))
+        except (FileNotFoundError, ValueError) as exc:
+            logger.warning("Correspondence table unreadable doc_id=%s error=%s", doc_id, exc)
+            table = None
+    if (
+        isinstance(table, dict)
+        and manifest_version is not None
+        and table.get("manifest_version") == manifest_version
+        and table.get("decoded_version") == _decoded_version(doc_id)
+    ):
+        return table
+    schedule_correspondence(doc_id, manifest, manifest_version)
+    return None
+
+
+def resolve_selection(
+    doc_id: str,
+    manifest: dict[str, Any],
+    manifest_version: str | None,
+    page_index: int,
+    selection: list[dict[str, Any]],
+) -> dict[str, dict[str, Any]]:
+    """``resolve_overlay_selection`` answered from the correspondence table where possible.
+
+    Elements the table does not cover yet, or every element while it is rebuilding, are scored.
+    """
+    manifest_page = next((page for page in manifest.get("pages", []) if page.get("page_index") == page_index), {})
+    by_id = {
+        element.get("element_id"): element
+        for element in manifest_page.get("elements", [])
+        if element.get("element_id")
+    }
+    table = load_correspondence(doc_id, manifest, manifest_version) or {}
+    decoded_to_manifest = table.get("pages", {}).get(str(page_index), {}).get("decoded_to_manifest", {})
+
+    resolved: dict[str, dict[str, Any]] = {}
+    unknown: list[dict[str, Any]] = []
+    for item in selection:
+        element_id = item.get("element_id")
+        if not element_id:
+            continue
+        if element_id in by_id:
+            resolved[element_id] = by_id[element_id]
+        elif element_id in decoded_to_manifest:
+            manifest_id = decoded_to_manifest[element_id]
+            if manifest_id in by_id:
+                resolved[element_id] = by_id[manifest_id]
+        else:
+            unknown.append(item)
+    if unknown:
+        resolved.update(
+            resolve_overlay_selection(
+                unknown,
+                list(manifest_page.get("elements", [])),
+                index=manifest_page_index(doc_id, manifest_version, page_index, lambda: manifest),
+            )
+        )
+    return resolved
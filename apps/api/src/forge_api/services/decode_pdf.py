@@ -7,6 +7,8 @@ from typing import Any
 
 import fitz
 
+from forge_api.core.artifact_versions import DECODE_VERSION, VERSION_FIELD, is_stale
+from forge_api.services.redecode import get_redecode_scheduler
 from forge_api.services.storage import get_storage
 
 
@@ -72,12 +74,23 @@ def _sort_key(item: dict[str, Any]) -> tuple:
     )
 
 
+def _decode_key(doc_id: str) -> str:
+    return f"documents/{doc_id}/decode.json"
+
+
 def decode_document(doc_id: str) -> dict[str, Any]:
     storage = get_storage()
-    decode_key = f"documents/{doc_id}/decode.json"
+    decode_key = _decode_key(doc_id)
     if storage.exists(decode_key):
-        return json.loads(storage.get_bytes(decode_key).decode("utf-8"))
+        payload = json.loads(storage.get_bytes(decode_key).decode("utf-8"))
+        if is_stale("decode", payload):
+            get_redecode_scheduler().request(decode_key, lambda: _decode_and_store(doc_id))
+        return payload
+    return _decode_and_store(doc_id)
 
+
+def _decode_and_store(doc_id: str) -> dict[str, Any]:
+    storage = get_storage()
     pdf_key = f"documents/{doc_id}/original.pdf"
     if not storage.exists(pdf_key):
         raise FileNotFoundError("Document PDF missing")
@@ -143,10 +156,11 @@ def decode_document(doc_id: str) -> dict[str, Any]:
 
     payload = {
         "doc_id": doc_id,
+        VERSION_FIELD: DECODE_VERSION,
         "page_count": page_count,
         "pages": pages,
         "extracted_at_iso": datetime.now(timezone.utc).isoformat(),
     }
 
-    storage.put_bytes(decode_key, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    storage.put_bytes(_decode_key(doc_id), json.dumps(payload, ensure_ascii=False).encode("utf-8"))
     return payload
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from pydantic import ValidationError
+
+from forge_api.core.artifact_versions import is_stale
+from forge_api.schemas.decoded import DecodeProfile, DecodedDocument
+from forge_api.services.layer_cache import get_layer_cache
+from forge_api.services.ocr import merge_ocr_results, ocr_artifact_key
+from forge_api.services.pdf_decode_v1 import PROFILE_ELEMENT_KINDS, decode_pdf_to_decoded_document
+from forge_api.services.redecode import get_redecode_scheduler
+from forge_api.services.storage import get_storage
+
+logger = logging.getLogger("forge_api.decoded")
+
+# Ordered from cheapest to most complete; a cached richer profile can serve a cheaper one.
+PROFILE_ORDER: tuple[DecodeProfile, ...] = ("text", "text_vector", "full")
+
+
+def decoded_artifact_key(doc_id: str, profile: DecodeProfile = "full") -> str:
+    if profile == "full":
+        return f"documents/{doc_id}/decoded/v1.json"
+    return f"documents/{doc_id}/decoded/v1.{profile}.json"
+
+
+def _read_artifact(doc_id: str, profile: DecodeProfile) -> DecodedDocument | None:
+    storage = get_storage()
+    key = decoded_artifact_key(doc_id, profile)
+    if not storage.exists(key):
+        return None
+    payload = json.loads(storage.get_bytes(key).decode("utf-8"))
+    try:
+        decoded = DecodedDocument(**payload)
+    except ValidationError as exc:
+        logger.warning("Cached decoded payload invalid for doc_id=%s profile=%s error=%s", doc_id, profile, exc)
+        return None
+    if is_stale("decoded", decoded):
+        get_redecode_scheduler().request(key, lambda: _redecode(doc_id, profile))
+    return decoded
+
+
+def decoded_page_version(doc_id: str, profile: DecodeProfile, page_index: int) -> tuple[str, str | None] | None:
+    """Storage versions of the decoded artifact and the page's OCR result, read without loading either.
+
+    ``None`` when the profile's artifact has not been stored yet.
+    """
+    storage = get_storage()
+    try:
+        artifact = storage.get_version(decoded_artifact_key(doc_id, profile))
+    except FileNotFoundError:
+        return None
+    try:
+        ocr = storage.get_version(ocr_artifact_key(doc_id, page_index))
+    except FileNotFoundError:
+        ocr = None
+    return artifact, ocr
+
+
+def _redecode(doc_id: str, profile: DecodeProfile) -> None:
+    pdf_bytes = get_storage().get_bytes(f"documents/{doc_id}/original.pdf")
+    decoded = decode_pdf_to_decoded_document(doc_id, pdf_bytes, layer_cache=get_layer_cache(), profile=profile)
+    _store_artifact(decoded)
+
+
+def _store_artifact(decoded: DecodedDocument) -> None:
+    get_storage().put_bytes(
+        decoded_artifact_key(decoded.doc_id, decoded.profile),
+        decoded.model_dump_json().encode("utf-8"),
+        content_type="application/json",
+    )
+
+
+def project_decoded_document(decoded: DecodedDocument, profile: DecodeProfile) -> DecodedDocument:
+    """Narrow a decoded document to the element kinds of a cheaper profile."""
+    kinds = PROFILE_ELEMENT_KINDS[profile]
+    pages = []
+    for page in decoded.pages:
+        stats = page.stats.model_copy(
+            update={
+                "paths": page.stats.paths if "path" in kinds else 0,
+                "images": page.stats.images if "image" in kinds else 0,
+                "unknown": page.stats.unknown if "unknown" in kinds else 0,
+            }
+        )
+        elements = [element for element in page.elements if element.kind in kinds]
+        pages.append(page.model_copy(update={"elements": elements, "stats": stats}))
+    return decoded.model_copy(update={"profile": profile, "pages": pages})
+
+
+def read_cached_decoded_document(doc_id: str, profile: DecodeProfile = "full") -> DecodedDocument | None:
+    # Artifacts hold the PDF decode only; OCR pages are merged on read as they complete.
+    cached = _read_artifact(doc_id, profile)
+    if cached is not None:
+        return merge_ocr_results(cached)
+    for richer in PROFILE_ORDER[PROFILE_ORDER.index(profile) + 1 :]:
+        source = _read_artifact(doc_id, richer)
+        if source is None:
+            continue
+        projected = project_decoded_document(source, profile)
+        _store_artifact(projected)
+        return merge_ocr_results(projected)
+    return None
+
+
+def decode_and_store_decoded_document(
+    doc_id: str,
+    pdf_bytes: bytes,
+    profile: DecodeProfile = "full",
+) -> DecodedDocument:
+    decoded = decode_pdf_to_decoded_document(doc_id, pdf_bytes, layer_cache=get_layer_cache(), profile=profile)
+    _store_artifact(decoded)
+    return merge_ocr_results(decoded)
+
+
+def load_decoded_document(doc_id: str, profile: DecodeProfile = "full") -> DecodedDocument:
+    """Cached decoded document for a profile, decoding the stored PDF on a miss."""
+    cached = read_cached_decoded_document(doc_id, profile)
+    if cached is not None:
+        return cached
+    storage = get_storage()
+    pdf_key = f"documents/{doc_id}/original.pdf"
+    if not storage.exists(pdf_key):
+        raise FileNotFoundError("Document PDF missing")
+    return decode_and_store_decoded_document(doc_id, storage.get_bytes(pdf_key), profile)
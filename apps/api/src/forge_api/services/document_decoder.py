@@ -7,6 +7,12 @@ from typing import Any, Literal
 
 import fitz
 
+from forge_api.core.artifact_versions import MANIFEST_VERSION
+from forge_api.core.ir.fingerprint import PageFingerprint, fingerprint_page
+from forge_api.services.layer_cache import SharedLayerCache
+
+_PAGE_NAMESPACE = f"forge-page.v{MANIFEST_VERSION}"
+
 ElementType = Literal["text", "heading", "list_item", "table_cell"]
 
 
@@ -124,6 +130,10 @@ def _detect_y_origin(blocks: list[dict[str, Any]], page_height_pt: float) -> str
 class DocumentDecoder:
     """Decode documents into structured elements."""
 
+    def __init__(self, layer_cache: SharedLayerCache | None = None) -> None:
+        # Optional cross-document cache: byte-identical pages skip rendering and extraction.
+        self.layer_cache = layer_cache
+
     def decode_pdf(self, pdf_bytes: bytes) -> dict[str, Any]:
         """
         Decode PDF into structured elements.
@@ -141,157 +151,200 @@ class DocumentDecoder:
         try:
             for page_idx in range(len(doc)):
                 page = doc[page_idx]
-                rotation = page.rotation
-                zoom = 2.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-
-                page_width_pt = page.rect.width
-                page_height_pt = page.rect.height
-                rotated_width_pt, rotated_height_pt = _rotated_dimensions(
-                    page_width_pt,
-                    page_height_pt,
-                    rotation,
-                )
+                fingerprint = fingerprint_page(page) if self.layer_cache is not None else None
+                page_payload = self._cached_page(fingerprint, page_idx) if fingerprint else None
+                if page_payload is None:
+                    page_payload = self._decode_page(page, page_idx)
+                    if fingerprint is not None:
+                        self._store_page(fingerprint, page_payload)
+                pages.append(page_payload)
+        finally:
+            doc.close()
 
-                blocks = page.get_text("dict")["blocks"]
-                y_origin = _detect_y_origin(blocks, page_height_pt)
-                flip_y = y_origin == "bottom-left"
-                elements = []
-
-                for block_idx, block in enumerate(blocks):
-                    if block.get("type") != 0:
-                        continue
-
-                    block_text = ""
-                    block_bbox = block["bbox"]
-                    lines_payload = []
-
-                    font_size_pt = 12.0
-                    is_bold = False
-                    is_italic = False
-                    color = "#000000"
-                    font_family = "Helvetica"
-                    line_heights: list[float] = []
-
-                    for line in block.get("lines", []):
-                        line_text_parts = []
-                        line_spans = []
-                        line_bbox = line.get("bbox") or block_bbox
-                        if len(line_bbox) >= 4:
-                            line_heights.append(float(line_bbox[3] - line_bbox[1]))
-                        for span in line.get("spans", []):
-                            span_text = span.get("text", "")
-                            if not block_text:
-                                font_size_pt = float(span.get("size", 12.0))
-                                font = span.get("font", "")
-                                font_lower = font.lower()
-                                is_bold = "bold" in font_lower
-                                is_italic = "italic" in font_lower
-                                font_family = font or font_family
-                                color_int = span.get("color", 0)
-                                r = (color_int >> 16) & 0xFF
-                                g = (color_int >> 8) & 0xFF
-                                b = color_int & 0xFF
-                                color = f"#{r:02x}{g:02x}{b:02x}"
-                            line_text_parts.append(span_text)
-                            span_bbox = span.get("bbox") or line_bbox
-                            span_bbox_norm = _normalize_bbox(
-                                span_bbox,
-                                page_width_pt,
-                                page_height_pt,
-                                rotation,
-                                flip_y,
-                            )
-                            span_style = {
-                                "font_size_pt": float(span.get("size", font_size_pt)),
-                                "font_family": span.get("font", font_family),
-                                "is_bold": "bold" in span.get("font", "").lower(),
-                                "is_italic": "italic" in span.get("font", "").lower(),
-                                "color": color,
-                            }
-                            line_spans.append(
-                                {
-                                    "text": span_text,
-                                    "bbox": span_bbox_norm,
-                                    "style": span_style,
-                                }
-                            )
-
-                            block_text += span_text
-                        block_text += "\n"
-                        line_text = "".join(line_text_parts)
-                        line_bbox_norm = _normalize_bbox(
-                            line_bbox,
-                            page_width_pt,
-                            page_height_pt,
-                            rotation,
-                            flip_y,
-                        )
-                        lines_payload.append(
-                            {
-                                "text": line_text,
-                                "bbox": line_bbox_norm,
-                                "spans": line_spans,
-                            }
-                        )
-
-                    block_text = block_text.strip()
-                    if not block_text:
-                        continue
+        return {
+            "format": "pdf",
+            "page_count": len(pages),
+            "pages": pages,
+        }
 
-                    bbox_norm = _normalize_bbox(
-                        block_bbox,
+    def _cached_page(self, fingerprint: PageFingerprint, page_idx: int) -> dict[str, Any] | None:
+        cached = self.layer_cache.get(_PAGE_NAMESPACE, fingerprint.content_hash)
+        if cached is None:
+            return None
+        png_bytes = self.layer_cache.get_blob(_PAGE_NAMESPACE, fingerprint.content_hash)
+        if png_bytes is None:
+            return None
+        elements = [
+            {
+                **element,
+                "element_id": f"p{page_idx}_e{block_idx}",
+                "page_index": page_idx,
+            }
+            for element, block_idx in zip(cached["elements"], cached["block_indexes"])
+        ]
+        return {
+            **{key: cached[key] for key in ("width_pt", "height_pt", "width_px", "height_px", "rotation")},
+            "page_index": page_idx,
+            "background_png": f"page_{page_idx}.png",
+            "background_png_bytes": png_bytes,
+            "elements": elements,
+        }
+
+    def _store_page(self, fingerprint: PageFingerprint, page_payload: dict[str, Any]) -> None:
+        elements = page_payload["elements"]
+        self.layer_cache.put_blob(_PAGE_NAMESPACE, fingerprint.content_hash, page_payload["background_png_bytes"])
+        self.layer_cache.put(
+            _PAGE_NAMESPACE,
+            fingerprint.content_hash,
+            {
+                **{key: page_payload[key] for key in ("width_pt", "height_pt", "width_px", "height_px", "rotation")},
+                "elements": elements,
+                "block_indexes": [int(element["element_id"].rsplit("_e", 1)[1]) for element in elements],
+            },
+        )
+
+    def _decode_page(self, page: fitz.Page, page_idx: int) -> dict[str, Any]:
+        rotation = page.rotation
+        zoom = 2.0
+        mat = fitz.Matrix(zoom, zoom)
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+
+        page_width_pt = page.rect.width
+        page_height_pt = page.rect.height
+        rotated_width_pt, rotated_height_pt = _rotated_dimensions(
+            page_width_pt,
+            page_height_pt,
+            rotation,
+        )
+
+        blocks = page.get_text("dict")["blocks"]
+        y_origin = _detect_y_origin(blocks, page_height_pt)
+        flip_y = y_origin == "bottom-left"
+        elements = []
+
+        for block_idx, block in enumerate(blocks):
+            if block.get("type") != 0:
+                continue
+
+            block_text = ""
+            block_bbox = block["bbox"]
+            lines_payload = []
+
+            font_size_pt = 12.0
+            is_bold = False
+            is_italic = False
+            color = "#000000"
+            font_family = "Helvetica"
+            line_heights: list[float] = []
+
+            for line in block.get("lines", []):
+                line_text_parts = []
+                line_spans = []
+                line_bbox = line.get("bbox") or block_bbox
+                if len(line_bbox) >= 4:
+                    line_heights.append(float(line_bbox[3] - line_bbox[1]))
+                for span in line.get("spans", []):
+                    span_text = span.get("text", "")
+                    if not block_text:
+                        font_size_pt = float(span.get("size", 12.0))
+                        font = span.get("font", "")
+                        font_lower = font.lower()
+                        is_bold = "bold" in font_lower
+                        is_italic = "italic" in font_lower
+                        font_family = font or font_family
+                        color_int = span.get("color", 0)
+                        r = (color_int >> 16) & 0xFF
+                        g = (color_int >> 8) & 0xFF
+                        b = color_int & 0xFF
+                        color = f"#{r:02x}{g:02x}{b:02x}"
+                    line_text_parts.append(span_text)
+                    span_bbox = span.get("bbox") or line_bbox
+                    span_bbox_norm = _normalize_bbox(
+                        span_bbox,
                         page_width_pt,
                         page_height_pt,
                         rotation,
                         flip_y,
                     )
-                    line_height_pt = sum(line_heights) / len(line_heights) if line_heights else None
-
-                    element_type: ElementType = "text"
-                    if font_size_pt > 16:
-                        element_type = "heading"
-                    elif block_text.startswith("•") or block_text.startswith("-"):
-                        element_type = "list_item"
-
-                    element = DocumentElement(
-                        element_id=f"p{page_idx}_e{block_idx}",
-                        element_type=element_type,
-                        text=block_text,
-                        bbox=bbox_norm,
-                        style={
-                            "font_size_pt": font_size_pt,
-                            "is_bold": is_bold,
-                            "is_italic": is_italic,
-                            "color": color,
-                            "font_family": font_family,
-                            "line_height": line_height_pt,
-                        },
-                        lines=lines_payload,
-                        page_index=page_idx,
+                    span_style = {
+                        "font_size_pt": float(span.get("size", font_size_pt)),
+                        "font_family": span.get("font", font_family),
+                        "is_bold": "bold" in span.get("font", "").lower(),
+                        "is_italic": "italic" in span.get("font", "").lower(),
+                        "color": color,
+                    }
+                    line_spans.append(
+                        {
+                            "text": span_text,
+                            "bbox": span_bbox_norm,
+                            "style": span_style,
+                        }
                     )
 
-                    elements.append(element.to_dict())
-
-                pages.append(
+                    block_text += span_text
+                block_text += "\n"
+                line_text = "".join(line_text_parts)
+                line_bbox_norm = _normalize_bbox(
+                    line_bbox,
+                    page_width_pt,
+                    page_height_pt,
+                    rotation,
+                    flip_y,
+                )
+                lines_payload.append(
                     {
-                        "page_index": page_idx,
-                        "width_pt": rotated_width_pt,
-                        "height_pt": rotated_height_pt,
-                        "width_px": pix.width,
-                        "height_px": pix.height,
-                        "rotation": rotation,
-                        "background_png": f"page_{page_idx}.png",
-                        "background_png_bytes": pix.tobytes("png"),
-                        "elements": elements,
+                        "text": line_text,
+                        "bbox": line_bbox_norm,
+                        "spans": line_spans,
                     }
                 )
-        finally:
-            doc.close()
+
+            block_text = block_text.strip()
+            if not block_text:
+                continue
+
+            bbox_norm = _normalize_bbox(
+                block_bbox,
+                page_width_pt,
+                page_height_pt,
+                rotation,
+                flip_y,
+            )
+            line_height_pt = sum(line_heights) / len(line_heights) if line_heights else None
+
+            element_type: ElementType = "text"
+            if font_size_pt > 16:
+                element_type = "heading"
+            elif block_text.startswith("•") or block_text.startswith("-"):
+                element_type = "list_item"
+
+            element = DocumentElement(
+                element_id=f"p{page_idx}_e{block_idx}",
+                element_type=element_type,
+                text=block_text,
+                bbox=bbox_norm,
+                style={
+                    "font_size_pt": font_size_pt,
+                    "is_bold": is_bold,
+                    "is_italic": is_italic,
+                    "color": color,
+                    "font_family": font_family,
+                    "line_height": line_height_pt,
+                },
+                lines=lines_payload,
+                page_index=page_idx,
+            )
+
+            elements.append(element.to_dict())
 
         return {
-            "format": "pdf",
-            "page_count": len(pages),
-            "pages": pages,
+            "page_index": page_idx,
+            "width_pt": rotated_width_pt,
+            "height_pt": rotated_height_pt,
+            "width_px": pix.width,
+            "height_px": pix.height,
+            "rotation": rotation,
+            "background_png": f"page_{page_idx}.png",
+            "background_png_bytes": pix.tobytes("png"),
+            "elements": elements,
         }
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable, Hashable, Literal, Sequence
+
+from forge_api.core.ir.rtree import PackedRTree
+from forge_api.settings import get_settings
+
+ElementSource = Literal["manifest", "decoded"]
+
+
+@dataclass(frozen=True)
+class ElementPageIndex:
+    """Spatial index over one page of manifest or decoded elements (normalized coordinates)."""
+
+    elements: tuple[dict[str, Any], ...]
+    areas: tuple[float, ...]
+    tree: PackedRTree
+
+    @classmethod
+    def build(cls, elements: Sequence[dict[str, Any]], bbox_field: str) -> "ElementPageIndex":
+        boxes = []
+        for element in elements:
+            bbox = element.get(bbox_field) or (0.0, 0.0, 0.0, 0.0)
+            boxes.append(tuple(float(value) for value in bbox[:4]))
+        areas = tuple(abs(x1 - x0) * abs(y1 - y0) for x0, y0, x1, y1 in boxes)
+        return cls(elements=tuple(elements), areas=areas, tree=PackedRTree.from_boxes(boxes))
+
+    def at_point(self, x: float, y: float) -> list[dict[str, Any]]:
+        """Elements under the point, smallest first so the innermost element leads."""
+        hits = sorted(self.tree.query_point(x, y), key=lambda idx: (self.areas[idx], idx))
+        return [self.elements[idx] for idx in hits]
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float, contained: bool = False) -> list[dict[str, Any]]:
+        """Elements intersecting (or fully inside) the rectangle, in page order."""
+        hits = self.tree.query_contained(x0, y0, x1, y1) if contained else self.tree.query_rect(x0, y0, x1, y1)
+        return [self.elements[idx] for idx in hits]
+
+    def nearest(self, x: float, y: float, k: int) -> list[dict[str, Any]]:
+        return [self.elements[idx] for idx in self.tree.nearest(x, y, k)]
+
+
+class ElementIndexCache:
+    """In-process LRU of element page indexes keyed by the identity of the artifact they index."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, ElementPageIndex] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> ElementPageIndex | None:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+            return cached
+
+    def put(self, key: Hashable, index: ElementPageIndex) -> None:
+        with self._lock:
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], ElementPageIndex]) -> ElementPageIndex:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        index = build()
+        self.put(key, index)
+        return index
+
+
+@lru_cache
+def get_element_index_cache() -> ElementIndexCache:
+    return ElementIndexCache(max_entries=get_settings().FORGE_SPATIAL_INDEX_CACHE_ENTRIES)
+
+
+def manifest_page_index(
+    doc_id: str,
+    manifest_version: str | None,
+    page_index: int,
+    load_manifest: Callable[[], dict[str, Any]],
+) -> ElementPageIndex | None:
+    """Index of one manifest page, cached under the manifest's storage version.
+
+    Every consumer shares the key, so one manifest rewrite invalidates all of them alike.
+    ``load_manifest`` runs only on a miss; ``None`` when the page does not exist.
+    """
+    key = ("manifest", doc_id, manifest_version, page_index)
+    cache = get_element_index_cache()
+    # Without a storage version (nothing stored yet) there is nothing safe to key on.
+    cached = cache.get(key) if manifest_version is not None else None
+    if cached is not None:
+        return cached
+    page = next((item for item in load_manifest().get("pages", []) if item.get("page_index") == page_index), None)
+    if page is None:
+        return None
+    index = ElementPageIndex.build(page.get("elements", []), "bbox")
+    if manifest_version is not None:
+        cache.put(key, index)
+    return index
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import base64
 from dataclasses import dataclass
 from html import escape
 from typing import Any
 
 from forge_api.core.errors import APIError
+from forge_api.core.fonts.inventory import FontInventory
 from forge_api.services.chromium_runtime import resolve_chromium_executable
+from forge_api.services.font_inventory import get_font_inventory
 from forge_api.services.forge_manifest import build_forge_manifest
-from forge_api.services.forge_overlay import build_overlay_state, load_overlay_custom_entries, load_overlay_patch_log
+from forge_api.services.overlay_state import load_overlay_pages
 
 
 @dataclass(frozen=True)
@@ -15,15 +18,14 @@ class HtmlExportResult:
     payload: bytes
 
 
-def _font_family(pdf_font: str | None) -> str:
-    if not pdf_font:
-        return "Helvetica, Arial, sans-serif"
-    lower = pdf_font.lower()
-    if "times" in lower or "serif" in lower:
-        return '"Times New Roman", Times, serif'
-    if "courier" in lower or "mono" in lower:
-        return '"Courier New", Courier, monospace'
-    return "Helvetica, Arial, sans-serif"
+def _font_faces(fonts: FontInventory) -> str:
+    """@font-face rules for the embedded fonts a browser can load; missing glyphs fall back per character."""
+    return "".join(
+        f"@font-face{{font-family:{font.alias};"
+        f"src:url(data:font/sfnt;base64,{base64.b64encode(font.buffer).decode('ascii')});}}"
+        for font in fonts.embedded.values()
+        if font.is_sfnt
+    )
 
 
 def _page_dimensions_px(page: dict[str, Any]) -> tuple[float, float]:
@@ -32,7 +34,7 @@ def _page_dimensions_px(page: dict[str, Any]) -> tuple[float, float]:
     return width_pt * (96 / 72), height_pt * (96 / 72)
 
 
-def _render_page(page: dict[str, Any], overlay_state: dict[str, Any]) -> str:
+def _render_page(page: dict[str, Any], overlay_state: dict[str, Any], fonts: FontInventory) -> str:
     page_width_px, page_height_px = _page_dimensions_px(page)
     page_width_pt = float(page.get("width_pt") or 1)
     elements_html: list[str] = []
@@ -72,7 +74,7 @@ def _render_page(page: dict[str, Any], overlay_state: dict[str, Any]) -> str:
                 f"width:{width:.4f}%;height:{height:.4f}%;"
                 f"font-size:{font_size_px:.2f}px;"
                 f"line-height:{line_height_px:.2f}px;"
-                f"font-family:{_font_family(style.get('font_family'))};"
+                f"font-family:{fonts.css_family(style.get('font_family'))};"
                 f"font-weight:{'bold' if style.get('is_bold') else 'normal'};"
                 f"font-style:{'italic' if style.get('is_italic') else 'normal'};"
                 f"color:{style.get('color') or '#000'};"
@@ -97,23 +99,21 @@ def export_pdf_from_html(doc_id: str) -> HtmlExportResult:
     if not pages:
         raise FileNotFoundError("Document not found")
 
-    overlay_state = build_overlay_state(
-        manifest,
-        load_overlay_patch_log(doc_id),
-        custom_entries=load_overlay_custom_entries(doc_id),
-    )
+    overlay_state, _ = load_overlay_pages(doc_id, manifest)
+    fonts = get_font_inventory(doc_id)
     first_page = pages[0]
     width_in = float(first_page.get("width_pt") or 0) / 72
     height_in = float(first_page.get("height_pt") or 0) / 72
 
     pages_html = [
-        _render_page(page, overlay_state.get(page.get("page_index"), {})) for page in pages
+        _render_page(page, overlay_state.get(page.get("page_index"), {}), fonts) for page in pages
     ]
 
     html = (
         "<!doctype html><html><head><meta charset=\"utf-8\"/>"
         "<style>"
-        "html,body{margin:0;padding:0;background:#fff;}"
+        + _font_faces(fonts)
+        + "html,body{margin:0;padding:0;background:#fff;}"
         "@page{"
         f"size:{width_in:.4f}in {height_in:.4f}in;margin:0;}}"
         ".page{position:relative;page-break-after:always;}"
@@ -7,14 +7,15 @@ import logging
 
 import fitz
 
-from forge_api.core.patch.apply import apply_ops_to_page
-from forge_api.core.patch.fonts import DEFAULT_FONT, normalize_font_name
-from forge_api.schemas.ir import IRPage
-from forge_api.schemas.patch import PatchOp
+from forge_api.core.fonts.inventory import FontInventory
+from forge_api.core.patch.fonts import DEFAULT_FONT
+from forge_api.schemas.patch import PatchsetRecord
+from forge_api.services.composite_ir import get_composite_page
 from forge_api.services.ir_pdf import get_page_ir
 from forge_api.services.export_html_pdf import export_pdf_from_html
+from forge_api.services.font_inventory import get_font_inventory
 from forge_api.services.forge_manifest import build_forge_manifest
-from forge_api.services.forge_overlay import build_overlay_state, load_overlay_custom_entries, load_overlay_patch_log
+from forge_api.services.overlay_state import load_overlay_pages
 from forge_api.services.patch_store import load_patch_log
 from forge_api.settings import get_settings
 from forge_api.services.storage import get_storage
@@ -87,17 +88,6 @@ def _hex_to_rgb(value: str | None) -> tuple[float, float, float]:
         return (0.0, 0.0, 0.0)
 
 
-def _overlay_font(font_name: str | None, is_bold: bool = False) -> str:
-    if is_bold:
-        return "helvB"
-    if not font_name:
-        return DEFAULT_FONT
-    lower = font_name.lower()
-    if "bold" in lower or "black" in lower:
-        return "helvB"
-    return "helv"
-
-
 def _rotated_dimensions(width_pt: float, height_pt: float, rotation: int) -> tuple[float, float]:
     normalized = rotation % 360
     if normalized in (90, 270):
@@ -172,13 +162,26 @@ def _sample_background_color(page: fitz.Page, rect: fitz.Rect) -> tuple[float, f
         return None
 
 
-def _draw_text(page: fitz.Page, primitive, bbox: list[float], doc_id: str, page_index: int) -> None:
+def _draw_text(
+    page: fitz.Page,
+    primitive,
+    bbox: list[float],
+    doc_id: str,
+    page_index: int,
+    fonts: FontInventory,
+) -> None:
     raw_font = primitive.style.get("font")
-    font_name = normalize_font_name(raw_font) or DEFAULT_FONT
+    font_name = fonts.builtin(raw_font)
+    # Patch fitting measured the text with the embedded font whenever it covers it; draw with it too.
+    embedded = fonts.embedded_for(raw_font, primitive.text or "")
+    if embedded is not None:
+        font_name = embedded.alias
     font_size = float(primitive.style.get("size") or 12)
     color = _to_rgb(primitive.style.get("color"))
     x0, y0, x1, y1 = bbox
     try:
+        if embedded is not None:
+            page.insert_font(fontname=font_name, fontbuffer=embedded.buffer)
         page.insert_textbox(
             fitz.Rect(x0, y0, x1, y1),
             primitive.text or "",
@@ -217,12 +220,6 @@ def _draw_path(page: fitz.Page, primitive, bbox: list[float]) -> None:
     page.draw_rect(rect, color=stroke_color, fill=fill, width=width)
 
 
-def _composite_page(doc_id: str, page_index: int, ops: list[PatchOp]) -> IRPage:
-    page = get_page_ir(doc_id, page_index)
-    patched, _ = apply_ops_to_page(page, ops)
-    return patched
-
-
 def export_pdf_with_overlays(
     doc_id: str,
     padding_pt: float = DEFAULT_PADDING_PT,
@@ -242,6 +239,7 @@ def export_pdf_with_overlays(
     pdf_key = f"documents/{doc_id}/original.pdf"
     pdf_bytes = storage.get_bytes(pdf_key)
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    fonts = get_font_inventory(doc_id)
     requested_mode = (mask_mode or settings.FORGE_EXPORT_MASK_MODE).upper()
     if requested_mode not in {"SOLID", "AUTO_BG"}:
         requested_mode = "SOLID"
@@ -250,27 +248,22 @@ def export_pdf_with_overlays(
     if settings.FORGE_RENDER_MODE.lower() == "html" and not _playwright_available():
         warning = "PLAYWRIGHT_UNAVAILABLE"
     try:
-        patchsets = load_patch_log(doc_id)
+        patchsets_by_page: dict[int, list[PatchsetRecord]] = {}
+        for patchset in load_patch_log(doc_id):
+            patchsets_by_page.setdefault(patchset.page_index, []).append(patchset)
         manifest = None
         overlay_state = None
         try:
             manifest = build_forge_manifest(doc_id)
-            overlay_state = build_overlay_state(
-                manifest,
-                load_overlay_patch_log(doc_id),
-                custom_entries=load_overlay_custom_entries(doc_id),
-            )
+            overlay_state, _ = load_overlay_pages(doc_id, manifest)
         except FileNotFoundError:
             manifest = None
             overlay_state = None
         for page_index in range(len(doc)):
             page = doc[page_index]
-            ops: list[PatchOp] = []
-            for patchset in patchsets:
-                if patchset.page_index == page_index:
-                    ops.extend(patchset.ops)
-            if ops:
-                composite_page = _composite_page(doc_id, page_index, ops)
+            page_patchsets = patchsets_by_page.get(page_index, [])
+            if any(patchset.ops for patchset in page_patchsets):
+                composite_page = get_composite_page(doc_id, page_index, page_patchsets)
                 base_page = get_page_ir(doc_id, page_index)
                 base_by_id = {primitive.id: primitive for primitive in base_page.primitives}
                 for primitive in composite_page.primitives:
@@ -293,7 +286,7 @@ def export_pdf_with_overlays(
                     if primitive.kind == "path":
                         _draw_path(page, primitive, primitive.bbox)
                     elif primitive.kind == "text":
-                        _draw_text(page, primitive, primitive.bbox, doc_id, page_index)
+                        _draw_text(page, primitive, primitive.bbox, doc_id, page_index, fonts)
 
             if overlay_state:
                 page_overlay = overlay_state.get(page_index, {})
@@ -328,7 +321,7 @@ def export_pdf_with_overlays(
                         width = float(style.get("stroke_width_pt") or 1)
                         page.draw_rect(rect, color=stroke_color, fill=fill, width=width)
                     else:
-                        font_name = _overlay_font(style.get("font_family"), bool(style.get("is_bold")))
+                        font_name = fonts.overlay_font(style.get("font_family"), bool(style.get("is_bold")))
                         font_size = float(style.get("font_size_pt") or 12)
                         color = _hex_to_rgb(style.get("color"))
                         text_value = overlay.get("text") or base_text or ""
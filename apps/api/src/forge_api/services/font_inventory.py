@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+from forge_api.core.fonts.inventory import BUILTIN_INVENTORY, FontInventory
+from forge_api.services.storage import get_storage
+from forge_api.settings import get_settings
+
+
+class FontInventoryCache:
+    """In-process LRU of font inventories keyed by document; source PDFs never change under a doc id."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, FontInventory] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, doc_id: str) -> FontInventory | None:
+        with self._lock:
+            inventory = self._entries.get(doc_id)
+            if inventory is not None:
+                self._entries.move_to_end(doc_id)
+            return inventory
+
+    def put(self, doc_id: str, inventory: FontInventory) -> None:
+        with self._lock:
+            self._entries[doc_id] = inventory
+            self._entries.move_to_end(doc_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@lru_cache
+def get_font_inventory_cache() -> FontInventoryCache:
+    return FontInventoryCache(max_entries=get_settings().FORGE_FONT_INVENTORY_CACHE_ENTRIES)
+
+
+def get_font_inventory(doc_id: str) -> FontInventory:
+    """The document's font inventory, built from the original PDF on first use.
+
+    Documents without a stored original fall back to the shared builtin-only inventory.
+    """
+    cache = get_font_inventory_cache()
+    inventory = cache.get(doc_id)
+    if inventory is not None:
+        return inventory
+    try:
+        pdf_bytes = get_storage().get_bytes(f"documents/{doc_id}/original.pdf")
+    except FileNotFoundError:
+        return BUILTIN_INVENTORY
+    inventory = FontInventory.from_pdf_bytes(pdf_bytes)
+    cache.put(doc_id, inventory)
+    return inventory
@@ -5,7 +5,13 @@ import logging
 from datetime import datetime, timezone
 from typing import Any
 
+from forge_api.core.artifact_versions import MANIFEST_VERSION, VERSION_FIELD, is_stale
+from forge_api.services.correspondence import schedule_correspondence
 from forge_api.services.document_decoder import DocumentDecoder
+from forge_api.services.forge_overlay import manifest_element_content_hash
+from forge_api.services.layer_cache import get_layer_cache
+from forge_api.services.overlay_records import loads_interned
+from forge_api.services.redecode import get_redecode_scheduler
 from forge_api.services.storage import get_storage
 
 logger = logging.getLogger("forge_api.forge_manifest")
@@ -67,28 +73,42 @@ def _manifest_key(doc_id: str) -> str:
     return f"docs/{doc_id}/forge/manifest.json"
 
 
+def forge_manifest_version(doc_id: str) -> str | None:
+    """Storage version of the stored manifest, read without loading it; ``None`` before the first build."""
+    try:
+        return get_storage().get_version(_manifest_key(doc_id))
+    except FileNotFoundError:
+        return None
+
+
 def load_forge_manifest(doc_id: str) -> dict[str, Any] | None:
     storage = get_storage()
     key = _manifest_key(doc_id)
     if not storage.exists(key):
         return None
-    return json.loads(storage.get_bytes(key).decode("utf-8"))
+    # Element and span styles repeat across the document; equal ones share one dict.
+    manifest = loads_interned(storage.get_bytes(key))
+    if is_stale("manifest", manifest):
+        get_redecode_scheduler().request(key, lambda: _build_and_store_manifest(doc_id))
+    return manifest
 
 
 def build_forge_manifest(doc_id: str) -> dict[str, Any]:
     """Build manifest using universal decoder."""
-    storage = get_storage()
-
     existing = load_forge_manifest(doc_id)
     if existing:
         return existing
+    return _build_and_store_manifest(doc_id)
 
+
+def _build_and_store_manifest(doc_id: str) -> dict[str, Any]:
+    storage = get_storage()
     pdf_key = f"documents/{doc_id}/original.pdf"
     if not storage.exists(pdf_key):
         raise FileNotFoundError("Document PDF missing")
 
     pdf_bytes = storage.get_bytes(pdf_key)
-    decoder = DocumentDecoder()
+    decoder = DocumentDecoder(layer_cache=get_layer_cache())
     try:
         decoded = decoder.decode_pdf(pdf_bytes)
     except Exception as exc:  # pragma: no cover - defensive logging
@@ -106,9 +126,12 @@ def build_forge_manifest(doc_id: str) -> dict[str, Any]:
         page_data["image_path"] = (
             f"/v1/documents/{doc_id}/forge/pages/{page_data['page_index']}.png"
         )
+        for element in page_data["elements"]:
+            element["content_hash"] = manifest_element_content_hash(element)
 
     manifest = {
         "doc_id": doc_id,
+        VERSION_FIELD: MANIFEST_VERSION,
         "page_count": decoded["page_count"],
         "pages": decoded["pages"],
         "generated_at_iso": datetime.now(timezone.utc).isoformat(),
@@ -118,6 +141,8 @@ def build_forge_manifest(doc_id: str) -> dict[str, Any]:
         _manifest_key(doc_id),
         json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
     )
+    # The table needs a text_vector decode; commits score selections until it lands.
+    schedule_correspondence(doc_id, manifest, forge_manifest_version(doc_id))
 
     logger.info(
         "forge manifest built doc_id=%s pages=%s elements=%s",
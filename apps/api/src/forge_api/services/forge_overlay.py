@@ -8,9 +8,12 @@ from uuid import uuid4
 
 from forge_api.schemas.patch import OverlayPatchOp, OverlayPatchRecord
 from forge_api.services.decoded_hash import stable_content_hash
-from forge_api.services.storage import get_patch_storage
+from forge_api.services.element_index import ElementPageIndex
+from forge_api.services.overlay_records import OverlayPrimitive
+from forge_api.services.storage import PreconditionFailed, compare_and_swap, get_patch_storage
 
 
+# Legacy single-file layouts, migrated into the segmented stores on first access.
 def _overlay_log_key(doc_id: str) -> str:
     return f"docs/{doc_id}/forge/overlay_patches.json"
 
@@ -19,64 +22,213 @@ def _overlay_custom_key(doc_id: str) -> str:
     return f"docs/{doc_id}/forge/overlay_custom.json"
 
 
-def load_overlay_patch_log(doc_id: str) -> list[OverlayPatchRecord]:
+def _overlay_log_head_key(doc_id: str) -> str:
+    return f"docs/{doc_id}/forge/overlay_log/head.json"
+
+
+def _overlay_log_segment_key(doc_id: str, seq: int) -> str:
+    return f"docs/{doc_id}/forge/overlay_log/{seq:08d}.json"
+
+
+def _overlay_custom_index_key(doc_id: str) -> str:
+    return f"docs/{doc_id}/forge/overlay_custom/index.json"
+
+
+def _overlay_custom_page_key(doc_id: str, page_index: int) -> str:
+    return f"docs/{doc_id}/forge/overlay_custom/page_{page_index}.json"
+
+
+def _dump(payload: Any, sort_keys: bool = True) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+class OverlayVersionConflict(Exception):
+    def __init__(self, current_version: int) -> None:
+        super().__init__(f"overlay is at version {current_version}")
+        self.current_version = current_version
+
+
+def _ensure_segment(doc_id: str, seq: int, payload: dict[str, Any]) -> None:
+    storage = get_patch_storage()
+    key = _overlay_log_segment_key(doc_id, seq)
+    if storage.exists(key):
+        return
+    try:
+        storage.put_bytes_if_match(key, _dump(payload), None)
+    except PreconditionFailed:
+        pass
+
+
+def _initial_log_head(doc_id: str) -> dict[str, Any]:
+    """Head for a document without one, seeding segments from the legacy single-file log."""
+    storage = get_patch_storage()
+    legacy_key = _overlay_log_key(doc_id)
+    if not storage.exists(legacy_key):
+        return {"version": 0, "tail": None}
+    payload = json.loads(storage.get_bytes(legacy_key).decode("utf-8"))
+    records = [OverlayPatchRecord.model_validate(item).model_dump(mode="json") for item in payload]
+    for seq, record in enumerate(records[:-1]):
+        _ensure_segment(doc_id, seq, record)
+    return {"version": len(records), "tail": records[-1] if records else None}
+
+
+def _load_log_head(doc_id: str) -> dict[str, Any]:
     storage = get_patch_storage()
-    key = _overlay_log_key(doc_id)
+    key = _overlay_log_head_key(doc_id)
     if not storage.exists(key):
-        return []
-    payload = json.loads(storage.get_bytes(key).decode("utf-8"))
-    return [OverlayPatchRecord.model_validate(item) for item in payload]
+        return _initial_log_head(doc_id)
+    return json.loads(storage.get_bytes(key).decode("utf-8"))
 
 
 def load_overlay_version(doc_id: str) -> int:
-    return len(load_overlay_patch_log(doc_id))
+    """Number of committed overlay patchsets, read from the log head without touching segments."""
+    return int(_load_log_head(doc_id).get("version", 0))
 
 
-def append_overlay_patchset(doc_id: str, ops: list[OverlayPatchOp]) -> OverlayPatchRecord:
+def load_overlay_patchsets_since(doc_id: str, version: int) -> list[OverlayPatchRecord]:
     storage = get_patch_storage()
-    patchsets = load_overlay_patch_log(doc_id)
+    head = _load_log_head(doc_id)
+    current = int(head.get("version", 0))
+    # The newest record lives in the head; every older one has its own segment.
+    records = [
+        OverlayPatchRecord.model_validate_json(storage.get_bytes(_overlay_log_segment_key(doc_id, seq)))
+        for seq in range(max(0, version), current - 1)
+    ]
+    if head.get("tail") is not None and current - 1 >= version:
+        records.append(OverlayPatchRecord.model_validate(head["tail"]))
+    return records
+
+
+def load_overlay_patch_log(doc_id: str) -> list[OverlayPatchRecord]:
+    return load_overlay_patchsets_since(doc_id, 0)
+
+
+def append_overlay_patchset(
+    doc_id: str,
+    ops: list[OverlayPatchOp],
+    base_version: int | None = None,
+) -> OverlayPatchRecord:
+    """Append a patchset by swapping the log head; the previous tail moves to its own segment first.
+
+    The head swap is conditional, so concurrent commits never overwrite each other. With
+    ``base_version`` the commit is rejected with ``OverlayVersionConflict`` unless the log is
+    still at that version when the swap lands.
+    """
     record = OverlayPatchRecord(
         patch_id=str(uuid4()),
         created_at_iso=datetime.now(timezone.utc),
         ops=ops,
     )
-    patchsets.append(record)
-    payload = [item.model_dump(mode="json") for item in patchsets]
-    storage.put_bytes(
-        _overlay_log_key(doc_id),
-        json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8"),
-    )
+    payload = record.model_dump(mode="json")
+
+    def _advance(current: bytes | None) -> bytes:
+        head = json.loads(current.decode("utf-8")) if current is not None else _initial_log_head(doc_id)
+        version = int(head.get("version", 0))
+        if base_version is not None and version != base_version:
+            raise OverlayVersionConflict(version)
+        if head.get("tail") is not None:
+            _ensure_segment(doc_id, version - 1, head["tail"])
+        return _dump({"version": version + 1, "tail": payload})
+
+    compare_and_swap(get_patch_storage(), _overlay_log_head_key(doc_id), _advance)
     return record
 
 
-def load_overlay_custom_entries(doc_id: str) -> dict[str, dict[str, Any]]:
+def _load_custom_index(doc_id: str) -> dict[str, Any]:
+    """``{"pages": [...], "elements": {element_id: page_index}}`` for the document's custom entries."""
     storage = get_patch_storage()
-    key = _overlay_custom_key(doc_id)
+    key = _overlay_custom_index_key(doc_id)
+    if storage.exists(key):
+        index = json.loads(storage.get_bytes(key).decode("utf-8"))
+        pages = [int(page) for page in index.get("pages", [])]
+        if "elements" in index:
+            return {"pages": pages, "elements": index["elements"]}
+        # Indexes written before element routes were tracked list pages only.
+        routes = {
+            element_id: page_index for page_index in pages for element_id in _load_custom_page(doc_id, page_index)
+        }
+        storage.put_bytes(key, _dump({"pages": pages, "elements": routes}))
+        return {"pages": pages, "elements": routes}
+    legacy_key = _overlay_custom_key(doc_id)
+    if not storage.exists(legacy_key):
+        return {"pages": [], "elements": {}}
+    payload = json.loads(storage.get_bytes(legacy_key).decode("utf-8"))
+    if isinstance(payload, dict):
+        payload = list(payload.values())
+    if not isinstance(payload, list):
+        payload = []
+    by_page: dict[int, dict[str, dict[str, Any]]] = {}
+    for item in payload:
+        if isinstance(item, dict) and item.get("element_id") and item.get("page_index") is not None:
+            by_page.setdefault(int(item["page_index"]), {})[item["element_id"]] = item
+    for page_index, entries in by_page.items():
+        storage.put_bytes(_overlay_custom_page_key(doc_id, page_index), _dump(entries, sort_keys=False))
+    index = {
+        "pages": sorted(by_page),
+        "elements": {element_id: page_index for page_index, entries in by_page.items() for element_id in entries},
+    }
+    storage.put_bytes(key, _dump(index))
+    return index
+
+
+def _load_custom_page(doc_id: str, page_index: int) -> dict[str, dict[str, Any]]:
+    storage = get_patch_storage()
+    key = _overlay_custom_page_key(doc_id, page_index)
     if not storage.exists(key):
         return {}
-    payload = json.loads(storage.get_bytes(key).decode("utf-8"))
-    if isinstance(payload, dict):
-        return payload
-    if isinstance(payload, list):
-        return {item["element_id"]: item for item in payload if isinstance(item, dict) and item.get("element_id")}
-    return {}
+    return json.loads(storage.get_bytes(key).decode("utf-8"))
+
+
+def load_overlay_custom_routes(doc_id: str) -> dict[str, int]:
+    """Page of every custom entry, read from the index without loading the entries."""
+    return {element_id: int(page_index) for element_id, page_index in _load_custom_index(doc_id)["elements"].items()}
+
+
+def load_overlay_custom_entries(doc_id: str, page_index: int | None = None) -> dict[str, dict[str, Any]]:
+    if page_index is not None:
+        return _load_custom_page(doc_id, page_index)
+    entries: dict[str, dict[str, Any]] = {}
+    for page in _load_custom_index(doc_id)["pages"]:
+        entries.update(_load_custom_page(doc_id, page))
+    return entries
 
 
 def upsert_overlay_custom_entries(doc_id: str, entries: list[dict[str, Any]]) -> None:
+    """Merge entries into their page's custom store; entries without a page are not routable and skipped."""
     if not entries:
         return
     storage = get_patch_storage()
-    existing = load_overlay_custom_entries(doc_id)
+    by_page: dict[int, list[dict[str, Any]]] = {}
     for entry in entries:
-        element_id = entry.get("element_id")
-        if not element_id:
+        if not entry.get("element_id") or entry.get("page_index") is None:
             continue
-        existing[element_id] = entry
-    payload = list(existing.values())
-    storage.put_bytes(
-        _overlay_custom_key(doc_id),
-        json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8"),
-    )
+        by_page.setdefault(int(entry["page_index"]), []).append(entry)
+    if not by_page:
+        return
+    index = _load_custom_index(doc_id)
+    for page_index, page_entries in by_page.items():
+
+        def _merge(current: bytes | None, page_entries: list[dict[str, Any]] = page_entries) -> bytes:
+            existing = json.loads(current.decode("utf-8")) if current is not None else {}
+            for entry in page_entries:
+                existing[entry["element_id"]] = entry
+            # Keep insertion order: it is the order custom primitives appear on the page.
+            return _dump(existing, sort_keys=False)
+
+        compare_and_swap(storage, _overlay_custom_page_key(doc_id, page_index), _merge)
+    routes = {entry["element_id"]: page_index for page_index, page_entries in by_page.items() for entry in page_entries}
+    if any(index["elements"].get(element_id) != page_index for element_id, page_index in routes.items()):
+
+        def _add_routes(current: bytes | None) -> bytes:
+            known = json.loads(current.decode("utf-8")) if current is not None else {}
+            return _dump(
+                {
+                    "pages": sorted(set(known.get("pages", [])) | set(by_page)),
+                    "elements": {**known.get("elements", {}), **routes},
+                }
+            )
+
+        compare_and_swap(storage, _overlay_custom_index_key(doc_id), _add_routes)
 
 
 def _overlay_content_hash(
@@ -139,30 +291,80 @@ def _text_similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
 
+def _bounded_text_similarity(a: str, b: str, minimum: float) -> float | None:
+    """``_text_similarity`` when it can reach ``minimum``, else ``None`` without the full comparison."""
+    if not a or not b:
+        similarity = _text_similarity(a, b)
+        return similarity if similarity >= minimum else None
+    # ratio() is bounded by the length ratio, then by the cheap real_quick/quick upper bounds.
+    if 2.0 * min(len(a), len(b)) / (len(a) + len(b)) < minimum:
+        return None
+    matcher = SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() < minimum or matcher.quick_ratio() < minimum:
+        return None
+    similarity = matcher.ratio()
+    return similarity if similarity >= minimum else None
+
+
+_SELECTION_IOU_WEIGHT = 0.7
+_SELECTION_TEXT_WEIGHT = 0.3
+_SELECTION_MIN_SCORE = 0.25
+
+
 def resolve_overlay_selection(
     selection: list[dict[str, Any]],
     manifest_elements: list[dict[str, Any]],
+    index: ElementPageIndex | None = None,
 ) -> dict[str, dict[str, Any]]:
+    """Map selected element IDs to manifest elements.
+
+    Known IDs resolve by lookup. Other items (e.g. decoded v1 spans) match the
+    overlapping manifest element with the best blend of bbox IoU and text
+    similarity. ``index`` is an optional prebuilt spatial index over
+    ``manifest_elements``.
+    """
+    by_id: dict[str, dict[str, Any]] = {}
+    for candidate in manifest_elements:
+        candidate_id = candidate.get("element_id")
+        if candidate_id:
+            by_id.setdefault(candidate_id, candidate)
+
     resolved: dict[str, dict[str, Any]] = {}
     for item in selection:
         element_id = item.get("element_id")
         if not element_id:
             continue
-        if any(element_id == candidate.get("element_id") for candidate in manifest_elements):
-            resolved[element_id] = next(
-                candidate for candidate in manifest_elements if candidate.get("element_id") == element_id
-            )
+        known = by_id.get(element_id)
+        if known is not None:
+            resolved[element_id] = known
             continue
+        bbox = item.get("bbox") or []
+        if len(bbox) < 4:
+            continue
+        if index is None:
+            index = ElementPageIndex.build(manifest_elements, "bbox")
+        text = item.get("text", "")
         best_score = 0.0
         best_match: dict[str, Any] | None = None
-        for candidate in manifest_elements:
-            iou = _bbox_iou(item.get("bbox") or [], candidate.get("bbox") or [])
-            similarity = _text_similarity(item.get("text", ""), candidate.get("text", ""))
-            score = iou * 0.7 + similarity * 0.3
+        for candidate in index.in_rect(*[float(value) for value in bbox[:4]]):
+            iou = _bbox_iou(bbox, candidate.get("bbox") or [])
+            if iou <= 0:
+                continue
+            required = max(best_score, _SELECTION_MIN_SCORE) - iou * _SELECTION_IOU_WEIGHT
+            if required > _SELECTION_TEXT_WEIGHT:
+                continue
+            similarity = _bounded_text_similarity(
+                text,
+                candidate.get("text", ""),
+                max(0.0, required / _SELECTION_TEXT_WEIGHT),
+            )
+            if similarity is None:
+                continue
+            score = iou * _SELECTION_IOU_WEIGHT + similarity * _SELECTION_TEXT_WEIGHT
             if score > best_score:
                 best_score = score
                 best_match = candidate
-        if best_match and best_score >= 0.25:
+        if best_match and best_score >= _SELECTION_MIN_SCORE:
             resolved[element_id] = best_match
     return resolved
 
@@ -188,13 +390,156 @@ def _build_overlay_mask(
     }
 
 
+def manifest_element_content_hash(element: dict[str, Any]) -> str:
+    """Base overlay content hash of a manifest element (stored on the element at manifest build)."""
+    return _overlay_content_hash(
+        element.get("text", ""),
+        element.get("bbox") or [0.0, 0.0, 0.0, 0.0],
+        element.get("style") or {},
+        "text_run",
+    )
+
+
+def _shared_bbox(bbox: Any) -> list[float]:
+    if not bbox:
+        return [0.0, 0.0, 0.0, 0.0]
+    # Freshly decoded manifests carry tuples; stored ones already have lists to share.
+    return bbox if isinstance(bbox, list) else list(bbox)
+
+
+def _base_primitive(element: dict[str, Any]) -> OverlayPrimitive:
+    text = element.get("text", "")
+    # Style and bbox stay shared with the manifest element; ops replace them instead of mutating.
+    style = element.get("style") or {}
+    return OverlayPrimitive(
+        text=text,
+        content_hash=element.get("content_hash") or manifest_element_content_hash(element),
+        bbox=_shared_bbox(element.get("bbox")),
+        style=style,
+        element_type=element.get("element_type") or "text",
+        base_text=text,
+        base_style=style,
+    )
+
+
+def _custom_primitive(entry: dict[str, Any]) -> OverlayPrimitive:
+    base_text = entry.get("text", "")
+    style = entry.get("style") or {}
+    element_kind = entry.get("element_type") or "text"
+    path_commands = entry.get("path_commands") or []
+    return OverlayPrimitive(
+        text=base_text,
+        content_hash=entry.get("content_hash")
+        or _overlay_content_hash(
+            base_text,
+            entry.get("bbox") or [0.0, 0.0, 0.0, 0.0],
+            style,
+            "path" if element_kind == "path" else "text_run",
+            path_commands=path_commands,
+        ),
+        bbox=_shared_bbox(entry.get("bbox")),
+        style=style,
+        element_type=entry.get("element_type") or "text",
+        base_text=base_text,
+        base_style=style,
+        path_commands=path_commands,
+        path_hint=entry.get("path_hint"),
+        resolved_element_id=entry.get("resolved_element_id"),
+    )
+
+
+def apply_overlay_op(
+    page_entry: dict[str, Any],
+    page_masks: dict[str, dict[str, Any]],
+    op: OverlayPatchOp,
+) -> bool:
+    """Apply one op to a page's overlay primitives; returns False when the target is not on the page."""
+    page_map = page_entry.get("primitives", {})
+    if op.element_id not in page_map:
+        return False
+    current = page_map[op.element_id]
+    element_kind = "path" if current.get("element_type") == "path" else "text_run"
+    if op.type == "replace_element":
+        current["text"] = op.new_text
+        current_style = dict(current.get("style") or {})
+        preserve_style = op.preserve_style if op.preserve_style is not None else True
+        preserve_font_size = op.preserve_font_size if op.preserve_font_size is not None else preserve_style
+        preserve_color = op.preserve_color if op.preserve_color is not None else preserve_style
+        if not preserve_style:
+            if op.style_changes:
+                for key, value in op.style_changes.items():
+                    if key == "font_size_pt" and preserve_font_size:
+                        continue
+                    if key == "color" and preserve_color:
+                        continue
+                    current_style[key] = value
+            if op.style:
+                if op.style.get("color") is not None and not preserve_color:
+                    current_style["color"] = op.style.get("color")
+                if op.style.get("font_size_pt") is not None and not preserve_font_size:
+                    current_style["font_size_pt"] = op.style.get("font_size_pt")
+                if op.style.get("bold") is not None:
+                    current_style["is_bold"] = bool(op.style.get("bold"))
+                if op.style.get("italic") is not None:
+                    current_style["is_italic"] = bool(op.style.get("italic"))
+        current["style"] = current_style
+        current["content_hash"] = _overlay_content_hash(
+            current.get("text", ""),
+            current.get("bbox") or [0.0, 0.0, 0.0, 0.0],
+            current.get("style") or {},
+            element_kind,
+            path_commands=current.get("path_commands") or [],
+        )
+        base_text = current.get("base_text") or ""
+        if op.new_text != base_text:
+            page_masks[op.element_id] = _build_overlay_mask(op.element_id, current.get("bbox") or [])
+    elif op.type == "update_style":
+        current_style = dict(current.get("style") or {})
+        current_style.update(op.style.model_dump(exclude_none=True))
+        current["style"] = current_style
+        current["content_hash"] = _overlay_content_hash(
+            current.get("text", ""),
+            current.get("bbox") or [0.0, 0.0, 0.0, 0.0],
+            current.get("style") or {},
+            element_kind,
+            path_commands=current.get("path_commands") or [],
+        )
+        if element_kind == "text_run":
+            base_style = current.get("base_style") or {}
+            if current_style != base_style:
+                page_masks[op.element_id] = _build_overlay_mask(op.element_id, current.get("bbox") or [])
+    return True
+
+
+def add_custom_primitive(
+    overlay: dict[int, dict[str, Any]],
+    element_pages: dict[str, int],
+    element_id: str,
+    entry: dict[str, Any],
+) -> int | None:
+    page_index = entry.get("page_index")
+    if page_index is None:
+        return None
+    page_index = int(page_index)
+    page_entry = overlay.setdefault(page_index, {"primitives": {}, "masks": []})
+    page_entry["primitives"][element_id] = _custom_primitive(entry)
+    element_pages[element_id] = page_index
+    return page_index
+
+
 def build_overlay_state(
     manifest: dict[str, Any],
     patchsets: list[OverlayPatchRecord],
     custom_entries: dict[str, dict[str, Any]] | None = None,
+    element_pages: dict[str, int] | None = None,
 ) -> dict[int, dict[str, Any]]:
+    """Replay the manifest, custom entries and every patchset into per-page overlay state.
+
+    ``element_pages``, when given, is filled with the page each element ID routes to.
+    """
     overlay: dict[int, dict[str, Any]] = {}
-    element_lookup: dict[str, dict[str, Any]] = {}
+    if element_pages is None:
+        element_pages = {}
 
     if custom_entries is None:
         custom_entries = {}
@@ -204,141 +549,32 @@ def build_overlay_state(
         elements: dict[str, dict[str, Any]] = {}
         for element in page.get("elements", []):
             element_id = element.get("element_id")
-            text = element.get("text", "")
             if not element_id:
                 continue
-            element_kind = "text_run"
-            elements[element_id] = {
-                "text": text,
-                "content_hash": _overlay_content_hash(
-                    text,
-                    element.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-                    element.get("style") or {},
-                    element_kind,
-                ),
-                "bbox": element.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-                "style": element.get("style") or {},
-                "element_type": element.get("element_type") or "text",
-                "base_text": text,
-                "base_style": element.get("style") or {},
-            }
-            element_lookup[element_id] = {
-                "page_index": page_index,
-                "bbox": element.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-            }
+            elements[element_id] = _base_primitive(element)
+            if page_index is not None:
+                element_pages[element_id] = int(page_index)
         if page_index is not None:
             overlay[int(page_index)] = {"primitives": elements, "masks": []}
 
     for element_id, entry in custom_entries.items():
-        page_index = entry.get("page_index")
-        if page_index is None:
-            continue
-        page_index = int(page_index)
-        page_entry = overlay.setdefault(page_index, {"primitives": {}, "masks": []})
-        base_text = entry.get("text", "")
-        style = entry.get("style") or {}
-        element_kind = entry.get("element_type") or "text"
-        path_commands = entry.get("path_commands") or []
-        page_entry["primitives"][element_id] = {
-            "text": base_text,
-            "content_hash": entry.get("content_hash")
-            or _overlay_content_hash(
-                base_text,
-                entry.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-                style,
-                "path" if element_kind == "path" else "text_run",
-                path_commands=path_commands,
-            ),
-            "bbox": entry.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-            "style": style,
-            "element_type": entry.get("element_type") or "text",
-            "base_text": base_text,
-            "base_style": style,
-            "path_commands": path_commands,
-            "path_hint": entry.get("path_hint"),
-            "resolved_element_id": entry.get("resolved_element_id"),
-        }
-        element_lookup[element_id] = {
-            "page_index": page_index,
-            "bbox": entry.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-        }
+        add_custom_primitive(overlay, element_pages, element_id, entry)
 
     masks_by_page: dict[int, dict[str, dict[str, Any]]] = {}
 
     for patchset in patchsets:
         for op in patchset.ops:
-            element_meta = element_lookup.get(op.element_id)
-            if not element_meta:
+            page_index = element_pages.get(op.element_id)
+            if page_index is None:
                 continue
-            page_index = int(element_meta["page_index"])
-            page_entry = overlay.get(page_index)
+            page_entry = overlay.get(int(page_index))
             if page_entry is None:
                 continue
-            page_map = page_entry.get("primitives", {})
-            if op.element_id not in page_map:
-                continue
-            current = page_map[op.element_id]
-            element_kind = "path" if current.get("element_type") == "path" else "text_run"
-            if op.type == "replace_element":
-                current["text"] = op.new_text
-                current_style = current.get("style") or {}
-                preserve_style = op.preserve_style if op.preserve_style is not None else True
-                preserve_font_size = (
-                    op.preserve_font_size if op.preserve_font_size is not None else preserve_style
-                )
-                preserve_color = op.preserve_color if op.preserve_color is not None else preserve_style
-                if not preserve_style:
-                    if op.style_changes:
-                        for key, value in op.style_changes.items():
-                            if key == "font_size_pt" and preserve_font_size:
-                                continue
-                            if key == "color" and preserve_color:
-                                continue
-                            current_style[key] = value
-                    if op.style:
-                        if op.style.get("color") is not None and not preserve_color:
-                            current_style["color"] = op.style.get("color")
-                        if op.style.get("font_size_pt") is not None and not preserve_font_size:
-                            current_style["font_size_pt"] = op.style.get("font_size_pt")
-                        if op.style.get("bold") is not None:
-                            current_style["is_bold"] = bool(op.style.get("bold"))
-                        if op.style.get("italic") is not None:
-                            current_style["is_italic"] = bool(op.style.get("italic"))
-                current["style"] = current_style
-                current["content_hash"] = _overlay_content_hash(
-                    current.get("text", ""),
-                    current.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-                    current.get("style") or {},
-                    element_kind,
-                    path_commands=current.get("path_commands") or [],
-                )
-                base_text = current.get("base_text") or ""
-                if op.new_text != base_text:
-                    masks_by_page.setdefault(page_index, {})[op.element_id] = _build_overlay_mask(
-                        op.element_id,
-                        element_meta["bbox"],
-                    )
-            elif op.type == "update_style":
-                current_style = current.get("style") or {}
-                current_style.update(op.style.model_dump(exclude_none=True))
-                current["style"] = current_style
-                current["content_hash"] = _overlay_content_hash(
-                    current.get("text", ""),
-                    current.get("bbox") or [0.0, 0.0, 0.0, 0.0],
-                    current.get("style") or {},
-                    element_kind,
-                    path_commands=current.get("path_commands") or [],
-                )
-                if element_kind == "text_run":
-                    base_style = current.get("base_style") or {}
-                    if current_style != base_style:
-                        masks_by_page.setdefault(page_index, {})[op.element_id] = _build_overlay_mask(
-                            op.element_id,
-                            element_meta["bbox"],
-                        )
+            page_masks = masks_by_page.setdefault(int(page_index), {})
+            apply_overlay_op(page_entry, page_masks, op)
 
     for page_index, masks in masks_by_page.items():
-        if page_index in overlay:
+        if page_index in overlay and masks:
             overlay[page_index]["masks"] = list(masks.values())
 
     return overlay
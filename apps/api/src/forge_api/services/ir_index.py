@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+from typing import Any
+
+from forge_api.core.artifact_versions import IR_VERSION, is_stale
+from forge_api.core.ir.columnar import ColumnarPage
+from forge_api.core.ir.spatial_index import PageSpatialIndex, build_spatial_index, spatial_index_from_payload
+from forge_api.services.ir_pdf import get_columnar_page
+from forge_api.services.storage import get_storage
+from forge_api.settings import get_settings
+
+logger = logging.getLogger("forge_api.ir_index")
+
+
+@dataclass(frozen=True)
+class IndexedPage:
+    """An IR page together with its spatial index; shared between requests, never mutate."""
+
+    page: ColumnarPage
+    index: PageSpatialIndex
+
+
+def _index_key(doc_id: str, page_index: int) -> str:
+    return f"documents/{doc_id}/ir/page_{page_index}.index.json"
+
+
+def _load_persisted_index(doc_id: str, page: ColumnarPage, kind: str) -> PageSpatialIndex | None:
+    storage = get_storage()
+    key = _index_key(doc_id, page.page_index)
+    if not storage.exists(key):
+        return None
+    try:
+        payload: dict[str, Any] = json.loads(storage.get_bytes(key).decode("utf-8"))
+        if (
+            payload.get("kind", "grid") != kind
+            or payload.get("ir_version") != page.decoder_version
+            or payload.get("primitives") != len(page)
+        ):
+            return None
+        return spatial_index_from_payload(kind, payload["index"])
+    except (FileNotFoundError, KeyError, TypeError, ValueError) as exc:
+        logger.warning("Persisted spatial index unreadable doc_id=%s page=%s error=%s", doc_id, page.page_index, exc)
+        return None
+
+
+def _persist_index(doc_id: str, page: ColumnarPage, kind: str, index: PageSpatialIndex) -> None:
+    payload = {
+        "kind": kind,
+        "ir_version": page.decoder_version,
+        "primitives": len(page),
+        "index": index.to_payload(),
+    }
+    get_storage().put_bytes(
+        _index_key(doc_id, page.page_index),
+        json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+        content_type="application/json",
+    )
+
+
+class PageIndexCache:
+    """In-process LRU of IR pages and their spatial indexes keyed by (doc, page, IR version)."""
+
+    def __init__(self, max_entries: int, persist: bool = False, kind: str = "grid") -> None:
+        self.max_entries = max_entries
+        self.persist = persist
+        self.kind = kind
+        self._entries: OrderedDict[tuple[str, int, int], IndexedPage] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, doc_id: str, page_index: int) -> IndexedPage:
+        key = (doc_id, page_index, IR_VERSION)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        page = get_columnar_page(doc_id, page_index)
+        index = _load_persisted_index(doc_id, page, self.kind) if self.persist else None
+        if index is None:
+            index = build_spatial_index(page, self.kind)
+            if self.persist:
+                _persist_index(doc_id, page, self.kind, index)
+        entry = IndexedPage(page=page, index=index)
+        # Stale pages are being regenerated in the background; keep reading them from storage
+        # until the fresh version lands.
+        if not is_stale("ir", page):
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, doc_id: str, page_index: int | None = None) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == doc_id and page_index in {None, key[1]}:
+                    del self._entries[key]
+
+
+@lru_cache
+def get_page_index_cache() -> PageIndexCache:
+    settings = get_settings()
+    return PageIndexCache(
+        max_entries=settings.FORGE_SPATIAL_INDEX_CACHE_ENTRIES,
+        persist=settings.FORGE_SPATIAL_INDEX_PERSIST,
+        kind=settings.FORGE_SPATIAL_INDEX.lower(),
+    )
+
+
+def get_indexed_page(doc_id: str, page_index: int) -> IndexedPage:
+    return get_page_index_cache().get(doc_id, page_index)
@@ -4,18 +4,25 @@ import json
 
 import fitz
 
+from forge_api.core.artifact_versions import IR_VERSION, is_stale
+from forge_api.core.ir.columnar import ColumnarPage, encode_columnar_page, open_columnar_page
 from forge_api.core.ir.normalize import normalize_page
 from forge_api.schemas.ir import IRPage, IRPrimitive
+from forge_api.services.layer_cache import get_layer_cache
+from forge_api.services.redecode import get_redecode_scheduler
 from forge_api.services.storage import get_storage
 
 
 def _cache_key(doc_id: str, page_index: int) -> str:
+    return f"documents/{doc_id}/ir/page_{page_index}.columnar"
+
+
+def _legacy_cache_key(doc_id: str, page_index: int) -> str:
     return f"documents/{doc_id}/ir/page_{page_index}.json"
 
 
 def _serialize_ir_page(ir_page: IRPage) -> bytes:
-    payload = ir_page.model_dump()
-    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return encode_columnar_page(ir_page)
 
 
 def _deserialize_ir_page(data: str) -> IRPage:
@@ -65,15 +72,47 @@ def _page_to_schema(page_ir) -> IRPage:
         height_pt=page_ir.height_pt,
         rotation=page_ir.rotation,
         primitives=primitives,
+        decoder_version=IR_VERSION,
     )
 
 
-def get_page_ir(doc_id: str, page_index: int) -> IRPage:
+def _read_columnar(doc_id: str, page_index: int) -> ColumnarPage | None:
     storage = get_storage()
-    cache_key = _cache_key(doc_id, page_index)
-    if storage.exists(cache_key):
-        return _deserialize_ir_page(storage.get_bytes(cache_key).decode("utf-8"))
+    key = _cache_key(doc_id, page_index)
+    if not storage.exists(key):
+        return None
+    try:
+        get_path = getattr(storage, "get_path", None)
+        if get_path is not None:
+            return open_columnar_page(get_path(key))
+        return ColumnarPage.decode(storage.get_bytes(key))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def get_columnar_page(doc_id: str, page_index: int) -> ColumnarPage:
+    """The stored IR page, memory-mapped when storage is local."""
+    cached = _read_columnar(doc_id, page_index)
+    if cached is None:
+        storage = get_storage()
+        legacy_key = _legacy_cache_key(doc_id, page_index)
+        if not storage.exists(legacy_key):
+            return _build_page_ir(doc_id, page_index)
+        # JSON pages predate the columnar format and are always stale.
+        cached = ColumnarPage.from_ir_page(_deserialize_ir_page(storage.get_bytes(legacy_key).decode("utf-8")))
+    if is_stale("ir", cached):
+        get_redecode_scheduler().request(
+            _cache_key(doc_id, page_index), lambda: _build_page_ir(doc_id, page_index)
+        )
+    return cached
 
+
+def get_page_ir(doc_id: str, page_index: int) -> IRPage:
+    return get_columnar_page(doc_id, page_index).to_ir_page()
+
+
+def _build_page_ir(doc_id: str, page_index: int) -> ColumnarPage:
+    storage = get_storage()
     pdf_key = f"documents/{doc_id}/original.pdf"
     if not storage.exists(pdf_key):
         raise FileNotFoundError("Document PDF missing")
@@ -84,10 +123,10 @@ def get_page_ir(doc_id: str, page_index: int) -> IRPage:
         if page_index < 0 or page_index >= len(doc):
             raise IndexError("Page index out of range")
         page = doc[page_index]
-        page_ir = normalize_page(doc_id, page_index, page)
-        schema_page = _page_to_schema(page_ir)
-        storage.put_bytes(cache_key, _serialize_ir_page(schema_page))
-        return schema_page
+        page_ir = normalize_page(doc_id, page_index, page, layer_cache=get_layer_cache())
+        encoded = _serialize_ir_page(_page_to_schema(page_ir))
+        storage.put_bytes(_cache_key(doc_id, page_index), encoded, content_type="application/octet-stream")
+        return ColumnarPage.decode(encoded)
     finally:
         doc.close()
 
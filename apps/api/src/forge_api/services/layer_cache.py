@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Any
+
+from forge_api.services.storage import get_storage
+from forge_api.settings import get_settings
+
+logger = logging.getLogger("forge_api.layer_cache")
+
+
+def _layer_key(namespace: str, key: str) -> str:
+    return f"templates/{namespace}/{key}.json"
+
+
+def _blob_key(namespace: str, key: str) -> str:
+    return f"templates/{namespace}/{key}.bin"
+
+
+class SharedLayerCache:
+    """Cross-document cache of decoded page layers keyed by page fingerprint.
+
+    Entries live in a bounded in-process LRU backed by the shared storage
+    driver, so replicas reuse layers decoded by each other. Only the LRU is
+    bounded: entries under ``templates/`` in storage are never evicted here,
+    so expire that prefix with a storage lifecycle rule.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def _remember(self, namespace: str, key: str, encoded: bytes) -> None:
+        # Entries are kept encoded so callers never share (and mutate) cached objects.
+        with self._lock:
+            self._entries[(namespace, key)] = encoded
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        with self._lock:
+            encoded = self._entries.get((namespace, key))
+            if encoded is not None:
+                self._entries.move_to_end((namespace, key))
+        if encoded is None:
+            storage = get_storage()
+            storage_key = _layer_key(namespace, key)
+            try:
+                if not storage.exists(storage_key):
+                    return None
+                encoded = storage.get_bytes(storage_key)
+            except FileNotFoundError:
+                return None
+            self._remember(namespace, key, encoded)
+        try:
+            return json.loads(encoded.decode("utf-8"))
+        except ValueError as exc:
+            logger.warning("Layer cache entry unreadable namespace=%s key=%s error=%s", namespace, key, exc)
+            return None
+
+    def put(self, namespace: str, key: str, payload: Any) -> None:
+        encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._remember(namespace, key, encoded)
+        get_storage().put_bytes(_layer_key(namespace, key), encoded, content_type="application/json")
+
+    def get_blob(self, namespace: str, key: str) -> bytes | None:
+        storage = get_storage()
+        storage_key = _blob_key(namespace, key)
+        try:
+            if not storage.exists(storage_key):
+                return None
+            return storage.get_bytes(storage_key)
+        except FileNotFoundError:
+            return None
+
+    def put_blob(self, namespace: str, key: str, data: bytes) -> None:
+        get_storage().put_bytes(_blob_key(namespace, key), data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache
+def get_layer_cache() -> SharedLayerCache:
+    return SharedLayerCache(max_entries=get_settings().FORGE_LAYER_CACHE_MAX_ENTRIES)
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Iterable, Protocol
+
+import fitz
+from pydantic import ValidationError
+
+from forge_api.schemas.decoded import DecodedDocument, TextRunElement
+from forge_api.services.pdf_decode_v1 import build_text_run_element
+from forge_api.services.storage import get_storage
+from forge_api.settings import get_settings
+
+logger = logging.getLogger("forge_api.ocr")
+
+# OCR spans overlapping native text by more than this fraction are treated as duplicates.
+_NATIVE_OVERLAP_RATIO = 0.5
+
+
+@dataclass(frozen=True)
+class OCRSpan:
+    text: str
+    bbox: tuple[float, float, float, float]
+    font_size_pt: float | None = None
+
+
+class OCREngine(Protocol):
+    name: str
+
+    def recognize(self, page: fitz.Page) -> list[OCRSpan]:
+        ...
+
+
+class StubOCREngine:
+    """Deterministic engine that reports one line of text per page."""
+
+    name = "stub"
+
+    def __init__(self, text: str = "OCR text") -> None:
+        self.text = text
+
+    def recognize(self, page: fitz.Page) -> list[OCRSpan]:
+        rect = page.rect
+        top = rect.height * 0.1
+        return [
+            OCRSpan(
+                text=f"{self.text} {page.number}",
+                bbox=(rect.width * 0.1, top, rect.width * 0.9, top + 14.0),
+                font_size_pt=12.0,
+            )
+        ]
+
+
+class LocalOCREngine:
+    """Tesseract OCR through PyMuPDF; requires a local Tesseract install."""
+
+    name = "local"
+
+    def __init__(self, language: str = "eng", dpi: int = 300) -> None:
+        self.language = language
+        self.dpi = dpi
+
+    def recognize(self, page: fitz.Page) -> list[OCRSpan]:
+        textpage = page.get_textpage_ocr(language=self.language, dpi=self.dpi, full=True)
+        text_dict = page.get_text("dict", textpage=textpage)
+        spans: list[OCRSpan] = []
+        for block in text_dict.get("blocks", []):
+            if block.get("type") != 0:
+                continue
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    text = span.get("text", "")
+                    if not text or text.isspace():
+                        continue
+                    size = span.get("size")
+                    spans.append(
+                        OCRSpan(
+                            text=text,
+                            bbox=tuple(float(value) for value in span.get("bbox", (0, 0, 0, 0))),
+                            font_size_pt=float(size) if size is not None else None,
+                        )
+                    )
+        return spans
+
+
+def get_ocr_engine() -> OCREngine | None:
+    settings = get_settings()
+    engine = settings.FORGE_OCR_ENGINE.lower()
+    if engine == "local":
+        return LocalOCREngine(language=settings.FORGE_OCR_LANGUAGE, dpi=settings.FORGE_OCR_DPI)
+    if engine == "stub":
+        return StubOCREngine()
+    return None
+
+
+def ocr_artifact_key(doc_id: str, page_index: int) -> str:
+    return f"documents/{doc_id}/decoded/ocr/page_{page_index}.json"
+
+
+def read_ocr_result(doc_id: str, page_index: int) -> dict[str, Any] | None:
+    storage = get_storage()
+    key = ocr_artifact_key(doc_id, page_index)
+    if not storage.exists(key):
+        return None
+    try:
+        return json.loads(storage.get_bytes(key).decode("utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def ocr_retry_due(result: dict[str, Any], now: float | None = None) -> bool:
+    """Whether a stored result is a failure that may be retried now.
+
+    Failures record their attempt count and the earliest retry time, so a transient engine
+    error is retried with backoff until ``FORGE_OCR_MAX_ATTEMPTS`` runs have failed.
+    """
+    if result.get("status") != "failed":
+        return False
+    if int(result.get("attempts", 1)) >= get_settings().FORGE_OCR_MAX_ATTEMPTS:
+        return False
+    return (time.time() if now is None else now) >= float(result.get("retry_after", 0.0))
+
+
+def _overlap_ratio(a: fitz.Rect, b: fitz.Rect) -> float:
+    area = a.get_area()
+    if area <= 0:
+        return 0.0
+    return (a & b).get_area() / area
+
+
+def _native_text_rects(page: fitz.Page) -> list[fitz.Rect]:
+    rects: list[fitz.Rect] = []
+    for block in page.get_text("dict").get("blocks", []):
+        if block.get("type") != 0:
+            continue
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                if span.get("text", "").strip():
+                    rects.append(fitz.Rect(span["bbox"]))
+    return rects
+
+
+def run_page_ocr(doc_id: str, page_index: int, engine: OCREngine) -> dict[str, Any]:
+    """OCR one page and store its result, bumping the page version."""
+    storage = get_storage()
+    previous = read_ocr_result(doc_id, page_index)
+    version = int(previous.get("version", 0)) + 1 if previous else 1
+    result: dict[str, Any] = {
+        "page_index": page_index,
+        "version": version,
+        "engine": engine.name,
+        "status": "done",
+        "elements": [],
+    }
+    try:
+        doc = fitz.open(stream=storage.get_bytes(f"documents/{doc_id}/original.pdf"), filetype="pdf")
+        try:
+            page = doc[page_index]
+            width_pt = float(page.rect.width)
+            height_pt = float(page.rect.height)
+            native = _native_text_rects(page)
+            for span in engine.recognize(page):
+                rect = fitz.Rect(span.bbox)
+                if any(_overlap_ratio(rect, other) > _NATIVE_OVERLAP_RATIO for other in native):
+                    continue
+                element = build_text_run_element(
+                    doc_id,
+                    page_index,
+                    span.text,
+                    span.bbox,
+                    width_pt,
+                    height_pt,
+                    font_size_pt=span.font_size_pt,
+                    source="ocr",
+                )
+                result["elements"].append(element.model_dump(mode="json"))
+        finally:
+            doc.close()
+    except Exception as exc:
+        logger.warning("OCR failed doc_id=%s page=%s engine=%s error=%s", doc_id, page_index, engine.name, exc)
+        attempts = int(previous.get("attempts", 1)) + 1 if previous and previous.get("status") == "failed" else 1
+        backoff = get_settings().FORGE_OCR_RETRY_BACKOFF_SEC * 2 ** (attempts - 1)
+        result.update(
+            {
+                "status": "failed",
+                "elements": [],
+                "error": str(exc),
+                "attempts": attempts,
+                "retry_after": time.time() + backoff,
+            }
+        )
+    storage.put_bytes(
+        ocr_artifact_key(doc_id, page_index),
+        json.dumps(result, ensure_ascii=False).encode("utf-8"),
+        content_type="application/json",
+    )
+    return result
+
+
+class OCRWorkerPool:
+    """Background pool running page OCR off the request path.
+
+    At most one job per (doc_id, page_index) is in flight; finished pages are
+    picked up by :func:`merge_ocr_results` on the next read.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="forge-ocr")
+        self._pending: dict[tuple[str, int], Future] = {}
+        self._lock = Lock()
+
+    def _forget(self, key: tuple[str, int]) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def schedule(self, doc_id: str, page_indexes: Iterable[int]) -> set[int]:
+        """Queue OCR for pages; returns the pages that are queued or already running."""
+        engine = get_ocr_engine()
+        if engine is None:
+            return set()
+        queued: set[int] = set()
+        with self._lock:
+            for page_index in page_indexes:
+                key = (doc_id, page_index)
+                if key not in self._pending:
+                    future = self._executor.submit(run_page_ocr, doc_id, page_index, engine)
+                    self._pending[key] = future
+                    future.add_done_callback(lambda _, key=key: self._forget(key))
+                queued.add(page_index)
+        return queued
+
+    def is_pending(self, doc_id: str, page_index: int) -> bool:
+        with self._lock:
+            return (doc_id, page_index) in self._pending
+
+    def wait(self, doc_id: str | None = None, timeout: float | None = None) -> None:
+        with self._lock:
+            futures = [future for (pending_doc, _), future in self._pending.items() if doc_id in {None, pending_doc}]
+        wait(futures, timeout=timeout)
+
+
+@lru_cache
+def get_ocr_pool() -> OCRWorkerPool:
+    return OCRWorkerPool(max_workers=get_settings().FORGE_OCR_WORKERS)
+
+
+def merge_ocr_results(decoded: DecodedDocument) -> DecodedDocument:
+    """Overlay finished OCR pages onto a decoded document and queue missing or retryable ones."""
+    flagged = [page for page in decoded.pages if page.needs_ocr_fallback]
+    if not flagged:
+        return decoded
+
+    results: dict[int, dict[str, Any]] = {}
+    for page in flagged:
+        result = read_ocr_result(decoded.doc_id, page.page_index)
+        if result is not None:
+            results[page.page_index] = result
+    missing = [
+        page.page_index
+        for page in flagged
+        if page.page_index not in results or ocr_retry_due(results[page.page_index])
+    ]
+    queued = get_ocr_pool().schedule(decoded.doc_id, missing) if missing else set()
+
+    pages = []
+    for page in decoded.pages:
+        result = results.get(page.page_index)
+        if result is None or (result.get("status") == "failed" and page.page_index in queued):
+            if page.page_index in queued:
+                page = page.model_copy(update={"ocr_status": "pending"})
+            pages.append(page)
+            continue
+        try:
+            elements = [TextRunElement(**element) for element in result.get("elements", [])]
+        except ValidationError as exc:
+            logger.warning("OCR result invalid doc_id=%s page=%s error=%s", decoded.doc_id, page.page_index, exc)
+            pages.append(page)
+            continue
+        stats = page.stats.model_copy(update={"text_runs": page.stats.text_runs + len(elements)})
+        pages.append(
+            page.model_copy(
+                update={
+                    "elements": [*page.elements, *elements],
+                    "stats": stats,
+                    "ocr_status": result.get("status", "done"),
+                    "version": int(result.get("version", 1)),
+                }
+            )
+        )
+    return decoded.model_copy(update={"pages": pages})
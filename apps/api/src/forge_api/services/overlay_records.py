@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+from collections.abc import MutableMapping
+from typing import Any, Iterator
+
+_SCALARS = (str, int, float, bool, type(None))
+_ABSENT = object()
+
+
+class InternTable:
+    """Shares one instance between equal strings, flat number lists and flat dicts.
+
+    Decoded documents repeat the same text in elements, lines and spans, the same bbox on a
+    one-line element and its line, and the same style on every span set in one font. Interned
+    values are shared and must be treated as read-only; copy before changing one.
+    """
+
+    def __init__(self) -> None:
+        self._strings: dict[str, str] = {}
+        self._lists: dict[tuple[Any, ...], list[Any]] = {}
+        self._dicts: dict[tuple[tuple[str, Any, Any], ...], dict[str, Any]] = {}
+
+    def _value(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        if isinstance(value, list) and value and all(isinstance(item, (int, float)) for item in value):
+            # bool and int hash alike (True == 1); the types keep [True] and [1] apart.
+            return self._lists.setdefault(tuple((type(item), item) for item in value), value)
+        return value
+
+    def intern(self, value: dict[str, Any]) -> dict[str, Any]:
+        # Empty dicts are usually containers about to be filled, so they are never shared.
+        if not value or not all(isinstance(item, _SCALARS) for item in value.values()):
+            return value
+        key = tuple((name, type(item), item) for name, item in value.items())
+        return self._dicts.setdefault(key, value)
+
+    def object_pairs_hook(self, pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+        return self.intern({name: self._value(value) for name, value in pairs})
+
+
+def loads_interned(data: bytes | str, table: InternTable | None = None) -> Any:
+    """``json.loads`` with repeated strings, bboxes and styles shared through ``table``."""
+    table = table or InternTable()
+    return json.loads(data, object_pairs_hook=table.object_pairs_hook)
+
+
+class OverlayPrimitive(MutableMapping):
+    """One element's overlay state with a fixed key set in slots instead of a per-element dict.
+
+    ``style``/``base_style`` and ``bbox`` start out shared with the manifest element (or each other)
+    and are replaced, never mutated, by overlay ops. Reads and writes use the dict keys, so callers
+    treat it as a mapping; ``to_dict`` produces the serialized form.
+    """
+
+    __slots__ = (
+        "text",
+        "content_hash",
+        "bbox",
+        "style",
+        "element_type",
+        "base_text",
+        "base_style",
+        "path_commands",
+        "path_hint",
+        "resolved_element_id",
+    )
+    _BASE_KEYS = __slots__[:7]
+    # Only custom (non-manifest) elements carry these keys.
+    _CUSTOM_KEYS = __slots__[7:]
+
+    def __init__(
+        self,
+        text: str,
+        content_hash: str,
+        bbox: list[float],
+        style: dict[str, Any],
+        element_type: str,
+        base_text: str,
+        base_style: dict[str, Any],
+        path_commands: Any = _ABSENT,
+        path_hint: Any = _ABSENT,
+        resolved_element_id: Any = _ABSENT,
+    ) -> None:
+        self.text = text
+        self.content_hash = content_hash
+        self.bbox = bbox
+        self.style = style
+        self.element_type = element_type
+        self.base_text = base_text
+        self.base_style = base_style
+        self.path_commands = path_commands
+        self.path_hint = path_hint
+        self.resolved_element_id = resolved_element_id
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]) -> "OverlayPrimitive":
+        return cls(**{key: value for key, value in payload.items() if key in cls.__slots__})
+
+    def _keys(self) -> Iterator[str]:
+        yield from self._BASE_KEYS
+        for key in self._CUSTOM_KEYS:
+            if getattr(self, key) is not _ABSENT:
+                yield key
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self._CUSTOM_KEYS:
+            raise KeyError(key)
+        setattr(self, key, _ABSENT)
+
+    def __iter__(self) -> Iterator[str]:
+        return self._keys()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._keys())
+
+    def __repr__(self) -> str:
+        return f"OverlayPrimitive({self.to_dict()!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {key: getattr(self, key) for key in self._keys()}
+
+
+def overlay_json_default(value: Any) -> Any:
+    """``json.dumps`` fallback that serializes overlay primitives."""
+    if isinstance(value, OverlayPrimitive):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def overlay_page_from_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    """Turn a stored page entry's primitive dicts back into ``OverlayPrimitive`` records."""
+    primitives = payload.get("primitives") or {}
+    payload["primitives"] = {
+        element_id: OverlayPrimitive.from_dict(entry) for element_id, entry in primitives.items()
+    }
+    return payload
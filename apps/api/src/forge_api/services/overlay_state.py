@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Callable, Iterable
+from uuid import uuid4
+
+from forge_api.services.forge_overlay import (
+    add_custom_primitive,
+    apply_overlay_op,
+    build_overlay_state,
+    load_overlay_custom_entries,
+    load_overlay_custom_routes,
+    load_overlay_patchsets_since,
+    load_overlay_version,
+)
+from forge_api.services.overlay_records import (
+    InternTable,
+    loads_interned,
+    overlay_json_default,
+    overlay_page_from_payload,
+)
+from forge_api.services.storage import PreconditionFailed, get_patch_storage
+from forge_api.settings import get_settings
+
+_SNAPSHOT_LOOKBACK = 2
+# Manifest element IDs name their page: "p<page>_e<block>".
+_MANIFEST_ELEMENT_ID = re.compile(r"p(\d+)_e\d+")
+
+
+class _StaleState(Exception):
+    pass
+
+
+def _state_head_key(doc_id: str) -> str:
+    return f"docs/{doc_id}/forge/overlay_state/head.json"
+
+
+def _state_page_key(doc_id: str, page_index: int, token: str) -> str:
+    # Every write goes to a fresh key, so a writer that loses the head swap never touches committed pages.
+    return f"docs/{doc_id}/forge/overlay_state/page_{page_index}.{token}.json"
+
+
+def _snapshot_key(doc_id: str, overlay_version: int) -> str:
+    return f"docs/{doc_id}/forge/overlay_state/snapshots/{overlay_version:08d}.json"
+
+
+def _latest_checkpoint(overlay_version: int) -> int:
+    interval = get_settings().FORGE_SNAPSHOT_INTERVAL
+    if interval <= 0:
+        return 0
+    return (overlay_version // interval) * interval
+
+
+def _entry_digest(entry: dict[str, Any]) -> str:
+    payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode(payload: Any) -> bytes:
+    encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=overlay_json_default)
+    return encoded.encode("utf-8")
+
+
+def _read_head(doc_id: str) -> tuple[dict[str, Any] | None, str | None]:
+    try:
+        data, version = get_patch_storage().get_bytes_versioned(_state_head_key(doc_id))
+    except FileNotFoundError:
+        return None, None
+    try:
+        return json.loads(data.decode("utf-8")), version
+    except ValueError:
+        return None, version
+
+
+def _read_page(
+    doc_id: str,
+    page_index: int,
+    token: str,
+    styles: InternTable | None = None,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """A stored page and the digests of the custom entries it was built with."""
+    key = _state_page_key(doc_id, page_index, token)
+    try:
+        payload = loads_interned(get_patch_storage().get_bytes(key), styles)
+    except (FileNotFoundError, ValueError) as exc:
+        raise _StaleState(key) from exc
+    if payload.get("token") != token or not isinstance(payload.get("custom_digests"), dict):
+        raise _StaleState(key)
+    return overlay_page_from_payload(payload["state"]), payload["custom_digests"]
+
+
+def _store_state(
+    doc_id: str,
+    manifest: dict[str, Any],
+    overlay_version: int,
+    pages: dict[int, dict[str, Any]],
+    page_digests: dict[int, dict[str, str]],
+    page_tokens: dict[str, str],
+    head_version: str | None,
+    previous_tokens: dict[str, str],
+) -> None:
+    """Write ``pages`` under new tokens, then swap the head to point at them.
+
+    ``previous_tokens`` are the page tokens of the head being replaced; their files are removed
+    once the swap succeeds, and ours are removed if it fails.
+    """
+    storage = get_patch_storage()
+    written: list[str] = []
+    for page_index, page_entry in pages.items():
+        token = uuid4().hex
+        key = _state_page_key(doc_id, page_index, token)
+        payload = {"token": token, "custom_digests": page_digests.get(page_index, {}), "state": page_entry}
+        storage.put_bytes(key, _encode(payload), content_type="application/json")
+        written.append(key)
+        page_tokens[str(page_index)] = token
+    # The head only points at pages; routing and custom digests live with the pages they concern.
+    head = {
+        "overlay_version": overlay_version,
+        "manifest_generated_at_iso": manifest.get("generated_at_iso"),
+        "page_tokens": page_tokens,
+    }
+    try:
+        storage.put_bytes_if_match(_state_head_key(doc_id), _encode(head), head_version, content_type="application/json")
+    except PreconditionFailed:
+        # Another writer materialized concurrently; its head wins and ours is just not cached.
+        for key in written:
+            storage.delete(key)
+        return
+    # Readers still holding the old head fail on the missing page and rebuild.
+    for page_index, token in previous_tokens.items():
+        if page_tokens.get(page_index) != token:
+            storage.delete(_state_page_key(doc_id, int(page_index), token))
+
+
+def _custom_entries_unchanged(stored: dict[str, str], custom_digests: dict[str, str]) -> bool:
+    # New custom entries apply incrementally; edited or removed ones change earlier replay.
+    return all(custom_digests.get(element_id) == digest for element_id, digest in stored.items())
+
+
+def _element_router(manifest: dict[str, Any], custom_routes: dict[str, int]) -> Callable[[str], int | None]:
+    """Page an op's element ID routes to, matching ``build_overlay_state`` without indexing every element.
+
+    Custom entries route to their stored page; manifest element IDs carry their page ("p3_e12").
+    """
+    manifest_pages: dict[str, int] | None = None
+
+    def _route(element_id: str) -> int | None:
+        nonlocal manifest_pages
+        page_index = custom_routes.get(element_id)
+        if page_index is not None:
+            return page_index
+        match = _MANIFEST_ELEMENT_ID.fullmatch(element_id)
+        if match is not None:
+            return int(match.group(1))
+        if manifest_pages is None:
+            # Any other ID is looked up in the manifest, indexed once per call on first need.
+            manifest_pages = {
+                element["element_id"]: int(page["page_index"])
+                for page in manifest.get("pages", [])
+                if page.get("page_index") is not None
+                for element in page.get("elements", [])
+                if element.get("element_id")
+            }
+        return manifest_pages.get(element_id)
+
+    return _route
+
+
+def _write_snapshot(
+    doc_id: str,
+    manifest: dict[str, Any],
+    overlay_version: int,
+    pages: dict[int, dict[str, Any]],
+    custom_digests: dict[str, str],
+) -> None:
+    snapshot = {
+        "overlay_version": overlay_version,
+        "manifest_generated_at_iso": manifest.get("generated_at_iso"),
+        "custom_digests": custom_digests,
+        "pages": {str(page_index): page_entry for page_index, page_entry in pages.items()},
+    }
+    storage = get_patch_storage()
+    storage.put_bytes(
+        _snapshot_key(doc_id, overlay_version),
+        _encode(snapshot),
+        content_type="application/json",
+    )
+    # Each snapshot holds the whole document; only the last _SNAPSHOT_LOOKBACK positions are read.
+    expired = overlay_version - _SNAPSHOT_LOOKBACK * get_settings().FORGE_SNAPSHOT_INTERVAL
+    if expired > 0:
+        storage.delete(_snapshot_key(doc_id, expired))
+
+
+def _load_snapshot(
+    doc_id: str,
+    manifest: dict[str, Any],
+    custom_digests: dict[str, str],
+    overlay_version: int,
+) -> dict[str, Any] | None:
+    """Newest checkpoint at or below ``overlay_version`` that still matches the manifest and custom entries."""
+    interval = get_settings().FORGE_SNAPSHOT_INTERVAL
+    position = _latest_checkpoint(overlay_version)
+    storage = get_patch_storage()
+    for _ in range(_SNAPSHOT_LOOKBACK):
+        if position <= 0:
+            break
+        try:
+            snapshot = loads_interned(storage.get_bytes(_snapshot_key(doc_id, position)))
+        except (FileNotFoundError, ValueError):
+            snapshot = None
+        if (
+            isinstance(snapshot, dict)
+            and snapshot.get("overlay_version") == position
+            and snapshot.get("manifest_generated_at_iso") == manifest.get("generated_at_iso")
+            and _custom_entries_unchanged(snapshot.get("custom_digests") or {}, custom_digests)
+        ):
+            return snapshot
+        position -= interval
+    return None
+
+
+def _replay(
+    doc_id: str,
+    from_version: int,
+    to_version: int,
+    route: Callable[[str], int | None],
+    page_for: Callable[[int], dict[str, Any] | None],
+    checkpoint: Callable[[int], None],
+) -> set[int]:
+    """Apply patchsets ``from_version + 1 .. to_version`` to the pages ``page_for`` returns.
+
+    ``checkpoint`` runs once the state reaches the newest snapshot position in that range.
+    Returns the pages that changed.
+    """
+    snapshot_at = _latest_checkpoint(to_version)
+    masks_by_page: dict[int, dict[str, dict[str, Any]]] = {}
+    dirty: set[int] = set()
+
+    def _flush_masks() -> None:
+        for page_index, masks in masks_by_page.items():
+            if masks:
+                page_for(page_index)["masks"] = list(masks.values())
+
+    version = from_version
+    for patchset in load_overlay_patchsets_since(doc_id, from_version):
+        if version >= to_version:
+            break
+        version += 1
+        for op in patchset.ops:
+            page_index = route(op.element_id)
+            if page_index is None:
+                continue
+            page_entry = page_for(page_index)
+            if page_entry is None:
+                continue
+            if page_index not in masks_by_page:
+                masks_by_page[page_index] = {mask["element_id"]: mask for mask in page_entry.get("masks", [])}
+            if apply_overlay_op(page_entry, masks_by_page[page_index], op):
+                dirty.add(page_index)
+        if version == snapshot_at:
+            _flush_masks()
+            checkpoint(version)
+    _flush_masks()
+    return dirty
+
+
+def _head_is_current(head: dict[str, Any] | None, manifest: dict[str, Any], overlay_version: int) -> bool:
+    if not isinstance(head, dict) or "page_tokens" not in head:
+        return False
+    if head.get("manifest_generated_at_iso") != manifest.get("generated_at_iso"):
+        return False
+    return 0 <= int(head.get("overlay_version", -1)) <= overlay_version
+
+
+def _digests_by_page(
+    custom_entries: dict[str, dict[str, Any]],
+    custom_digests: dict[str, str],
+) -> dict[int, dict[str, str]]:
+    by_page: dict[int, dict[str, str]] = {}
+    for element_id, entry in custom_entries.items():
+        if entry.get("page_index") is not None:
+            by_page.setdefault(int(entry["page_index"]), {})[element_id] = custom_digests[element_id]
+    return by_page
+
+
+def _rebuild(
+    doc_id: str,
+    manifest: dict[str, Any],
+    head_version: str | None,
+    previous_tokens: dict[str, str],
+    overlay_version: int,
+) -> dict[int, dict[str, Any]]:
+    custom_entries = load_overlay_custom_entries(doc_id)
+    custom_digests = {element_id: _entry_digest(entry) for element_id, entry in custom_entries.items()}
+    snapshot = _load_snapshot(doc_id, manifest, custom_digests, overlay_version)
+    if snapshot is not None:
+        overlay = {
+            int(page_index): overlay_page_from_payload(page_entry)
+            for page_index, page_entry in snapshot["pages"].items()
+        }
+        for element_id, entry in custom_entries.items():
+            if element_id not in snapshot["custom_digests"] and entry.get("page_index") is not None:
+                add_custom_primitive(overlay, {}, element_id, entry)
+        custom_routes = {
+            element_id: int(entry["page_index"])
+            for element_id, entry in custom_entries.items()
+            if entry.get("page_index") is not None
+        }
+        route = _element_router(manifest, custom_routes)
+        start = int(snapshot["overlay_version"])
+    else:
+        element_pages: dict[str, int] = {}
+        overlay = build_overlay_state(manifest, [], custom_entries, element_pages=element_pages)
+        route = element_pages.get
+        start = 0
+
+    def _checkpoint(version: int) -> None:
+        _write_snapshot(doc_id, manifest, version, overlay, custom_digests)
+
+    _replay(doc_id, start, overlay_version, route, overlay.get, _checkpoint)
+    _store_state(
+        doc_id,
+        manifest,
+        overlay_version,
+        overlay,
+        _digests_by_page(custom_entries, custom_digests),
+        {},
+        head_version,
+        previous_tokens,
+    )
+    return overlay
+
+
+def _advance(
+    doc_id: str,
+    manifest: dict[str, Any],
+    head: dict[str, Any],
+    head_version: str | None,
+    overlay_version: int,
+    wanted: list[int] | None,
+) -> dict[int, dict[str, Any]]:
+    """Bring the stored state up to ``overlay_version`` and return the ``wanted`` pages (all when ``None``).
+
+    Only the wanted pages and the pages the new patchsets touch are read, checked against their
+    custom entries and rewritten.
+    """
+    page_tokens: dict[str, str] = dict(head["page_tokens"])
+    styles = InternTable()
+    custom_routes = load_overlay_custom_routes(doc_id)
+    custom_pages = set(custom_routes.values())
+    loaded: dict[int, dict[str, Any]] = {}
+    digests: dict[int, dict[str, str]] = {}
+    dirty: set[int] = set()
+
+    def _page(page_index: int) -> dict[str, Any] | None:
+        if page_index not in loaded:
+            token = page_tokens.get(str(page_index))
+            if token is None:
+                return None
+            page_entry, stored = _read_page(doc_id, page_index, token, styles)
+            entries = load_overlay_custom_entries(doc_id, page_index) if page_index in custom_pages else {}
+            current = {element_id: _entry_digest(entry) for element_id, entry in entries.items()}
+            if not _custom_entries_unchanged(stored, current):
+                raise _StaleState(page_index)
+            for element_id, entry in entries.items():
+                if element_id not in stored:
+                    add_custom_primitive({page_index: page_entry}, {}, element_id, entry)
+                    dirty.add(page_index)
+            loaded[page_index] = page_entry
+            digests[page_index] = current
+        return loaded[page_index]
+
+    stored_version = int(head.get("overlay_version", 0))
+
+    def _checkpoint(version: int) -> None:
+        pages = {int(page_index): _page(int(page_index)) for page_index in page_tokens}
+        custom_digests = {element_id: digest for page in digests.values() for element_id, digest in page.items()}
+        _write_snapshot(doc_id, manifest, version, pages, custom_digests)
+
+    if stored_version < overlay_version:
+        dirty |= _replay(
+            doc_id, stored_version, overlay_version, _element_router(manifest, custom_routes), _page, _checkpoint
+        )
+    pages: dict[int, dict[str, Any]] = {}
+    for page_index in sorted(int(idx) for idx in page_tokens) if wanted is None else wanted:
+        page_entry = _page(page_index)
+        if page_entry is not None:
+            pages[page_index] = page_entry
+
+    if dirty or stored_version != overlay_version:
+        _store_state(
+            doc_id,
+            manifest,
+            overlay_version,
+            {page_index: loaded[page_index] for page_index in dirty},
+            digests,
+            page_tokens,
+            head_version,
+            dict(head["page_tokens"]),
+        )
+    return pages
+
+
+def load_overlay_pages(
+    doc_id: str,
+    manifest: dict[str, Any],
+    page_indexes: Iterable[int] | None = None,
+) -> tuple[dict[int, dict[str, Any]], int]:
+    """Materialized overlay state for the requested pages (all pages when ``None``) and its version.
+
+    Equivalent to ``build_overlay_state`` over the full patch log, but only patchsets committed
+    since the stored state are replayed, and only the requested pages and the pages those
+    patchsets touch are read or rewritten. When the stored state is unusable, the rebuild starts
+    from the newest matching snapshot.
+    """
+    overlay_version = load_overlay_version(doc_id)
+    head, head_version = _read_head(doc_id)
+    wanted = None if page_indexes is None else list(page_indexes)
+
+    if _head_is_current(head, manifest, overlay_version):
+        try:
+            return _advance(doc_id, manifest, head, head_version, overlay_version, wanted), overlay_version
+        except _StaleState:
+            pass
+
+    previous_tokens = head.get("page_tokens") if isinstance(head, dict) else None
+    overlay = _rebuild(
+        doc_id,
+        manifest,
+        head_version,
+        previous_tokens if isinstance(previous_tokens, dict) else {},
+        overlay_version,
+    )
+    if wanted is None:
+        return overlay, overlay_version
+    return {idx: overlay[idx] for idx in wanted if idx in overlay}, overlay_version
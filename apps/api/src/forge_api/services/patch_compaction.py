@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.schemas.patch import PatchDiffEntry, PatchOp, PatchReplaceText, PatchSetStyle, PatchsetRecord
+from forge_api.services.composite_ir import store_committed_composite
+from forge_api.services.font_inventory import get_font_inventory
+from forge_api.services.ir_pdf import get_base_ir_page
+from forge_api.services.patch_store import (
+    build_patchset_record,
+    load_patch_log,
+    store_patch_archive,
+    update_patch_log,
+)
+from forge_api.services.redecode import get_redecode_scheduler
+from forge_api.settings import get_settings
+
+logger = logging.getLogger("forge_api.patch_compaction")
+
+_STYLE_FIELDS = ("stroke_color", "stroke_width_pt", "fill_color", "opacity")
+
+
+class _LogChanged(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CompactionResult:
+    compacted_patchsets: int
+    remaining_patchsets: int
+    archive_id: str | None = None
+    unchanged_pages: list[int] = field(default_factory=list)
+
+
+def squash_ops(ops: list[PatchOp]) -> list[PatchOp]:
+    """Last-writer-wins per target: the final replace_text, and one set_style merging every field."""
+    texts: dict[str, PatchReplaceText] = {}
+    styles: dict[str, dict[str, object]] = {}
+    order: dict[tuple[str, str], int] = {}
+    for position, op in enumerate(ops):
+        order[(op.op, op.target_id)] = position
+        if op.op == "replace_text":
+            texts[op.target_id] = op
+        else:
+            merged = styles.setdefault(op.target_id, {})
+            for name in _STYLE_FIELDS:
+                value = getattr(op, name)
+                if value is not None:
+                    merged[name] = value
+
+    squashed: list[PatchOp] = []
+    for op_kind, target_id in sorted(order, key=order.__getitem__):
+        if op_kind == "replace_text":
+            squashed.append(texts[target_id])
+        else:
+            squashed.append(PatchSetStyle(op="set_style", target_id=target_id, **styles[target_id]))
+    return squashed
+
+
+def _merged_diff(records: list[PatchsetRecord]) -> list[PatchDiffEntry]:
+    merged: dict[str, PatchDiffEntry] = {}
+    for record in records:
+        for entry in record.diff_summary:
+            current = merged.get(entry.target_id)
+            if current is None:
+                merged[entry.target_id] = entry.model_copy(update={"changed_fields": list(entry.changed_fields)})
+                continue
+            current.changed_fields.extend(name for name in entry.changed_fields if name not in current.changed_fields)
+            current.geometry_changed = current.geometry_changed or entry.geometry_changed
+    return list(merged.values())
+
+
+def compact_patch_log(doc_id: str, keep_tail: int | None = None) -> CompactionResult:
+    """Squash superseded ops in all but the newest ``keep_tail`` patchsets into one record per page.
+
+    A page is only squashed when replaying the squashed ops reproduces its composite exactly;
+    replace_text fitting depends on earlier edits, so some pages keep their original records.
+    The replaced records go to an archive that revert_last restores from, and every prefix
+    record is stamped with its ``archive_id`` whether or not its page squashed.
+    """
+    if keep_tail is None:
+        keep_tail = get_settings().FORGE_PATCH_COMPACT_KEEP_TAIL
+    patchsets = load_patch_log(doc_id)
+    prefix = patchsets[: max(0, len(patchsets) - max(0, keep_tail))]
+    if len(prefix) < 2:
+        return CompactionResult(compacted_patchsets=0, remaining_patchsets=len(patchsets))
+
+    by_page: dict[int, list[PatchsetRecord]] = {}
+    for record in prefix:
+        by_page.setdefault(record.page_index, []).append(record)
+    tail_pages = {record.page_index for record in patchsets[len(prefix):]}
+
+    replacements: dict[int, PatchsetRecord] = {}
+    composites = {}
+    unchanged_pages: list[int] = []
+    for page_index, records in by_page.items():
+        ops = [op for record in records for op in record.ops]
+        squashed = squash_ops(ops)
+        if len(records) < 2 and len(squashed) == len(ops):
+            unchanged_pages.append(page_index)
+            continue
+        base_page = get_base_ir_page(doc_id, page_index)
+        fonts = get_font_inventory(doc_id)
+        replayed, _ = apply_ops_to_page(base_page, ops, fonts)
+        compacted, results = apply_ops_to_page(base_page, squashed, fonts)
+        if compacted.model_dump() != replayed.model_dump():
+            unchanged_pages.append(page_index)
+            continue
+        replacements[page_index] = build_patchset_record(
+            squashed,
+            page_index,
+            f"Compacted {len(records)} patchsets",
+            sorted({op.target_id for op in squashed}),
+            _merged_diff(records),
+            results,
+        )
+        composites[page_index] = compacted
+
+    # The prefix is stamped even when nothing squashed, so it stops counting towards the
+    # threshold and later commits do not queue the same replays again.
+    archive_id = store_patch_archive(doc_id, prefix)
+    compacted_prefix: list[PatchsetRecord] = []
+    placed: set[int] = set()
+    for record in prefix:
+        # A squashed page's record takes the place of its first original; other records keep their order.
+        if record.page_index in replacements:
+            if record.page_index in placed:
+                continue
+            placed.add(record.page_index)
+            record = replacements[record.page_index]
+        compacted_prefix.append(record.model_copy(update={"archive_id": archive_id}))
+    prefix_ids = [record.patchset_id for record in prefix]
+
+    def _swap(current: list[PatchsetRecord]) -> list[PatchsetRecord]:
+        # Commits may have been appended since the read; a revert into the prefix aborts the run.
+        if [record.patchset_id for record in current[: len(prefix_ids)]] != prefix_ids:
+            raise _LogChanged(doc_id)
+        return [*compacted_prefix, *current[len(prefix_ids):]]
+
+    try:
+        updated = update_patch_log(doc_id, _swap)
+    except _LogChanged:
+        logger.info("Patch log changed during compaction doc_id=%s", doc_id)
+        return CompactionResult(compacted_patchsets=0, remaining_patchsets=len(load_patch_log(doc_id)))
+
+    compacted_by_page = {record.page_index: record for record in compacted_prefix if record.page_index in replacements}
+    for page_index, page in composites.items():
+        # Pages with newer commits get their composite rebuilt from the compacted record on next read.
+        if page_index not in tail_pages:
+            store_committed_composite(doc_id, page_index, [compacted_by_page[page_index]], page)
+    compacted_count = len(prefix) if replacements else 0
+    logger.info(
+        "Compacted patch log doc_id=%s patchsets=%s remaining=%s archive_id=%s",
+        doc_id,
+        compacted_count,
+        len(updated),
+        archive_id,
+    )
+    return CompactionResult(
+        compacted_patchsets=compacted_count,
+        remaining_patchsets=len(updated),
+        archive_id=archive_id,
+        unchanged_pages=unchanged_pages,
+    )
+
+
+def maybe_schedule_compaction(doc_id: str, patchsets: list[PatchsetRecord]) -> bool:
+    """Queue a background compaction once one page holds ``FORGE_PATCH_COMPACT_THRESHOLD`` uncompacted patchsets.
+
+    The threshold is per page because composite replay is; commits only read their own page's records.
+    """
+    threshold = get_settings().FORGE_PATCH_COMPACT_THRESHOLD
+    uncompacted = sum(1 for record in patchsets if record.archive_id is None)
+    if threshold <= 0 or uncompacted < threshold:
+        return False
+    return get_redecode_scheduler().request(f"compact:{doc_id}", lambda: compact_patch_log(doc_id))
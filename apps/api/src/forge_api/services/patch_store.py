@@ -1,35 +1,125 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
 from uuid import uuid4
 
 from forge_api.schemas.patch import PatchDiffEntry, PatchOpResult, PatchsetRecord
-from forge_api.services.storage import get_patch_storage
+from forge_api.services.patch_store_sqlite import PatchPagesChanged, SQLitePatchStore, stale_pages
+from forge_api.services.storage import compare_and_swap, get_patch_storage
+from forge_api.settings import get_settings
+
+
+class PatchCursorNotFound(LookupError):
+    """The patchset a cursor points at was reverted or compacted out of the log."""
+
+
+@dataclass(frozen=True)
+class PatchLogPage:
+    patchsets: list[PatchsetRecord]
+    version: int
+    has_more: bool
 
 
 def _patch_log_key(doc_id: str) -> str:
     return f"documents/{doc_id}/patches.json"
 
 
-def load_patch_log(doc_id: str) -> list[PatchsetRecord]:
+def _sqlite_store() -> SQLitePatchStore | None:
+    settings = get_settings()
+    if (settings.FORGE_PATCH_STORE_DRIVER or "").lower() != "sqlite":
+        return None
+    path = settings.FORGE_PATCH_STORE_SQLITE_PATH or str(Path(settings.FORGE_STORAGE_LOCAL_DIR) / "patches.sqlite3")
+    return SQLitePatchStore(Path(path))
+
+
+def _parse_patch_log_state(data: bytes | None) -> tuple[list[PatchsetRecord], int]:
+    """Records and revision of a stored log; archives and older logs are bare record lists."""
+    if data is None:
+        return [], 0
+    payload = json.loads(data.decode("utf-8"))
+    if isinstance(payload, list):
+        # Logs written before revisions were tracked start from their length.
+        return [PatchsetRecord.model_validate(item) for item in payload], len(payload)
+    return [PatchsetRecord.model_validate(item) for item in payload["patchsets"]], payload["version"]
+
+
+def _parse_patch_log(data: bytes | None) -> list[PatchsetRecord]:
+    return _parse_patch_log_state(data)[0]
+
+
+def _serialize_patch_log(patchsets: list[PatchsetRecord]) -> bytes:
+    payload = [record.model_dump(mode="json") for record in patchsets]
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _serialize_patch_log_state(patchsets: list[PatchsetRecord], version: int) -> bytes:
+    payload = {"patchsets": [record.model_dump(mode="json") for record in patchsets], "version": version}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _load_patch_log_state(doc_id: str) -> tuple[list[PatchsetRecord], int]:
     storage = get_patch_storage()
     key = _patch_log_key(doc_id)
     if not storage.exists(key):
-        return []
-    payload = json.loads(storage.get_bytes(key).decode("utf-8"))
-    return [PatchsetRecord.model_validate(item) for item in payload]
+        return [], 0
+    return _parse_patch_log_state(storage.get_bytes(key))
+
+
+def load_patch_log(doc_id: str) -> list[PatchsetRecord]:
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        return sqlite_store.load(doc_id)
+    return _load_patch_log_state(doc_id)[0]
+
+
+def load_patch_log_page(doc_id: str, after: str | None = None, limit: int | None = None) -> PatchLogPage:
+    """Up to ``limit`` patchsets committed after ``after`` (from the start when ``None``).
+
+    ``version`` is the log revision at read time. It goes up on every append, revert and
+    compaction, so unlike the log length it never repeats after a revert.
+    """
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        found = sqlite_store.load_after(doc_id, after, limit)
+        if found is None:
+            raise PatchCursorNotFound(after)
+        patchsets, version, has_more = found
+        return PatchLogPage(patchsets=patchsets, version=version, has_more=has_more)
+    patchsets, version = _load_patch_log_state(doc_id)
+    start = 0
+    if after is not None:
+        start = next((idx + 1 for idx, record in enumerate(patchsets) if record.patchset_id == after), -1)
+        if start < 0:
+            raise PatchCursorNotFound(after)
+    end = len(patchsets) if limit is None else min(len(patchsets), start + limit)
+    return PatchLogPage(patchsets=patchsets[start:end], version=version, has_more=end < len(patchsets))
+
+
+def load_page_patchsets(doc_id: str, page_index: int) -> list[PatchsetRecord]:
+    """Patchsets committed against one page, in commit order."""
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        return sqlite_store.load_page(doc_id, page_index)
+    return [record for record in load_patch_log(doc_id) if record.page_index == page_index]
 
 
 def save_patch_log(doc_id: str, patchsets: list[PatchsetRecord]) -> None:
-    storage = get_patch_storage()
-    key = _patch_log_key(doc_id)
-    payload = [record.model_dump(mode="json") for record in patchsets]
-    storage.put_bytes(key, json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        sqlite_store.replace(doc_id, patchsets)
+        return
+    compare_and_swap(
+        get_patch_storage(),
+        _patch_log_key(doc_id),
+        lambda current: _serialize_patch_log_state(patchsets, _parse_patch_log_state(current)[1] + 1),
+    )
 
 
-def append_patchset(
-    doc_id: str,
+def build_patchset_record(
     ops,
     page_index: int,
     rationale_short: str | None,
@@ -38,8 +128,7 @@ def append_patchset(
     results: list[PatchOpResult],
     warnings: list[str] | None = None,
 ) -> PatchsetRecord:
-    patchsets = load_patch_log(doc_id)
-    record = PatchsetRecord(
+    return PatchsetRecord(
         patchset_id=str(uuid4()),
         created_at_iso=datetime.now(timezone.utc),
         ops=ops,
@@ -50,14 +139,132 @@ def append_patchset(
         results=results,
         warnings=warnings or [],
     )
-    patchsets.append(record)
-    save_patch_log(doc_id, patchsets)
+
+
+def append_patchset_records(
+    doc_id: str,
+    records: list[PatchsetRecord],
+    expected: dict[int, list[str]] | None = None,
+) -> int:
+    """Append ``records`` to the log in one atomic write; readers see all of them or none.
+
+    ``expected`` maps page indexes to the patchset ids the records were validated against. The
+    check runs inside the atomic write and raises ``PatchPagesChanged`` when any page moved on.
+    Returns the log revision after the append.
+    """
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        return sqlite_store.append_many(doc_id, records, expected)
+    if not records:
+        return _load_patch_log_state(doc_id)[1]
+    version = 0
+
+    def _append(current: bytes | None) -> bytes:
+        nonlocal version
+        patchsets, version = _parse_patch_log_state(current)
+        stale = stale_pages(
+            expected,
+            lambda page_index: [record.patchset_id for record in patchsets if record.page_index == page_index],
+        )
+        if stale:
+            raise PatchPagesChanged(doc_id, stale)
+        version += 1
+        return _serialize_patch_log_state([*patchsets, *records], version)
+
+    compare_and_swap(get_patch_storage(), _patch_log_key(doc_id), _append)
+    return version
+
+
+def append_patchset(
+    doc_id: str,
+    ops,
+    page_index: int,
+    rationale_short: str | None,
+    selected_ids: list[str] | None,
+    diff_summary: list[PatchDiffEntry],
+    results: list[PatchOpResult],
+    warnings: list[str] | None = None,
+) -> PatchsetRecord:
+    record = build_patchset_record(
+        ops, page_index, rationale_short, selected_ids, diff_summary, results, warnings
+    )
+    append_patchset_records(doc_id, [record])
     return record
 
 
-def revert_last_patchset(doc_id: str) -> list[PatchsetRecord]:
-    patchsets = load_patch_log(doc_id)
-    if patchsets:
-        patchsets.pop()
-        save_patch_log(doc_id, patchsets)
-    return patchsets
+def update_patch_log(
+    doc_id: str,
+    update: Callable[[list[PatchsetRecord]], list[PatchsetRecord]],
+) -> list[PatchsetRecord]:
+    """Atomically replace the log with ``update(current)``; ``update`` may run more than once."""
+    return _update_patch_log(doc_id, update).patchsets
+
+
+def _update_patch_log(
+    doc_id: str,
+    update: Callable[[list[PatchsetRecord]], list[PatchsetRecord]],
+) -> PatchLogPage:
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        patchsets, version = sqlite_store.update(doc_id, update)
+        return PatchLogPage(patchsets=patchsets, version=version, has_more=False)
+    updated: list[PatchsetRecord] = []
+    version = 0
+
+    def _apply(current: bytes | None) -> bytes:
+        nonlocal version
+        patchsets, version = _parse_patch_log_state(current)
+        version += 1
+        updated[:] = update(patchsets)
+        return _serialize_patch_log_state(updated, version)
+
+    compare_and_swap(get_patch_storage(), _patch_log_key(doc_id), _apply)
+    return PatchLogPage(patchsets=updated, version=version, has_more=False)
+
+
+def _patch_archive_key(doc_id: str, archive_id: str) -> str:
+    return f"documents/{doc_id}/patch_archive/{archive_id}.json"
+
+
+def store_patch_archive(doc_id: str, patchsets: list[PatchsetRecord]) -> str:
+    archive_id = uuid4().hex
+    get_patch_storage().put_bytes_if_match(
+        _patch_archive_key(doc_id, archive_id),
+        _serialize_patch_log(patchsets),
+        None,
+        content_type="application/json",
+    )
+    return archive_id
+
+
+def load_patch_archive(doc_id: str, archive_id: str) -> list[PatchsetRecord]:
+    """Original patchsets replaced by one compaction run, in commit order."""
+    return _parse_patch_log(get_patch_storage().get_bytes(_patch_archive_key(doc_id, archive_id)))
+
+
+def expand_compacted(doc_id: str, patchsets: list[PatchsetRecord]) -> list[PatchsetRecord]:
+    """Swap the compacted records of the newest compaction run back for their archived originals."""
+    archive_id = patchsets[-1].archive_id if patchsets else None
+    if archive_id is None:
+        return patchsets
+    # A run's records always form a prefix of the log.
+    count = 0
+    while count < len(patchsets) and patchsets[count].archive_id == archive_id:
+        count += 1
+    return [*load_patch_archive(doc_id, archive_id), *patchsets[count:]]
+
+
+def revert_last_patchset(doc_id: str) -> PatchLogPage:
+    """Drop the newest patchset; returns the remaining log and its revision."""
+    def _revert(patchsets: list[PatchsetRecord]) -> list[PatchsetRecord]:
+        # Undo reaches into compacted history by restoring the originals first.
+        while patchsets and patchsets[-1].archive_id is not None:
+            patchsets = expand_compacted(doc_id, patchsets)
+        return patchsets[:-1]
+
+    sqlite_store = _sqlite_store()
+    if sqlite_store is not None:
+        version = sqlite_store.revert_last(doc_id)
+        if version is not None:
+            return PatchLogPage(patchsets=sqlite_store.load(doc_id), version=version, has_more=False)
+    return _update_patch_log(doc_id, _revert)
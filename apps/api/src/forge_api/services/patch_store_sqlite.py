@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Iterator
+
+from forge_api.schemas.patch import PatchsetRecord
+from forge_api.services.storage import PreconditionFailed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patchsets (
+    doc_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    page_index INTEGER NOT NULL,
+    patchset_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (doc_id, seq)
+);
+CREATE INDEX IF NOT EXISTS patchsets_by_page ON patchsets (doc_id, page_index, seq);
+CREATE INDEX IF NOT EXISTS patchsets_by_id ON patchsets (doc_id, patchset_id);
+CREATE TABLE IF NOT EXISTS patch_log_versions (
+    doc_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+class PatchPagesChanged(PreconditionFailed):
+    """Pages a commit was validated against gained or lost patchsets before it could append."""
+
+    def __init__(self, doc_id: str, page_indexes: list[int]) -> None:
+        super().__init__(f"{doc_id} pages {page_indexes}")
+        self.page_indexes = page_indexes
+
+
+def stale_pages(
+    expected: dict[int, list[str]] | None,
+    current: Callable[[int], list[str]],
+) -> list[int]:
+    """Pages in ``expected`` whose patchset ids no longer match ``current``."""
+    return sorted(
+        page_index for page_index, patchset_ids in (expected or {}).items() if current(page_index) != patchset_ids
+    )
+
+
+_initialized: set[Path] = set()
+_init_lock = Lock()
+
+
+@dataclass
+class SQLitePatchStore:
+    """IR patch log in an embedded SQLite database, one row per patchset.
+
+    Rows are keyed by (doc_id, seq) and indexed by (doc_id, page_index, seq), so
+    per-page reads, appends and reverts touch only the rows they need. Every write also
+    bumps the document's revision in ``patch_log_versions`` inside the same transaction.
+    """
+
+    path: Path
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        path = self.path.resolve()
+        with _init_lock:
+            if path not in _initialized:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(path)
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                finally:
+                    conn.close()
+                _initialized.add(path)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front so seq allocation cannot race.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _records(rows: list[tuple[str]]) -> list[PatchsetRecord]:
+        return [PatchsetRecord.model_validate_json(payload) for (payload,) in rows]
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection, doc_id: str) -> int:
+        row = conn.execute("SELECT version FROM patch_log_versions WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is not None:
+            return row[0]
+        # Logs written before revisions were tracked start from their row count.
+        (count,) = conn.execute("SELECT COUNT(*) FROM patchsets WHERE doc_id = ?", (doc_id,)).fetchone()
+        return count
+
+    def _bump_version(self, conn: sqlite3.Connection, doc_id: str) -> int:
+        """Advance the revision; call before changing rows so legacy logs seed from their old count."""
+        version = self._version(conn, doc_id) + 1
+        conn.execute(
+            "INSERT INTO patch_log_versions (doc_id, version) VALUES (?, ?) "
+            "ON CONFLICT(doc_id) DO UPDATE SET version = excluded.version",
+            (doc_id, version),
+        )
+        return version
+
+    def load(self, doc_id: str) -> list[PatchsetRecord]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM patchsets WHERE doc_id = ? ORDER BY seq",
+                (doc_id,),
+            ).fetchall()
+        return self._records(rows)
+
+    def load_page(self, doc_id: str, page_index: int) -> list[PatchsetRecord]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM patchsets WHERE doc_id = ? AND page_index = ? ORDER BY seq",
+                (doc_id, page_index),
+            ).fetchall()
+        return self._records(rows)
+
+    def load_after(
+        self,
+        doc_id: str,
+        after: str | None,
+        limit: int | None,
+    ) -> tuple[list[PatchsetRecord], int, bool] | None:
+        """Rows following patchset ``after``, the log revision and whether more remain; ``None`` if ``after`` is gone."""
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            try:
+                start = -1
+                if after is not None:
+                    row = conn.execute(
+                        "SELECT seq FROM patchsets WHERE doc_id = ? AND patchset_id = ?",
+                        (doc_id, after),
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    start = row[0]
+                rows = conn.execute(
+                    "SELECT payload FROM patchsets WHERE doc_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (doc_id, start, -1 if limit is None else limit + 1),
+                ).fetchall()
+                version = self._version(conn, doc_id)
+            finally:
+                conn.execute("COMMIT")
+        has_more = limit is not None and len(rows) > limit
+        return self._records(rows[:limit] if has_more else rows), version, has_more
+
+    def append(self, doc_id: str, record: PatchsetRecord) -> int:
+        return self.append_many(doc_id, [record])
+
+    def append_many(
+        self,
+        doc_id: str,
+        records: list[PatchsetRecord],
+        expected: dict[int, list[str]] | None = None,
+    ) -> int:
+        """Append ``records`` after the document's last row; returns the new revision.
+
+        ``expected`` maps page indexes to the patchset ids the caller validated against; the append
+        raises ``PatchPagesChanged`` naming every page that changed since, appending nothing.
+        """
+        with self._transaction() as conn:
+
+            def _page_ids(page_index: int) -> list[str]:
+                rows = conn.execute(
+                    "SELECT patchset_id FROM patchsets WHERE doc_id = ? AND page_index = ? ORDER BY seq",
+                    (doc_id, page_index),
+                ).fetchall()
+                return [patchset_id for (patchset_id,) in rows]
+
+            stale = stale_pages(expected, _page_ids)
+            if stale:
+                raise PatchPagesChanged(doc_id, stale)
+            version = self._bump_version(conn, doc_id)
+            (seq,) = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM patchsets WHERE doc_id = ?",
+                (doc_id,),
+            ).fetchone()
+            conn.executemany(
+                "INSERT INTO patchsets (doc_id, seq, page_index, patchset_id, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (doc_id, seq + offset, record.page_index, record.patchset_id, record.model_dump_json())
+                    for offset, record in enumerate(records)
+                ],
+            )
+        return version
+
+    def revert_last(self, doc_id: str) -> int | None:
+        """Delete the document's newest row and return the new revision.
+
+        ``None``, with nothing deleted, when that row came from a compaction run.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT seq, payload FROM patchsets WHERE doc_id = ? ORDER BY seq DESC LIMIT 1",
+                (doc_id,),
+            ).fetchone()
+            if row is not None:
+                if PatchsetRecord.model_validate_json(row[1]).archive_id is not None:
+                    return None
+                version = self._bump_version(conn, doc_id)
+                conn.execute("DELETE FROM patchsets WHERE doc_id = ? AND seq = ?", (doc_id, row[0]))
+            else:
+                version = self._version(conn, doc_id)
+        return version
+
+    def replace(self, doc_id: str, records: list[PatchsetRecord]) -> None:
+        with self._transaction() as conn:
+            self._bump_version(conn, doc_id)
+            conn.execute("DELETE FROM patchsets WHERE doc_id = ?", (doc_id,))
+            conn.executemany(
+                "INSERT INTO patchsets (doc_id, seq, page_index, patchset_id, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (doc_id, seq, record.page_index, record.patchset_id, record.model_dump_json())
+                    for seq, record in enumerate(records)
+                ],
+            )
+
+    def update(
+        self,
+        doc_id: str,
+        update: Callable[[list[PatchsetRecord]], list[PatchsetRecord]],
+    ) -> tuple[list[PatchsetRecord], int]:
+        """Rewrite the document's log as ``update(current)`` inside one write transaction.
+
+        Returns the new records and revision.
+        """
+        with self._transaction() as conn:
+            version = self._bump_version(conn, doc_id)
+            rows = conn.execute(
+                "SELECT payload FROM patchsets WHERE doc_id = ? ORDER BY seq",
+                (doc_id,),
+            ).fetchall()
+            records = update(self._records(rows))
+            conn.execute("DELETE FROM patchsets WHERE doc_id = ?", (doc_id,))
+            conn.executemany(
+                "INSERT INTO patchsets (doc_id, seq, page_index, patchset_id, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (doc_id, seq, record.page_index, record.patchset_id, record.model_dump_json())
+                    for seq, record in enumerate(records)
+                ],
+            )
+        return records, version
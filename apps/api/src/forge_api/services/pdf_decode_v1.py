@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import logging
+import re
+from dataclasses import dataclass
 from typing import Any, Iterable
 
 import fitz
 
+from forge_api.core.artifact_versions import DECODED_VERSION
+from forge_api.core.ir.fingerprint import LayerCache, PageFingerprint, fingerprint_page, page_drawings
 from forge_api.schemas.decoded import (
+    DecodeProfile,
     DecodedDocument,
     DecodedPage,
     DecodedStats,
@@ -17,6 +22,30 @@ from forge_api.services.decoded_hash import stable_content_hash, stable_element_
 
 logger = logging.getLogger(__name__)
 
+_IMAGE_RECTS_NAMESPACE = f"image-rects.v{DECODED_VERSION}"
+# Path painting operators (S s f F f* B B* b b*) standing as their own content-stream token.
+_PATH_PAINT_RE = re.compile(rb"(?<!\S)(?:[fBb]\*?|[SsF])(?!\S)")
+
+
+@dataclass(frozen=True)
+class DecodeStages:
+    text: bool
+    vectors: bool
+    images: bool
+
+
+DECODE_PROFILES: dict[str, DecodeStages] = {
+    "text": DecodeStages(text=True, vectors=False, images=False),
+    "text_vector": DecodeStages(text=True, vectors=True, images=False),
+    "full": DecodeStages(text=True, vectors=True, images=True),
+}
+
+PROFILE_ELEMENT_KINDS: dict[str, set[str]] = {
+    "text": {"text_run"},
+    "text_vector": {"text_run", "path"},
+    "full": {"text_run", "path", "image", "unknown"},
+}
+
 
 def _color_int_to_hex(color: int | None) -> str | None:
     if color is None:
@@ -143,7 +172,83 @@ def _path_hint_from_commands(commands: list[dict[str, Any]], limit: int = 3) ->
     return " ".join(parts) if parts else None
 
 
-def decode_pdf_to_decoded_document(doc_id: str, pdf_bytes: bytes) -> DecodedDocument:
+def _page_paints_paths(page: fitz.Page) -> bool:
+    """Whether the page or its form XObjects paint a path, scanned from the raw operators.
+
+    Much cheaper than ``get_drawings`` and independent of the decode profile, so every profile
+    derives the same OCR fallback signal.
+    """
+    if _PATH_PAINT_RE.search(page.read_contents()):
+        return True
+    return any(_PATH_PAINT_RE.search(page.parent.xref_stream(xref) or b"") for xref, *_ in page.get_xobjects())
+
+
+def _page_image_rects(
+    page: fitz.Page,
+    layer_cache: LayerCache | None,
+    fingerprint: PageFingerprint | None,
+) -> list[tuple[str | None, fitz.Rect]]:
+    if fingerprint is not None:
+        cached = layer_cache.get(_IMAGE_RECTS_NAMESPACE, fingerprint.static_hash)
+        if cached is not None:
+            return [(item["name"], fitz.Rect(item["rect"])) for item in cached]
+    placements: list[tuple[str | None, fitz.Rect]] = []
+    for image in page.get_images(full=True):
+        xref = image[0]
+        name = image[7] if len(image) > 7 else None
+        for rect in page.get_image_rects(xref):
+            placements.append((name, rect))
+    if fingerprint is not None:
+        layer_cache.put(
+            _IMAGE_RECTS_NAMESPACE,
+            fingerprint.static_hash,
+            [{"name": name, "rect": [rect.x0, rect.y0, rect.x1, rect.y1]} for name, rect in placements],
+        )
+    return placements
+
+
+def build_text_run_element(
+    doc_id: str,
+    page_index: int,
+    text: str,
+    bbox: Iterable[float],
+    width_pt: float,
+    height_pt: float,
+    font_name: str | None = None,
+    font_size_pt: float | None = None,
+    color: str | None = None,
+    source: str = "pdf",
+) -> TextRunElement:
+    bbox_norm = _normalize_bbox(bbox, width_pt, height_pt)
+    payload_core = {
+        "text": text,
+        "font_name": font_name,
+        "font_size_pt": font_size_pt,
+        "color": color,
+    }
+    return TextRunElement(
+        id=stable_element_id(doc_id, page_index, "text_run", bbox_norm, payload_core),
+        kind="text_run",
+        bbox_norm=bbox_norm,
+        source=source,
+        content_hash=stable_content_hash("text_run", bbox_norm, payload_core),
+        text=text,
+        font_name=font_name,
+        pdf_font_name=font_name if font_name else None,
+        font_size_pt=font_size_pt,
+        color=color,
+        rotation_deg=None,
+        render_mode=None,
+    )
+
+
+def decode_pdf_to_decoded_document(
+    doc_id: str,
+    pdf_bytes: bytes,
+    layer_cache: LayerCache | None = None,
+    profile: DecodeProfile = "full",
+) -> DecodedDocument:
+    stages = DECODE_PROFILES[profile]
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     pages: list[DecodedPage] = []
     warnings: list[str] = []
@@ -155,112 +260,95 @@ def decode_pdf_to_decoded_document(doc_id: str, pdf_bytes: bytes) -> DecodedDocu
             width_pt = float(page.rect.width)
             height_pt = float(page.rect.height)
             stats = DecodedStats(text_runs=0, paths=0, images=0, unknown=0)
+            fingerprint = (
+                fingerprint_page(page)
+                if layer_cache is not None and (stages.vectors or stages.images)
+                else None
+            )
             elements: list[Any] = []
 
-            text_dict = page.get_text("dict")
-            for block in text_dict.get("blocks", []):
-                if block.get("type") != 0:
-                    continue
-                for line in block.get("lines", []):
-                    for span in line.get("spans", []):
-                        text = span.get("text", "")
-                        if not text or text.isspace():
-                            continue
-                        bbox_norm = _normalize_bbox(span.get("bbox", [0, 0, 0, 0]), width_pt, height_pt)
-                        font_name = span.get("font")
-                        pdf_font_name = font_name if font_name else None
-                        font_size_pt = float(span.get("size")) if span.get("size") is not None else None
-                        color = _color_int_to_hex(span.get("color"))
-                        payload_core = {
-                            "text": text,
-                            "font_name": font_name,
-                            "font_size_pt": font_size_pt,
-                            "color": color,
-                        }
-                        element_id = stable_element_id(
-                            doc_id,
-                            page_index,
-                            "text_run",
-                            bbox_norm,
-                            payload_core,
-                        )
-                        content_hash = stable_content_hash("text_run", bbox_norm, payload_core)
-                        elements.append(
-                            TextRunElement(
-                                id=element_id,
-                                kind="text_run",
-                                bbox_norm=bbox_norm,
-                                source="pdf",
-                                content_hash=content_hash,
-                                text=text,
-                                font_name=font_name,
-                                pdf_font_name=pdf_font_name,
-                                font_size_pt=font_size_pt,
-                                color=color,
-                                rotation_deg=None,
-                                render_mode=None,
+            if stages.text:
+                text_dict = page.get_text("dict")
+                for block in text_dict.get("blocks", []):
+                    if block.get("type") != 0:
+                        continue
+                    for line in block.get("lines", []):
+                        for span in line.get("spans", []):
+                            text = span.get("text", "")
+                            if not text or text.isspace():
+                                continue
+                            font_size_pt = float(span.get("size")) if span.get("size") is not None else None
+                            elements.append(
+                                build_text_run_element(
+                                    doc_id,
+                                    page_index,
+                                    text,
+                                    span.get("bbox", [0, 0, 0, 0]),
+                                    width_pt,
+                                    height_pt,
+                                    font_name=span.get("font"),
+                                    font_size_pt=font_size_pt,
+                                    color=_color_int_to_hex(span.get("color")),
+                                )
                             )
+                            stats.text_runs += 1
+
+            if stages.vectors:
+                try:
+                    drawings = page_drawings(page, layer_cache, fingerprint)
+                except Exception as exc:  # pragma: no cover - defensive fallback
+                    logger.warning("Failed to read drawings for doc_id=%s page=%s error=%s", doc_id, page_index, exc)
+                    drawings = []
+
+                for drawing in drawings:
+                    rect = drawing.get("rect")
+                    if rect is None:
+                        continue
+                    bbox_norm = _normalize_bbox((rect.x0, rect.y0, rect.x1, rect.y1), width_pt, height_pt)
+                    commands = _commands_from_drawing(drawing.get("items", []), height_pt)
+                    path_hint = _path_hint_from_commands(commands)
+                    stroke_color = _color_tuple_to_hex(drawing.get("color"))
+                    fill_color = _color_tuple_to_hex(drawing.get("fill"))
+                    stroke_width_pt = drawing.get("width")
+                    payload_core = {
+                        "commands": commands,
+                        "stroke_color": stroke_color,
+                        "fill_color": fill_color,
+                        "stroke_width_pt": stroke_width_pt,
+                    }
+                    element_id = stable_element_id(
+                        doc_id,
+                        page_index,
+                        "path",
+                        bbox_norm,
+                        payload_core,
+                    )
+                    content_hash = stable_content_hash("path", bbox_norm, payload_core)
+                    elements.append(
+                        PathElement(
+                            id=element_id,
+                            kind="path",
+                            bbox_norm=bbox_norm,
+                            source="pdf",
+                            content_hash=content_hash,
+                            stroke_color=stroke_color,
+                            stroke_width_pt=float(stroke_width_pt) if stroke_width_pt is not None else None,
+                            fill_color=fill_color,
+                            path_hint=path_hint,
+                            commands=commands,
+                            is_closed=drawing.get("closePath"),
                         )
-                        stats.text_runs += 1
-
-            try:
-                drawings = page.get_drawings()
-            except Exception as exc:  # pragma: no cover - defensive fallback
-                logger.warning("Failed to read drawings for doc_id=%s page=%s error=%s", doc_id, page_index, exc)
-                drawings = []
-
-            for drawing in drawings:
-                rect = drawing.get("rect")
-                if rect is None:
-                    continue
-                bbox_norm = _normalize_bbox((rect.x0, rect.y0, rect.x1, rect.y1), width_pt, height_pt)
-                commands = _commands_from_drawing(drawing.get("items", []), height_pt)
-                path_hint = _path_hint_from_commands(commands)
-                stroke_color = _color_tuple_to_hex(drawing.get("color"))
-                fill_color = _color_tuple_to_hex(drawing.get("fill"))
-                stroke_width_pt = drawing.get("width")
-                payload_core = {
-                    "commands": commands,
-                    "stroke_color": stroke_color,
-                    "fill_color": fill_color,
-                    "stroke_width_pt": stroke_width_pt,
-                }
-                element_id = stable_element_id(
-                    doc_id,
-                    page_index,
-                    "path",
-                    bbox_norm,
-                    payload_core,
-                )
-                content_hash = stable_content_hash("path", bbox_norm, payload_core)
-                elements.append(
-                    PathElement(
-                        id=element_id,
-                        kind="path",
-                        bbox_norm=bbox_norm,
-                        source="pdf",
-                        content_hash=content_hash,
-                        stroke_color=stroke_color,
-                        stroke_width_pt=float(stroke_width_pt) if stroke_width_pt is not None else None,
-                        fill_color=fill_color,
-                        path_hint=path_hint,
-                        commands=commands,
-                        is_closed=drawing.get("closePath"),
                     )
-                )
-                stats.paths += 1
-
-            try:
-                images = page.get_images(full=True)
-            except Exception as exc:  # pragma: no cover - defensive fallback
-                logger.warning("Failed to read images for doc_id=%s page=%s error=%s", doc_id, page_index, exc)
-                images = []
-
-            for image in images:
-                xref = image[0]
-                name = image[7] if len(image) > 7 else None
-                rects = page.get_image_rects(xref)
-                for rect in rects:
+                    stats.paths += 1
+
+            if stages.images:
+                try:
+                    image_rects = _page_image_rects(page, layer_cache, fingerprint)
+                except Exception as exc:  # pragma: no cover - defensive fallback
+                    logger.warning("Failed to read images for doc_id=%s page=%s error=%s", doc_id, page_index, exc)
+                    image_rects = []
+
+                for name, rect in image_rects:
                     bbox_norm = _normalize_bbox((rect.x0, rect.y0, rect.x1, rect.y1), width_pt, height_pt)
                     payload_core = {
                         "name": name,
@@ -289,8 +377,12 @@ def decode_pdf_to_decoded_document(doc_id: str, pdf_bytes: bytes) -> DecodedDocu
                     )
                     stats.images += 1
 
+            # Skipped stages leave their stats at zero, so the OCR heuristic reads image xrefs and path
+            # operators directly; every profile then flags the same pages.
             needs_ocr_fallback = False
-            if stats.text_runs == 0 or (stats.text_runs < 10 and (stats.images > 0 or stats.paths > 0)):
+            if stats.text_runs == 0 or (
+                stats.text_runs < 10 and (bool(page.get_images()) or _page_paints_paths(page))
+            ):
                 needs_ocr_fallback = True
                 warnings.append(f"page_{page_index}_needs_ocr_fallback")
 
@@ -311,6 +403,8 @@ def decode_pdf_to_decoded_document(doc_id: str, pdf_bytes: bytes) -> DecodedDocu
         doc_id=doc_id,
         type="pdf",
         version="v1",
+        profile=profile,
+        decoder_version=DECODED_VERSION,
         page_count=len(pages),
         pages=pages,
         warnings=warnings,
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from threading import Condition, Thread
+from typing import Any, Callable
+
+from forge_api.settings import get_settings
+
+logger = logging.getLogger("forge_api.redecode")
+
+
+class RedecodeScheduler:
+    """Background regeneration of stale artifacts, rate limited by a token bucket.
+
+    Jobs are deduplicated by key while queued or running, so a hot stale
+    artifact triggers a single regeneration no matter how often it is read.
+    At most ``max_queued`` jobs wait at once; further requests are refused and
+    the next read of a still-stale artifact asks again.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int, max_queued: int = 256) -> None:
+        self.rate_per_sec = rate_per_sec
+        self.burst = max(1, burst)
+        self.max_queued = max(1, max_queued)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queue: deque[tuple[str, Callable[[], Any]]] = deque()
+        self._keys: set[str] = set()
+        self._condition = Condition()
+        self._worker: Thread | None = None
+
+    def request(self, key: str, job: Callable[[], Any]) -> bool:
+        if self.rate_per_sec <= 0:
+            return False
+        with self._condition:
+            if key in self._keys:
+                return False
+            if len(self._queue) >= self.max_queued:
+                logger.warning("Redecode queue full, refused key=%s queued=%s", key, len(self._queue))
+                return False
+            self._keys.add(key)
+            self._queue.append((key, job))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = Thread(target=self._run, name="forge-redecode", daemon=True)
+                self._worker.start()
+            self._condition.notify_all()
+        logger.info("Queued stale artifact regeneration key=%s", key)
+        return True
+
+    def _take_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_sec)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            time.sleep((1 - self._tokens) / self.rate_per_sec)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                key, job = self._queue.popleft()
+            self._take_token()
+            try:
+                job()
+            except Exception as exc:
+                logger.warning("Artifact regeneration failed key=%s error=%s", key, exc)
+            finally:
+                with self._condition:
+                    self._keys.discard(key)
+                    self._condition.notify_all()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._keys)
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Block until every queued job has finished."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._keys, timeout)
+
+
+@lru_cache
+def get_redecode_scheduler() -> RedecodeScheduler:
+    settings = get_settings()
+    return RedecodeScheduler(
+        rate_per_sec=settings.FORGE_REDECODE_RATE_PER_SEC,
+        burst=settings.FORGE_REDECODE_BURST,
+        max_queued=settings.FORGE_REDECODE_MAX_QUEUED,
+    )
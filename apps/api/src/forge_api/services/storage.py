@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import fcntl
+import hashlib
+import os
+import random
+import time
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from typing import Protocol
+from typing import Callable, Protocol
+from uuid import uuid4
 
 import boto3
 from botocore.exceptions import ClientError
@@ -11,10 +17,31 @@ from botocore.exceptions import ClientError
 from forge_api.settings import get_settings
 
 
+class PreconditionFailed(Exception):
+    """A conditional write lost against a concurrent writer."""
+
+
 class StorageDriver(Protocol):
     def put_bytes(self, key: str, data: bytes, content_type: str | None = None) -> str:
         ...
 
+    def get_bytes_versioned(self, key: str) -> tuple[bytes, str]:
+        """Object bytes and an opaque version token for ``put_bytes_if_match``."""
+        ...
+
+    def put_bytes_if_match(
+        self,
+        key: str,
+        data: bytes,
+        expected_version: str | None,
+        content_type: str | None = None,
+    ) -> str:
+        """Write only if the object is still at ``expected_version`` (``None``: must not exist).
+
+        Returns the new version token; raises ``PreconditionFailed`` otherwise.
+        """
+        ...
+
     def get_bytes(self, key: str) -> bytes:
         ...
 
@@ -24,12 +51,23 @@ class StorageDriver(Protocol):
     def get_size(self, key: str) -> int:
         ...
 
+    def get_version(self, key: str) -> str:
+        """A token that changes whenever ``key`` is rewritten, read without fetching the body.
+
+        Meant for cache keys; it is not accepted by ``put_bytes_if_match``.
+        """
+        ...
+
     def open_stream(self, key: str) -> BytesIO:
         ...
 
     def exists(self, key: str) -> bool:
         ...
 
+    def delete(self, key: str) -> None:
+        """Remove ``key``; missing keys are ignored."""
+        ...
+
 
 @dataclass
 class LocalStorageDriver:
@@ -48,12 +86,42 @@ class LocalStorageDriver:
     def put_bytes(self, key: str, data: bytes, content_type: str | None = None) -> str:
         path = self._safe_join(key)
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_bytes(data)
+        # Replace rather than truncate, so readers (and memory maps) of the old file stay intact.
+        tmp_path = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
         return key
 
     def get_bytes(self, key: str) -> bytes:
         return self._safe_join(key).read_bytes()
 
+    def get_bytes_versioned(self, key: str) -> tuple[bytes, str]:
+        data = self.get_bytes(key)
+        return data, hashlib.sha256(data).hexdigest()
+
+    def put_bytes_if_match(
+        self,
+        key: str,
+        data: bytes,
+        expected_version: str | None,
+        content_type: str | None = None,
+    ) -> str:
+        path = self._safe_join(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The lock serializes writers sharing the directory; readers only ever see whole files.
+        with path.with_name(f"{path.name}.lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                current = hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None
+                if current != expected_version:
+                    raise PreconditionFailed(key)
+                tmp_path = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return hashlib.sha256(data).hexdigest()
+
     def get_bytes_range(self, key: str, start: int, end: int) -> bytes:
         path = self._safe_join(key)
         with path.open("rb") as handle:
@@ -63,6 +131,11 @@ class LocalStorageDriver:
     def get_size(self, key: str) -> int:
         return self._safe_join(key).stat().st_size
 
+    def get_version(self, key: str) -> str:
+        # Writes replace the file, so a rewrite always moves the inode or the mtime.
+        stat = self._safe_join(key).stat()
+        return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
     def open_stream(self, key: str) -> BytesIO:
         return BytesIO(self.get_bytes(key))
 
@@ -72,6 +145,9 @@ class LocalStorageDriver:
     def exists(self, key: str) -> bool:
         return self._safe_join(key).exists()
 
+    def delete(self, key: str) -> None:
+        self._safe_join(key).unlink(missing_ok=True)
+
 
 @dataclass
 class S3StorageDriver:
@@ -106,6 +182,54 @@ class S3StorageDriver:
                 raise FileNotFoundError("Object not found") from exc
             raise
 
+    def get_bytes_versioned(self, key: str) -> tuple[bytes, str]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._resolve_key(key))
+            return response["Body"].read(), response["ETag"]
+        except ClientError as exc:
+            error_code = exc.response.get("Error", {}).get("Code")
+            if error_code in {"NoSuchKey", "404"} or exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 404:
+                raise FileNotFoundError("Object not found") from exc
+            raise
+
+    def put_bytes_if_match(
+        self,
+        key: str,
+        data: bytes,
+        expected_version: str | None,
+        content_type: str | None = None,
+    ) -> str:
+        params = {
+            "Bucket": self.bucket,
+            "Key": self._resolve_key(key),
+            "Body": data,
+        }
+        if content_type:
+            params["ContentType"] = content_type
+        condition = {"If-None-Match": "*"} if expected_version is None else {"If-Match": expected_version}
+        supported = self.client.meta.service_model.operation_model("PutObject").input_shape.members
+        handler = None
+        if "IfMatch" in supported:
+            params.update({"IfNoneMatch": "*"} if expected_version is None else {"IfMatch": expected_version})
+        else:
+            # Older botocore does not model conditional PutObject; send the headers directly.
+            def handler(params, **kwargs):
+                params["headers"].update(condition)
+
+            self.client.meta.events.register("before-call.s3.PutObject", handler)
+        try:
+            response = self.client.put_object(**params)
+        except ClientError as exc:
+            error_code = exc.response.get("Error", {}).get("Code")
+            status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if error_code in {"PreconditionFailed", "ConditionalRequestConflict"} or status in {409, 412}:
+                raise PreconditionFailed(key) from exc
+            raise
+        finally:
+            if handler is not None:
+                self.client.meta.events.unregister("before-call.s3.PutObject", handler)
+        return response["ETag"]
+
     def get_bytes_range(self, key: str, start: int, end: int) -> bytes:
         try:
             response = self.client.get_object(
@@ -130,6 +254,16 @@ class S3StorageDriver:
                 raise FileNotFoundError("Object not found") from exc
             raise
 
+    def get_version(self, key: str) -> str:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self._resolve_key(key))
+            return response["ETag"]
+        except ClientError as exc:
+            error_code = exc.response.get("Error", {}).get("Code")
+            if error_code in {"NoSuchKey", "404"} or exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 404:
+                raise FileNotFoundError("Object not found") from exc
+            raise
+
     def open_stream(self, key: str) -> BytesIO:
         return BytesIO(self.get_bytes(key))
 
@@ -143,6 +277,10 @@ class S3StorageDriver:
                 return False
             raise
 
+    def delete(self, key: str) -> None:
+        # DeleteObject succeeds for missing keys.
+        self.client.delete_object(Bucket=self.bucket, Key=self._resolve_key(key))
+
 
 def _build_s3_driver() -> S3StorageDriver:
     settings = get_settings()
@@ -172,8 +310,40 @@ def get_storage() -> StorageDriver:
 def get_patch_storage() -> StorageDriver:
     settings = get_settings()
     driver_name = (settings.FORGE_PATCH_STORE_DRIVER or settings.FORGE_STORAGE_DRIVER).lower()
+    if driver_name == "sqlite":
+        # SQLite only holds the IR patch log; archives and overlay logs, entries and state stay on
+        # the storage driver so they are not stranded on one host's disk.
+        driver_name = settings.FORGE_STORAGE_DRIVER.lower()
     if driver_name == "s3":
         return _build_s3_driver()
     driver = LocalStorageDriver(Path(settings.FORGE_STORAGE_LOCAL_DIR))
     driver.ensure_root()
     return driver
+
+
+def compare_and_swap(
+    storage: StorageDriver,
+    key: str,
+    update: Callable[[bytes | None], bytes],
+    attempts: int | None = None,
+    content_type: str | None = None,
+) -> bytes:
+    """Read-modify-write ``key`` with a conditional put, re-running ``update`` when a concurrent writer wins.
+
+    ``update`` receives the current bytes (``None`` when missing) and may raise to abort.
+    Raises ``PreconditionFailed`` once the attempts are exhausted.
+    """
+    if attempts is None:
+        attempts = get_settings().FORGE_STORAGE_CAS_ATTEMPTS
+    for attempt in range(max(1, attempts)):
+        try:
+            current, version = storage.get_bytes_versioned(key)
+        except FileNotFoundError:
+            current, version = None, None
+        data = update(current)
+        try:
+            storage.put_bytes_if_match(key, data, version, content_type=content_type)
+            return data
+        except PreconditionFailed:
+            time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+    raise PreconditionFailed(key)
@@ -13,6 +13,8 @@ class Settings(BaseSettings):
     FORGE_ENV: str = "development"
     FORGE_STORAGE_DRIVER: str = "local"
     FORGE_PATCH_STORE_DRIVER: Optional[str] = None
+    FORGE_PATCH_STORE_SQLITE_PATH: Optional[str] = None
+    FORGE_STORAGE_CAS_ATTEMPTS: int = 8
     FORGE_STORAGE_LOCAL_DIR: str = ".data"
     FORGE_S3_BUCKET: Optional[str] = None
     FORGE_S3_REGION: Optional[str] = None
@@ -24,6 +26,24 @@ class Settings(BaseSettings):
     FORGE_EXPORT_MASK_MODE: str = "AUTO_BG"
     FORGE_EXPORT_MASK_SOLID_COLOR: str = "255,255,255"
     FORGE_RENDER_MODE: str = "html"
+    FORGE_LAYER_CACHE_MAX_ENTRIES: int = 1024
+    FORGE_OCR_ENGINE: str = "none"
+    FORGE_OCR_WORKERS: int = 2
+    FORGE_OCR_LANGUAGE: str = "eng"
+    FORGE_OCR_DPI: int = 300
+    FORGE_OCR_MAX_ATTEMPTS: int = 3
+    FORGE_OCR_RETRY_BACKOFF_SEC: float = 30.0
+    FORGE_REDECODE_RATE_PER_SEC: float = 2.0
+    FORGE_REDECODE_BURST: int = 4
+    FORGE_REDECODE_MAX_QUEUED: int = 256
+    FORGE_SPATIAL_INDEX: str = "grid"
+    FORGE_SPATIAL_INDEX_CACHE_ENTRIES: int = 256
+    FORGE_SPATIAL_INDEX_PERSIST: bool = False
+    FORGE_COMPOSITE_CACHE_ENTRIES: int = 256
+    FORGE_FONT_INVENTORY_CACHE_ENTRIES: int = 32
+    FORGE_PATCH_COMPACT_THRESHOLD: int = 500
+    FORGE_PATCH_COMPACT_KEEP_TAIL: int = 50
+    FORGE_SNAPSHOT_INTERVAL: int = 100
     FORGE_BUILD_VERSION: Optional[str] = None
     FORGE_OPENAI_MODEL: Optional[str] = None
     WEB_ORIGIN: Optional[str] = None
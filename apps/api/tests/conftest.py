@@ -6,7 +6,10 @@ from pathlib import Path
 import pytest
 from fastapi.testclient import TestClient
 
+from forge_api.core.patch.apply import apply_ops_to_page
 from forge_api.main import app
+from forge_api.services.ir_pdf import get_base_ir_page
+from forge_api.services.patch_store import load_page_patchsets
 from forge_api.settings import get_settings
 from tests.pdf_factory import make_contract_pdf_bytes, make_drawing_pdf_bytes, make_overlap_pdf_bytes
 
@@ -39,3 +42,38 @@ def upload_pdf(client: TestClient):
         )
 
     return _upload
+
+
+@pytest.fixture()
+def commit_text():
+    """Commit a single FIT_IN_BOX text replacement on page 0 through ``client``; returns the response body."""
+
+    def _commit(client: TestClient, doc_id: str, target_id: str, text: str) -> dict:
+        response = client.post(
+            "/v1/patch/commit",
+            json={
+                "doc_id": doc_id,
+                "patchset": {
+                    "ops": [{"op": "replace_text", "target_id": target_id, "new_text": text, "policy": "FIT_IN_BOX"}],
+                    "page_index": 0,
+                    "selected_ids": [target_id],
+                },
+            },
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    return _commit
+
+
+@pytest.fixture()
+def full_replay():
+    """Page 0 rebuilt from the base IR by applying ``patchsets`` (default: the stored log) in one pass."""
+
+    def _replay(doc_id: str, patchsets=None) -> dict:
+        if patchsets is None:
+            patchsets = load_page_patchsets(doc_id, 0)
+        page, _ = apply_ops_to_page(get_base_ir_page(doc_id, 0), [op for record in patchsets for op in record.ops])
+        return page.model_dump(mode="json")
+
+    return _replay
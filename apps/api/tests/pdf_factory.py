@@ -66,3 +66,14 @@ def make_colored_bg_pdf_bytes() -> bytes:
     pdf_bytes = doc.tobytes()
     doc.close()
     return pdf_bytes
+
+
+def make_embedded_font_pdf_bytes() -> bytes:
+    doc = _new_doc()
+    page = doc.new_page(width=400, height=400)
+    page.insert_font(fontname="Custom", fontbuffer=fitz.Font("tiro").buffer)
+    page.insert_text((70, 120), "Embedded Title", fontname="Custom", fontsize=14)
+    page.insert_text((70, 150), "Builtin line", fontsize=12)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from threading import Event
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.artifact_versions import DECODE_VERSION, IR_VERSION, MANIFEST_VERSION
+from forge_api.services.redecode import RedecodeScheduler, get_redecode_scheduler
+
+
+@pytest.fixture()
+def scheduler(client: TestClient) -> RedecodeScheduler:
+    get_redecode_scheduler.cache_clear()
+    yield get_redecode_scheduler()
+    get_redecode_scheduler.cache_clear()
+
+
+def _strip_version(path: Path) -> None:
+    payload = json.loads(path.read_text())
+    payload.pop("decoder_version", None)
+    path.write_text(json.dumps(payload))
+
+
+def test_stale_artifacts_served_then_regenerated(client: TestClient, upload_pdf, scheduler, tmp_path: Path) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    data_dir = tmp_path / ".data"
+
+    assert client.get(f"/v1/decode/{doc_id}").json()["decoder_version"] == DECODE_VERSION
+    assert client.get(f"/v1/documents/{doc_id}/forge/manifest").json()["decoder_version"] == MANIFEST_VERSION
+    assert client.get(f"/v1/ir/{doc_id}?page=0").json()["decoder_version"] == IR_VERSION
+
+    _strip_version(data_dir / "documents" / doc_id / "decode.json")
+    _strip_version(data_dir / "docs" / doc_id / "forge" / "manifest.json")
+    # A page stored as JSON before the columnar format, without a version stamp.
+    ir_dir = data_dir / "documents" / doc_id / "ir"
+    legacy_ir = client.get(f"/v1/ir/{doc_id}?page=0").json()
+    legacy_ir.pop("decoder_version")
+    (ir_dir / "page_0.json").write_text(json.dumps(legacy_ir))
+    (ir_dir / "page_0.columnar").unlink()
+
+    assert "decoder_version" not in client.get(f"/v1/decode/{doc_id}").json()
+    assert "decoder_version" not in client.get(f"/v1/documents/{doc_id}/forge/manifest").json()
+    assert client.get(f"/v1/ir/{doc_id}?page=0").json()["decoder_version"] == 0
+
+    assert scheduler.drain(timeout=30)
+
+    assert client.get(f"/v1/decode/{doc_id}").json()["decoder_version"] == DECODE_VERSION
+    assert client.get(f"/v1/documents/{doc_id}/forge/manifest").json()["decoder_version"] == MANIFEST_VERSION
+    assert client.get(f"/v1/ir/{doc_id}?page=0").json()["decoder_version"] == IR_VERSION
+
+
+def test_scheduler_deduplicates_and_rate_limits() -> None:
+    scheduler = RedecodeScheduler(rate_per_sec=50.0, burst=1)
+    release = Event()
+    runs: list[str] = []
+
+    def _job(name: str) -> None:
+        release.wait(timeout=5)
+        runs.append(name)
+
+    assert scheduler.request("a", lambda: _job("a"))
+    assert not scheduler.request("a", lambda: _job("a"))
+    assert scheduler.request("b", lambda: _job("b"))
+    started = time.monotonic()
+    release.set()
+    assert scheduler.drain(timeout=5)
+    assert runs == ["a", "b"]
+    # The second job waits for a fresh token once the burst of one is spent.
+    assert time.monotonic() - started >= 0.01
+
+    disabled = RedecodeScheduler(rate_per_sec=0, burst=1)
+    assert not disabled.request("a", lambda: runs.append("c"))
+
+
+def test_scheduler_refuses_requests_beyond_the_queue_limit() -> None:
+    scheduler = RedecodeScheduler(rate_per_sec=50.0, burst=4, max_queued=2)
+    started = Event()
+    release = Event()
+    runs: list[str] = []
+
+    def _job(name: str) -> None:
+        started.set()
+        release.wait(timeout=5)
+        runs.append(name)
+
+    assert scheduler.request("running", lambda: _job("running"))
+    assert started.wait(timeout=5)
+    # The running job no longer counts against the queue.
+    assert scheduler.request("a", lambda: _job("a"))
+    assert scheduler.request("b", lambda: _job("b"))
+    assert not scheduler.request("c", lambda: _job("c"))
+    assert scheduler.pending() == 3
+
+    release.set()
+    assert scheduler.drain(timeout=5)
+    assert runs == ["running", "a", "b"]
+    assert scheduler.request("c", lambda: _job("c"))
+    assert scheduler.drain(timeout=5)
+    assert runs[-1] == "c"
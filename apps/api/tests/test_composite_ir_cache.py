@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.routers import patches as patches_router
+from forge_api.services import composite_ir
+
+
+def test_commits_extend_the_cached_composite(
+    client: TestClient,
+    upload_pdf,
+    monkeypatch,
+    commit_text,
+    full_replay,
+) -> None:
+    composite_ir.get_composite_cache.cache_clear()
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    primitives = client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    text_ids = [item["id"] for item in primitives if item["kind"] == "text"]
+
+    commit_text(client, doc_id, text_ids[0], "First")
+
+    applied: list[int] = []
+
+    def _counting_apply(page, ops, fonts=None):
+        applied.append(len(ops))
+        return apply_ops_to_page(page, ops, fonts)
+
+    monkeypatch.setattr(patches_router, "apply_ops_to_page", _counting_apply)
+    monkeypatch.setattr(composite_ir, "apply_ops_to_page", _counting_apply)
+
+    commit_text(client, doc_id, text_ids[1], "Second")
+    # Only the new op is applied: the previous composite came from the cache.
+    assert applied == [1]
+
+    composite = client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+    assert applied == [1]
+    assert composite == full_replay(doc_id)
+
+    composite_ir.get_composite_cache.cache_clear()
+    assert client.get(f"/v1/composite/ir/{doc_id}?page=0").json() == composite
+    assert applied == [1]
+    composite_ir.get_composite_cache.cache_clear()
+
+
+def test_revert_and_recommit_do_not_reuse_stale_composites(
+    client: TestClient,
+    upload_pdf,
+    commit_text,
+    full_replay,
+) -> None:
+    composite_ir.get_composite_cache.cache_clear()
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    primitives = client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    text_id = next(item["id"] for item in primitives if item["kind"] == "text")
+
+    commit_text(client, doc_id, text_id, "Before revert")
+    client.post(f"/v1/patch/revert_last?doc_id={doc_id}")
+    assert client.get(f"/v1/composite/ir/{doc_id}?page=0").json() == full_replay(doc_id)
+
+    commit_text(client, doc_id, text_id, "After revert")
+    composite = client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+    assert next(item for item in composite["primitives"] if item["id"] == text_id)["text"] == "After revert"
+    assert composite == full_replay(doc_id)
+    composite_ir.get_composite_cache.cache_clear()
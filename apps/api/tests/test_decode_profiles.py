@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import fitz
+from fastapi.testclient import TestClient
+
+from forge_api.services.pdf_decode_v1 import decode_pdf_to_decoded_document
+from tests.pdf_factory import make_drawing_pdf_bytes
+
+
+def _skipped_stage(*args, **kwargs):
+    raise AssertionError("stage should be skipped by the profile")
+
+
+def test_text_profile_skips_vector_and_image_stages(monkeypatch) -> None:
+    monkeypatch.setattr(fitz.Page, "get_drawings", _skipped_stage)
+    monkeypatch.setattr(fitz.Page, "get_image_rects", _skipped_stage)
+
+    decoded = decode_pdf_to_decoded_document("doc-text", make_drawing_pdf_bytes(), profile="text")
+
+    assert decoded.profile == "text"
+    assert decoded.pages[0].stats.text_runs > 0
+    assert decoded.pages[0].stats.paths == 0
+    assert {element.kind for element in decoded.pages[0].elements} == {"text_run"}
+
+
+def test_decoded_profiles_cached_as_separate_artifacts(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("drawing").json()["document"]["doc_id"]
+
+    text = client.get(f"/v1/documents/{doc_id}/decoded?profile=text")
+    assert text.status_code == 200
+    assert text.json()["profile"] == "text"
+    assert {element["kind"] for element in text.json()["pages"][0]["elements"]} == {"text_run"}
+
+    vector = client.get(f"/v1/documents/{doc_id}/decoded?profile=text_vector")
+    assert vector.status_code == 200
+    vector_kinds = {element["kind"] for element in vector.json()["pages"][0]["elements"]}
+    assert vector_kinds == {"text_run", "path"}
+
+    full = client.get(f"/v1/documents/{doc_id}/decoded")
+    assert full.status_code == 200
+    assert full.json()["profile"] == "full"
+    text_ids = [element["id"] for element in text.json()["pages"][0]["elements"]]
+    full_text_ids = [element["id"] for element in full.json()["pages"][0]["elements"] if element["kind"] == "text_run"]
+    assert text_ids == full_text_ids
+
+    invalid = client.get(f"/v1/documents/{doc_id}/decoded?profile=everything")
+    assert invalid.status_code == 422
+
+
+def _sparse_pages_pdf_bytes() -> bytes:
+    """A text-only page, a page with a drawn box and a page that draws the box through a form XObject."""
+    source = fitz.open()
+    boxed = source.new_page(width=612, height=792)
+    boxed.insert_text((72, 72), "Scanned form", fontsize=12, fontname="helv")
+    boxed.draw_rect(fitz.Rect(72, 100, 300, 200), color=(0, 0, 0))
+
+    doc = fitz.open()
+    plain = doc.new_page(width=612, height=792)
+    plain.insert_text((72, 72), "Plain note", fontsize=12, fontname="helv")
+    doc.insert_pdf(source)
+    doc.new_page(width=612, height=792).show_pdf_page(fitz.Rect(0, 0, 612, 792), source, 0)
+    data = doc.tobytes()
+    doc.close()
+    source.close()
+    return data
+
+
+def test_ocr_fallback_flag_does_not_depend_on_the_profile() -> None:
+    data = _sparse_pages_pdf_bytes()
+    flags = {}
+    for profile in ("text", "text_vector", "full"):
+        decoded = decode_pdf_to_decoded_document("doc-ocr", data, profile=profile)
+        flags[profile] = [page.needs_ocr_fallback for page in decoded.pages]
+    assert flags["full"] == [False, True, True]
+    assert flags["text"] == flags["text_vector"] == flags["full"]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.services import correspondence
+from forge_api.services.decoded_store import decoded_artifact_key
+from forge_api.services.forge_manifest import build_forge_manifest, forge_manifest_version
+from forge_api.services.redecode import get_redecode_scheduler
+from forge_api.services.storage import get_storage
+
+
+def _contains(outer: list[float], inner: list[float], slack: float = 0.02) -> bool:
+    return (
+        inner[0] >= outer[0] - slack
+        and inner[1] >= outer[1] - slack
+        and inner[2] <= outer[2] + slack
+        and inner[3] <= outer[3] + slack
+    )
+
+
+def test_correspondence_built_with_manifest(client: TestClient, upload_pdf, tmp_path: Path) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = client.get(f"/v1/documents/{doc_id}/forge/manifest").json()
+    assert get_redecode_scheduler().drain(timeout=10)
+
+    table_path = tmp_path / ".data" / "docs" / doc_id / "forge" / "correspondence.json"
+    table = json.loads(table_path.read_text())
+    assert table["manifest_version"] == forge_manifest_version(doc_id)
+    assert table["decoded_version"] == get_storage().get_version(decoded_artifact_key(doc_id, "text_vector"))
+
+    page_table = table["pages"]["0"]
+    manifest_elements = {item["element_id"]: item for item in manifest["pages"][0]["elements"]}
+    decoded = client.get(f"/v1/documents/{doc_id}/decoded?profile=text").json()
+    runs = decoded["pages"][0]["elements"]
+    assert runs
+    for run in runs:
+        manifest_id = page_table["decoded_to_manifest"][run["id"]]
+        assert manifest_id in manifest_elements
+        assert _contains(manifest_elements[manifest_id]["bbox"], run["bbox_norm"])
+        assert run["id"] in page_table["manifest_to_decoded"][manifest_id]
+
+
+def test_commit_resolves_decoded_selection_from_table(
+    client: TestClient,
+    upload_pdf,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    overlay = client.get(f"/v1/documents/{doc_id}/forge/overlay?page_index=0").json()
+    decoded = client.get(f"/v1/documents/{doc_id}/decoded?profile=text").json()
+    run = decoded["pages"][0]["elements"][0]
+    assert get_redecode_scheduler().drain(timeout=10)
+
+    def _no_scoring(*args, **kwargs):
+        raise AssertionError("commit fell back to fuzzy resolution")
+
+    monkeypatch.setattr(correspondence, "resolve_overlay_selection", _no_scoring)
+    style = {"font_name": run["font_name"], "font_size_pt": run["font_size_pt"], "color": run["color"]}
+    commit = client.post(
+        f"/v1/documents/{doc_id}/forge/overlay/commit",
+        json={
+            "doc_id": doc_id,
+            "page_index": 0,
+            "base_overlay_version": overlay["overlay_version"],
+            "selection": [
+                {
+                    "element_id": run["id"],
+                    "text": run["text"],
+                    "content_hash": run["content_hash"],
+                    "bbox": run["bbox_norm"],
+                    "element_type": "text",
+                    "style": style,
+                }
+            ],
+            "ops": [{"type": "replace_element", "element_id": run["id"], "old_text": run["text"], "new_text": "Edited"}],
+        },
+    )
+    assert commit.status_code == 200, commit.text
+    assert commit.json()["overlay_version"] == overlay["overlay_version"] + 1
+
+
+def test_rewritten_decoded_artifact_invalidates_the_table(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = build_forge_manifest(doc_id)
+    manifest_version = forge_manifest_version(doc_id)
+    assert get_redecode_scheduler().drain(timeout=10)
+    assert correspondence.load_correspondence(doc_id, manifest, manifest_version) is not None
+
+    storage = get_storage()
+    key = decoded_artifact_key(doc_id, "text_vector")
+    # Same manifest, rewritten decoded artifact: the table may no longer describe its element ids.
+    storage.put_bytes(key, storage.get_bytes(key), content_type="application/json")
+    assert correspondence.load_correspondence(doc_id, manifest, manifest_version) is None
+
+    assert get_redecode_scheduler().drain(timeout=10)
+    table = correspondence.load_correspondence(doc_id, manifest, manifest_version)
+    assert table is not None
+    assert table["decoded_version"] == storage.get_version(key)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from forge_api.routers import elements as elements_router
+from forge_api.services.element_index import ElementPageIndex, manifest_page_index
+from forge_api.services.forge_manifest import build_forge_manifest, forge_manifest_version
+from forge_api.services.storage import get_storage
+
+
+def _center(bbox: list[float]) -> dict[str, float]:
+    return {"x": (bbox[0] + bbox[2]) / 2.0, "y": (bbox[1] + bbox[3]) / 2.0}
+
+
+def test_manifest_point_rect_and_nearest_queries(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = client.get(f"/v1/documents/{doc_id}/forge/manifest").json()
+    elements = manifest["pages"][0]["elements"]
+    target = elements[0]
+
+    point = client.post(
+        f"/v1/documents/{doc_id}/elements/query",
+        json={"page_index": 0, "point": _center(target["bbox"])},
+    )
+    assert point.status_code == 200
+    assert point.json()["elements"][0]["element_id"] == target["element_id"]
+
+    viewport = client.post(
+        f"/v1/documents/{doc_id}/elements/query",
+        json={"page_index": 0, "rect": {"x0": 0.0, "y0": 0.0, "x1": 1.0, "y1": 1.0}, "contained": True},
+    )
+    assert [item["element_id"] for item in viewport.json()["elements"]] == [item["element_id"] for item in elements]
+
+    nearest = client.post(
+        f"/v1/documents/{doc_id}/elements/query",
+        json={"page_index": 0, "point": {"x": 0.0, "y": 0.0}, "k": 2},
+    )
+    assert len(nearest.json()["elements"]) == min(2, len(elements))
+
+
+def test_decoded_element_queries(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("drawing").json()["document"]["doc_id"]
+    decoded = client.get(f"/v1/documents/{doc_id}/decoded?profile=text").json()
+    run = decoded["pages"][0]["elements"][0]
+
+    response = client.post(
+        f"/v1/documents/{doc_id}/elements/query",
+        json={"source": "decoded", "profile": "text", "page_index": 0, "point": _center(run["bbox_norm"])},
+    )
+    assert response.status_code == 200
+    assert run["id"] in [item["id"] for item in response.json()["elements"]]
+
+    missing = client.post(
+        f"/v1/documents/{doc_id}/elements/query",
+        json={"source": "decoded", "page_index": 5, "point": {"x": 0.5, "y": 0.5}},
+    )
+    assert missing.status_code == 404
+
+
+def test_repeat_queries_skip_loading_the_document(client: TestClient, upload_pdf, monkeypatch) -> None:
+    doc_id = upload_pdf("drawing").json()["document"]["doc_id"]
+    client.get(f"/v1/documents/{doc_id}/forge/manifest")
+    client.get(f"/v1/documents/{doc_id}/decoded?profile=text")
+    queries = [
+        {"page_index": 0, "point": {"x": 0.5, "y": 0.5}},
+        {"source": "decoded", "profile": "text", "page_index": 0, "point": {"x": 0.5, "y": 0.5}},
+    ]
+    first = [client.post(f"/v1/documents/{doc_id}/elements/query", json=query).json() for query in queries]
+
+    def _unexpected(*args, **kwargs):
+        raise AssertionError("document loaded on a cache hit")
+
+    monkeypatch.setattr(elements_router, "build_forge_manifest", _unexpected)
+    monkeypatch.setattr(elements_router, "load_decoded_document", _unexpected)
+    again = [client.post(f"/v1/documents/{doc_id}/elements/query", json=query).json() for query in queries]
+    assert again == first
+
+
+def test_manifest_rewrite_invalidates_every_consumer(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = build_forge_manifest(doc_id)
+    loads: list[int] = []
+
+    def _load() -> dict:
+        loads.append(1)
+        return manifest
+
+    # The element query router populates the entry correspondence lookups then reuse.
+    client.post(f"/v1/documents/{doc_id}/elements/query", json={"page_index": 0, "point": {"x": 0.5, "y": 0.5}})
+    assert manifest_page_index(doc_id, forge_manifest_version(doc_id), 0, _load) is not None
+    assert loads == []
+
+    key = f"docs/{doc_id}/forge/manifest.json"
+    get_storage().put_bytes(key, get_storage().get_bytes(key))
+    assert manifest_page_index(doc_id, forge_manifest_version(doc_id), 0, _load) is not None
+    assert loads == [1]
+
+
+def test_point_query_orders_innermost_first() -> None:
+    index = ElementPageIndex.build(
+        [
+            {"element_id": "outer", "bbox": [0.0, 0.0, 1.0, 1.0]},
+            {"element_id": "inner", "bbox": [0.4, 0.4, 0.6, 0.6]},
+        ],
+        "bbox",
+    )
+    assert [item["element_id"] for item in index.at_point(0.5, 0.5)] == ["inner", "outer"]
+    assert [item["element_id"] for item in index.in_rect(0.3, 0.3, 0.7, 0.7, contained=True)] == ["inner"]
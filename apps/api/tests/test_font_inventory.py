@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import fitz
+from fastapi.testclient import TestClient
+
+from forge_api.core.fonts.inventory import BUILTIN_INVENTORY, FontInventory
+from forge_api.core.fonts.resolve import resolve_builtin_font
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.schemas.ir import IRPage
+from forge_api.schemas.patch import PatchReplaceText
+from forge_api.services.export_html_pdf import _font_faces
+from forge_api.services.font_inventory import get_font_inventory
+from tests.pdf_factory import make_contract_pdf_bytes, make_embedded_font_pdf_bytes
+
+
+def _upload(client: TestClient, data: bytes) -> str:
+    response = client.post("/v1/documents/upload", files={"file": ("fonts.pdf", data, "application/pdf")})
+    return response.json()["document"]["doc_id"]
+
+
+def _embedded_primitive(client: TestClient, doc_id: str) -> dict:
+    primitives = client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    return next(item for item in primitives if item["text"] == "Embedded Title")
+
+
+def test_inventory_resolves_each_font_once() -> None:
+    inventory = FontInventory.from_pdf_bytes(make_embedded_font_pdf_bytes())
+    assert len(inventory.embedded) == 1
+    assert len(inventory) == 2
+
+    # Span names differ from the font resource's BaseFont; both reach the same embedded program.
+    entry = inventory.entry("NimbusRoman-Regular")
+    assert entry is inventory.entry("NimbusRoman-Regular")
+    assert entry.embedded is inventory.entry("Nimbus Roman Regular").embedded is not None
+    assert inventory.embedded_for("NimbusRoman-Regular", "Edited text") is entry.embedded
+    assert inventory.embedded_for("NimbusRoman-Regular", "漢字") is None
+    assert inventory.entry("Helvetica").embedded is None
+    assert inventory.overlay_font("Arial-Black") == "helvB"
+    assert inventory.overlay_font("Helvetica", is_bold=True) == "helvB"
+    assert inventory.css_family("Times-Roman") == '"Times New Roman", Times, serif'
+
+    resolve_builtin_font("calibri-bold")
+    hits = resolve_builtin_font.cache_info().hits
+    resolve_builtin_font("calibri-bold")
+    assert resolve_builtin_font.cache_info().hits == hits + 1
+
+
+def test_fitting_measures_with_the_embedded_font(client: TestClient) -> None:
+    doc_id = _upload(client, make_embedded_font_pdf_bytes())
+    page = IRPage.model_validate(client.get(f"/v1/ir/{doc_id}?page=0").json())
+    target = _embedded_primitive(client, doc_id)
+    ops = [
+        PatchReplaceText(op="replace_text", target_id=target["id"], new_text="Embedded Title!!", policy="FIT_IN_BOX")
+    ]
+
+    _, fallback = apply_ops_to_page(page, ops)
+    assert fallback[0].warnings[0]["code"] == "font_fallback"
+
+    fonts = get_font_inventory(doc_id)
+    assert get_font_inventory(doc_id) is fonts
+    _, embedded = apply_ops_to_page(page, ops, fonts)
+    assert embedded[0].warnings == []
+    tiro_width = fitz.get_text_length("Embedded Title!!", fontname="tiro", fontsize=1.0)
+    assert fonts.embedded_for(target["style"]["font"], "Embedded Title!!").unit_width("Embedded Title!!") == tiro_width
+
+
+def test_export_draws_covered_text_with_the_embedded_font(client: TestClient, commit_text) -> None:
+    doc_id = _upload(client, make_embedded_font_pdf_bytes())
+    target = _embedded_primitive(client, doc_id)
+    commit = commit_text(client, doc_id, target["id"], "Edited")
+    assert commit["applied_ops"][0]["warnings"] == []
+
+    export = client.post(f"/v1/export/{doc_id}")
+    assert export.status_code == 200
+    exported = fitz.open(stream=export.content, filetype="pdf")
+    assert "FgEmb0" in {font[4] for font in exported[0].get_fonts(full=True)}
+
+
+def test_documents_without_embedded_fonts_share_builtin_metrics(client: TestClient) -> None:
+    doc_id = _upload(client, make_contract_pdf_bytes())
+    fonts = get_font_inventory(doc_id)
+    assert fonts.embedded == {}
+    assert _font_faces(fonts) == ""
+    assert get_font_inventory("missing-doc") is BUILTIN_INVENTORY
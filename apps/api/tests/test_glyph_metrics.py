@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+
+import fitz
+
+from forge_api.core.fonts import metrics
+from forge_api.core.fonts.metrics import glyph_advances
+from forge_api.core.patch.apply import FONT_SIZE_STEP_PT, MIN_FONT_SCALE, apply_ops_to_page
+from forge_api.schemas.ir import IRPage, IRPrimitive
+from forge_api.schemas.patch import PatchReplaceText
+
+
+def _page(font: str, font_size: float, bbox_width: float) -> IRPage:
+    primitive = IRPrimitive(
+        id="prim",
+        kind="text",
+        bbox=[10.0, 10.0, 10.0 + bbox_width, 60.0],
+        z_index=0,
+        style={"font": font, "size": font_size, "color": 0},
+        signature_fields={},
+        text="Original",
+    )
+    return IRPage(doc_id="doc", page_index=0, width_pt=400.0, height_pt=400.0, rotation=0, primitives=[primitive])
+
+
+def _stepped_fit(text: str, font_size: float, max_width: float) -> float | None:
+    """The original loop: one MuPDF measurement per 0.5pt step."""
+    min_size = round(font_size * MIN_FONT_SCALE, 2)
+    size = font_size
+    while size - FONT_SIZE_STEP_PT >= min_size:
+        size = round(size - FONT_SIZE_STEP_PT, 2)
+        if fitz.get_text_length(text, fontname="helv", fontsize=size) <= max_width:
+            return size
+    return None
+
+
+def test_table_widths_match_mupdf_for_latin_text() -> None:
+    rng = random.Random(3)
+    for font in ("helv", "cour", "tiro"):
+        table = glyph_advances(font)
+        for _ in range(200):
+            text = "".join(chr(rng.randrange(32, 127)) for _ in range(rng.randrange(0, 60)))
+            size = rng.choice([8.0, 11.37, 12.0, 30.0])
+            assert table.text_width(text, size) == fitz.get_text_length(text, fontname=font, fontsize=size)
+
+
+def test_non_latin_text_is_measured_per_character() -> None:
+    table = glyph_advances("helv")
+    expected = sum(fitz.get_text_length(char, fontname="helv", fontsize=10.0) for char in "Łódź €")
+    assert abs(table.text_width("Łódź €", 10.0) - expected) < 1e-9
+
+
+def test_fitting_matches_stepped_search_without_per_step_measurements(monkeypatch) -> None:
+    glyph_advances("helv")
+    calls: list[str] = []
+    original = metrics._unit_advance
+
+    def _counting(font_name: str, codepoint: int) -> float:
+        calls.append(font_name)
+        return original(font_name, codepoint)
+
+    monkeypatch.setattr(metrics, "_unit_advance", _counting)
+    rng = random.Random(5)
+    for _ in range(100):
+        text = "".join(rng.choice("abcdefghij KLMNOP") for _ in range(rng.randrange(5, 40)))
+        font_size = rng.choice([10.0, 18.0, 24.0, 36.0, 11.37])
+        natural = fitz.get_text_length(text, fontname="helv", fontsize=font_size)
+        width = natural * rng.uniform(0.6, 1.0)
+        page = _page("helv", font_size, width)
+        page.width_pt = page.primitives[0].bbox[2]  # no room to expand the bbox
+        _, results = apply_ops_to_page(
+            page, [PatchReplaceText(op="replace_text", target_id="prim", new_text=text, policy="FIT_IN_BOX")]
+        )
+        if natural <= width:
+            assert results[0].applied_font_size_pt == font_size
+            continue
+        expected = _stepped_fit(text, font_size, width)
+        if expected is None:
+            assert results[0].ok is False
+        else:
+            assert results[0].applied_font_size_pt == expected
+    assert calls == []
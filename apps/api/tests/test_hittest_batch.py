@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.ir.columnar import ColumnarPage
+from forge_api.core.ir.spatial_index import (
+    SPATIAL_INDEX_KINDS,
+    build_spatial_index,
+    hit_test_batch,
+    hit_test_point,
+    hit_test_rect,
+)
+from forge_api.schemas.ir import IRPage, IRPrimitive
+
+
+def test_batch_hittest_matches_single_queries(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("overlap").json()["document"]["doc_id"]
+    queries = [
+        {"page_index": 0, "point": {"x": 160.0, "y": 160.0}},
+        {"page_index": 0, "rect": {"x0": 140.0, "y0": 140.0, "x1": 230.0, "y1": 230.0}},
+        {"page_index": 0, "point": {"x": 205.0, "y": 195.0}},
+    ]
+
+    response = client.post(f"/v1/hittest/{doc_id}/batch", json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == len(queries)
+
+    for query, result in zip(queries, results):
+        single_payload = {key: value for key, value in query.items() if key != "page_index"}
+        single = client.post(f"/v1/hittest/{doc_id}?page=0", json=single_payload)
+        assert result["page_index"] == 0
+        assert result["candidates"] == single.json()["candidates"]
+
+
+def test_batch_hittest_rejects_missing_page_and_bad_queries(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("overlap").json()["document"]["doc_id"]
+
+    missing = client.post(
+        f"/v1/hittest/{doc_id}/batch",
+        json={"queries": [{"page_index": 9, "point": {"x": 1.0, "y": 1.0}}]},
+    )
+    assert missing.status_code == 404
+
+    invalid = client.post(
+        f"/v1/hittest/{doc_id}/batch",
+        json={"queries": [{"page_index": 0, "point": {"x": 1.0, "y": 1.0}, "rect": {"x0": 0, "y0": 0, "x1": 1, "y1": 1}}]},
+    )
+    assert invalid.status_code == 422
+
+
+@pytest.mark.parametrize("kind", SPATIAL_INDEX_KINDS)
+def test_batch_sweep_matches_per_query_hits(kind: str) -> None:
+    rng = random.Random(5)
+    primitives = []
+    for idx in range(400):
+        x0, y0 = rng.uniform(-20, 600), rng.uniform(-20, 780)
+        bbox = [x0, y0, x0 + rng.uniform(0, 120), y0 + rng.choice([0.0, rng.uniform(0, 40)])]
+        primitives.append(
+            IRPrimitive(id=f"p{idx}", kind="path", bbox=bbox, z_index=rng.randint(0, 2), style={}, signature_fields={})
+        )
+    page = ColumnarPage.from_ir_page(
+        IRPage(doc_id="doc", page_index=0, width_pt=612.0, height_pt=792.0, rotation=0, primitives=primitives)
+    )
+    index = build_spatial_index(page, kind)
+    queries: list[tuple[float, ...]] = []
+    for _ in range(150):
+        x, y = rng.uniform(-40, 650), rng.uniform(-40, 830)
+        queries.append((x, y))
+        queries.append((x, y, x + rng.uniform(-100, 100), y + rng.uniform(-100, 100)))
+    queries.append(tuple(primitives[0].bbox))
+
+    expected = [
+        hit_test_point(page, index, *query) if len(query) == 2 else hit_test_rect(page, index, *query)
+        for query in queries
+    ]
+    assert hit_test_batch(page, queries) == expected
+    assert any(expected)
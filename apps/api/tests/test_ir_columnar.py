@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import mmap
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.ir.columnar import ColumnarPage, encode_columnar_page
+from forge_api.schemas.ir import IRPage
+from forge_api.services.ir_index import get_page_index_cache
+from forge_api.services.ir_pdf import _cache_key, get_columnar_page
+from forge_api.services.storage import get_storage
+
+
+def _no_models(*args, **kwargs):
+    raise AssertionError("pydantic IR models were built")
+
+
+def test_round_trip_matches_json_ir(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    payload = client.get(f"/v1/ir/{doc_id}?page=0").json()
+    page = IRPage.model_validate(payload)
+    page.primitives[0].patch_meta = {"patchset_id": "p1"}
+    page.primitives[0].text = "Ünïcödé ✓"
+
+    columnar = ColumnarPage.decode(encode_columnar_page(page))
+    assert columnar.to_ir_page().model_dump() == page.model_dump()
+    assert len(columnar) == len(page.primitives)
+    assert len(columnar.styles) < len(page.primitives)
+    assert columnar.boxes() == [tuple(primitive.bbox) for primitive in page.primitives]
+
+
+def test_stored_page_is_memory_mapped(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("drawing").json()["document"]["doc_id"]
+    client.get(f"/v1/ir/{doc_id}?page=0")
+
+    page = get_columnar_page(doc_id, 0)
+    assert isinstance(page.bboxes.obj, mmap.mmap)
+    # Rewriting the artifact replaces the file, so an open mapping keeps reading the old one.
+    boxes = page.boxes()
+    get_storage().put_bytes(_cache_key(doc_id, 0), encode_columnar_page(page.to_ir_page()))
+    assert page.boxes() == boxes
+
+
+def test_hittest_reads_columns_only(client: TestClient, upload_pdf, monkeypatch: pytest.MonkeyPatch) -> None:
+    get_page_index_cache.cache_clear()
+    doc_id = upload_pdf("overlap").json()["document"]["doc_id"]
+    expected = client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+
+    monkeypatch.setattr(ColumnarPage, "primitive", _no_models)
+    monkeypatch.setattr(ColumnarPage, "to_ir_page", _no_models)
+    response = client.post(f"/v1/hittest/{doc_id}?page=0", json={"rect": {"x0": 0, "y0": 0, "x1": 1000, "y1": 1000}})
+    assert response.status_code == 200
+    candidates = response.json()["candidates"]
+    assert {candidate["id"] for candidate in candidates} == {item["id"] for item in expected}
+    by_id = {item["id"]: item for item in expected}
+    for candidate in candidates:
+        assert candidate["bbox"] == by_id[candidate["id"]]["bbox"]
+        assert candidate["kind"] == by_id[candidate["id"]]["kind"]
+    get_page_index_cache.cache_clear()
+
+
+def test_corrupt_artifact_is_rebuilt(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    expected = client.get(f"/v1/ir/{doc_id}?page=0").json()
+
+    get_storage().put_bytes(_cache_key(doc_id, 0), b"not a page")
+    with pytest.raises(ValueError):
+        ColumnarPage.decode(get_storage().get_bytes(_cache_key(doc_id, 0)))
+    assert client.get(f"/v1/ir/{doc_id}?page=0").json() == expected
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.services.ocr import StubOCREngine, get_ocr_pool, read_ocr_result
+from forge_api.settings import get_settings
+
+
+def _make_scanned_pdf_bytes() -> bytes:
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=400)
+    page.insert_text((72, 72), "Native text page", fontsize=12)
+    doc.new_page(width=400, height=400)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+@pytest.fixture()
+def stub_ocr(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setenv("FORGE_OCR_ENGINE", "stub")
+    get_settings.cache_clear()
+    yield client
+    get_settings.cache_clear()
+
+
+def test_ocr_pages_merge_into_decoded_document(stub_ocr: TestClient) -> None:
+    upload = stub_ocr.post(
+        "/v1/documents/upload",
+        files={"file": ("scan.pdf", _make_scanned_pdf_bytes(), "application/pdf")},
+    )
+    doc_id = upload.json()["document"]["doc_id"]
+
+    first = stub_ocr.get(f"/v1/documents/{doc_id}/decoded")
+    assert first.status_code == 200
+    text_page, scanned_page = first.json()["pages"]
+    assert text_page["ocr_status"] is None
+    assert scanned_page["needs_ocr_fallback"] is True
+    assert scanned_page["ocr_status"] in {"pending", "done"}
+
+    get_ocr_pool().wait(doc_id, timeout=30)
+
+    second = stub_ocr.get(f"/v1/documents/{doc_id}/decoded?profile=text")
+    assert second.status_code == 200
+    text_page, scanned_page = second.json()["pages"]
+    assert text_page["version"] == 0
+    assert scanned_page["ocr_status"] == "done"
+    assert scanned_page["version"] == 1
+    assert scanned_page["stats"]["text_runs"] == 1
+    ocr_runs = [element for element in scanned_page["elements"] if element["source"] == "ocr"]
+    assert [element["text"] for element in ocr_runs] == ["OCR text 1"]
+
+
+def test_ocr_disabled_leaves_pages_untouched(client: TestClient) -> None:
+    upload = client.post(
+        "/v1/documents/upload",
+        files={"file": ("scan.pdf", _make_scanned_pdf_bytes(), "application/pdf")},
+    )
+    doc_id = upload.json()["document"]["doc_id"]
+
+    response = client.get(f"/v1/documents/{doc_id}/decoded")
+    scanned_page = response.json()["pages"][1]
+    assert scanned_page["needs_ocr_fallback"] is True
+    assert scanned_page["ocr_status"] is None
+    assert scanned_page["elements"] == []
+
+
+def test_failed_ocr_pages_are_retried_until_the_attempt_limit(
+    stub_ocr: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("FORGE_OCR_RETRY_BACKOFF_SEC", "0")
+    monkeypatch.setenv("FORGE_OCR_MAX_ATTEMPTS", "2")
+    get_settings.cache_clear()
+    failures = [RuntimeError("engine busy"), RuntimeError("engine busy again")]
+    recognize = StubOCREngine.recognize
+
+    def _flaky(self, page):
+        if failures:
+            raise failures.pop(0)
+        return recognize(self, page)
+
+    monkeypatch.setattr(StubOCREngine, "recognize", _flaky)
+    upload = stub_ocr.post(
+        "/v1/documents/upload",
+        files={"file": ("scan.pdf", _make_scanned_pdf_bytes(), "application/pdf")},
+    )
+    doc_id = upload.json()["document"]["doc_id"]
+
+    stub_ocr.get(f"/v1/documents/{doc_id}/decoded")
+    get_ocr_pool().wait(doc_id, timeout=30)
+    assert read_ocr_result(doc_id, 1)["attempts"] == 1
+
+    # The first failure is retried on the next read; the second one exhausts the attempts.
+    assert stub_ocr.get(f"/v1/documents/{doc_id}/decoded").json()["pages"][1]["ocr_status"] == "pending"
+    get_ocr_pool().wait(doc_id, timeout=30)
+    assert read_ocr_result(doc_id, 1)["attempts"] == 2
+
+    scanned_page = stub_ocr.get(f"/v1/documents/{doc_id}/decoded").json()["pages"][1]
+    assert scanned_page["ocr_status"] == "failed"
+    assert not get_ocr_pool().is_pending(doc_id, 1)
+    assert failures == []
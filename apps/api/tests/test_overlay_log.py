@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from forge_api.schemas.patch import OverlayPatchReplaceElement
+from forge_api.services.forge_overlay import (
+    append_overlay_patchset,
+    load_overlay_custom_entries,
+    load_overlay_patch_log,
+    load_overlay_patchsets_since,
+    load_overlay_version,
+    upsert_overlay_custom_entries,
+)
+from forge_api.services.storage import LocalStorageDriver
+
+
+def _op(text: str) -> OverlayPatchReplaceElement:
+    return OverlayPatchReplaceElement(type="replace_element", element_id="p0_e0", new_text=text)
+
+
+def test_appends_write_constant_size_segments(client: TestClient, monkeypatch) -> None:
+    written: list[tuple[str, int]] = []
+    original_put = LocalStorageDriver.put_bytes_if_match
+
+    def _recording_put(self, key: str, data: bytes, expected_version, content_type: str | None = None) -> str:
+        written.append((key, len(data)))
+        return original_put(self, key, data, expected_version, content_type=content_type)
+
+    monkeypatch.setattr(LocalStorageDriver, "put_bytes_if_match", _recording_put)
+
+    records = [append_overlay_patchset("doc-log", [_op(f"edit {idx:03d}")]) for idx in range(50)]
+    assert load_overlay_version("doc-log") == 50
+    assert [record.patch_id for record in load_overlay_patch_log("doc-log")] == [r.patch_id for r in records]
+    assert [record.patch_id for record in load_overlay_patchsets_since("doc-log", 48)] == [
+        r.patch_id for r in records[48:]
+    ]
+
+    # One head swap per append, plus the previous tail's segment from the second append on.
+    assert len(written) == 99
+    head_sizes = [size for key, size in written if key.endswith("head.json")]
+    assert max(head_sizes) - min(head_sizes) <= 2
+
+    read_keys: list[str] = []
+    original_get = LocalStorageDriver.get_bytes
+
+    def _recording_get(self, key: str) -> bytes:
+        read_keys.append(key)
+        return original_get(self, key)
+
+    monkeypatch.setattr(LocalStorageDriver, "get_bytes", _recording_get)
+    assert load_overlay_version("doc-log") == 50
+    assert read_keys == ["docs/doc-log/forge/overlay_log/head.json"]
+
+
+def test_legacy_files_are_migrated(client: TestClient, tmp_path: Path) -> None:
+    forge_dir = tmp_path / ".data" / "docs" / "doc-legacy" / "forge"
+    forge_dir.mkdir(parents=True)
+    legacy = append_overlay_patchset("doc-source", [_op("legacy")]).model_dump(mode="json")
+    (forge_dir / "overlay_patches.json").write_text(json.dumps([legacy]))
+    (forge_dir / "overlay_custom.json").write_text(
+        json.dumps([{"element_id": "tr_a", "page_index": 1, "text": "A"}, {"element_id": "tr_b", "text": "B"}])
+    )
+
+    assert load_overlay_version("doc-legacy") == 1
+    assert load_overlay_patch_log("doc-legacy")[0].patch_id == legacy["patch_id"]
+    append_overlay_patchset("doc-legacy", [_op("after")])
+    assert load_overlay_version("doc-legacy") == 2
+
+    assert load_overlay_custom_entries("doc-legacy") == {"tr_a": {"element_id": "tr_a", "page_index": 1, "text": "A"}}
+
+
+def test_custom_entries_are_stored_per_page(client: TestClient) -> None:
+    upsert_overlay_custom_entries(
+        "doc-custom",
+        [
+            {"element_id": "tr_b", "page_index": 0, "text": "B"},
+            {"element_id": "tr_a", "page_index": 0, "text": "A"},
+            {"element_id": "tr_c", "page_index": 2, "text": "C"},
+        ],
+    )
+    upsert_overlay_custom_entries("doc-custom", [{"element_id": "tr_b", "page_index": 0, "text": "B2"}])
+
+    assert list(load_overlay_custom_entries("doc-custom", page_index=0)) == ["tr_b", "tr_a"]
+    assert load_overlay_custom_entries("doc-custom", page_index=0)["tr_b"]["text"] == "B2"
+    assert set(load_overlay_custom_entries("doc-custom")) == {"tr_a", "tr_b", "tr_c"}
+    assert load_overlay_custom_entries("doc-custom", page_index=1) == {}
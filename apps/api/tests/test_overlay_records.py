@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from forge_api.schemas.patch import OverlayPatchRecord, OverlayPatchUpdateStyle
+from forge_api.services.forge_overlay import build_overlay_state
+from forge_api.services.overlay_records import (
+    OverlayPrimitive,
+    loads_interned,
+    overlay_json_default,
+    overlay_page_from_payload,
+)
+
+
+def _element(element_id: str) -> dict:
+    style = {"font_size_pt": 12.0, "color": "#000000", "font_family": "Helvetica", "is_bold": False}
+    bbox = [0.1, 0.2, 0.3, 0.4]
+    return {
+        "element_id": element_id,
+        "text": "Same text",
+        "bbox": bbox,
+        "style": style,
+        "lines": [{"text": "Same text", "bbox": bbox, "spans": [{"text": "Same text", "style": style}]}],
+    }
+
+
+def test_loads_interned_shares_repeated_values() -> None:
+    payload = json.dumps({"pages": [{"page_index": 0, "elements": [_element("a"), _element("b")], "extra": {}}]})
+    page = loads_interned(payload)["pages"][0]
+    first, second = page["elements"]
+
+    assert first["style"] is second["style"] is first["lines"][0]["spans"][0]["style"]
+    assert first["bbox"] is second["bbox"] is first["lines"][0]["bbox"]
+    assert first["text"] is second["lines"][0]["spans"][0]["text"]
+    assert page["extra"] is not loads_interned(payload)["pages"][0]["extra"]
+
+    mixed = loads_interned('[{"flag": true}, {"flag": 1}, [1, 2], [true, 2]]')
+    assert mixed[0] is not mixed[1]
+    assert mixed[2] is not mixed[3]
+
+
+def test_overlay_primitive_behaves_like_its_dict() -> None:
+    base = OverlayPrimitive("t", "h", [0.0, 0.0, 1.0, 1.0], {"a": 1}, "text", "t", {"a": 1})
+    assert base.to_dict() == {
+        "text": "t",
+        "content_hash": "h",
+        "bbox": [0.0, 0.0, 1.0, 1.0],
+        "style": {"a": 1},
+        "element_type": "text",
+        "base_text": "t",
+        "base_style": {"a": 1},
+    }
+    assert base == base.to_dict()
+    assert "path_hint" not in base
+    assert base.get("path_hint") is None
+    with pytest.raises(KeyError):
+        base["unknown"] = 1
+
+    custom = OverlayPrimitive.from_dict({**base.to_dict(), "path_commands": [], "path_hint": None})
+    assert custom["path_commands"] == [] and "path_hint" in custom
+    assert "resolved_element_id" not in custom
+
+    page = {"primitives": {"el": custom}, "masks": []}
+    restored = overlay_page_from_payload(json.loads(json.dumps(page, default=overlay_json_default)))
+    assert restored == page
+    assert isinstance(restored["primitives"]["el"], OverlayPrimitive)
+
+
+def test_ops_never_mutate_shared_manifest_styles() -> None:
+    manifest = loads_interned(json.dumps({"pages": [{"page_index": 0, "elements": [_element("a"), _element("b")]}]}))
+    shared = manifest["pages"][0]["elements"][0]["style"]
+    before = dict(shared)
+    patchsets = [
+        OverlayPatchRecord(
+            patch_id="patch-1",
+            created_at_iso=datetime.now(timezone.utc),
+            ops=[
+                OverlayPatchUpdateStyle(
+                    type="update_style", element_id="a", kind="text_run", style={"color": "#ff0000"}
+                )
+            ],
+        )
+    ]
+
+    primitives = build_overlay_state(manifest, patchsets)[0]["primitives"]
+    assert primitives["a"]["style"]["color"] == "#ff0000"
+    assert primitives["a"]["base_style"] is shared
+    assert primitives["b"]["style"] is shared
+    assert shared == before
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from forge_api.services import forge_overlay
+from forge_api.services.forge_overlay import _bbox_iou, _text_similarity, resolve_overlay_selection
+
+WORDS = ["total", "amount", "invoice", "due", "date", "client", "forge", "net", "tax", "terms"]
+
+
+def _reference(selection, manifest_elements):
+    # Exhaustive scoring restricted to overlapping elements.
+    resolved = {}
+    for item in selection:
+        best_score, best_match = 0.0, None
+        for candidate in manifest_elements:
+            iou = _bbox_iou(item["bbox"], candidate["bbox"])
+            if iou <= 0:
+                continue
+            score = iou * 0.7 + _text_similarity(item["text"], candidate["text"]) * 0.3
+            if score > best_score:
+                best_score, best_match = score, candidate
+        if best_match and best_score >= 0.25:
+            resolved[item["element_id"]] = best_match
+    return resolved
+
+
+def _elements(rng: random.Random, count: int, prefix: str) -> list[dict]:
+    elements = []
+    for idx in range(count):
+        x0, y0 = rng.uniform(0, 0.9), rng.uniform(0, 0.95)
+        elements.append(
+            {
+                "element_id": f"{prefix}{idx}",
+                "bbox": [x0, y0, x0 + rng.uniform(0.02, 0.1), y0 + rng.uniform(0.01, 0.03)],
+                "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))),
+            }
+        )
+    return elements
+
+
+def test_resolution_matches_exhaustive_scoring() -> None:
+    rng = random.Random(3)
+    manifest_elements = _elements(rng, 400, "p0_e")
+    selection = _elements(rng, 200, "tr_")
+    selection.append(dict(manifest_elements[5]))
+
+    resolved = resolve_overlay_selection(selection, manifest_elements)
+
+    expected = _reference(selection[:-1], manifest_elements)
+    expected[manifest_elements[5]["element_id"]] = manifest_elements[5]
+    assert {key: value["element_id"] for key, value in resolved.items()} == {
+        key: value["element_id"] for key, value in expected.items()
+    }
+
+
+def test_resolution_scales_with_dense_pages(monkeypatch: pytest.MonkeyPatch) -> None:
+    rng = random.Random(5)
+    manifest_elements = _elements(rng, 3000, "p0_e")
+    selection = _elements(rng, 300, "tr_")
+
+    scored: list[int] = []
+
+    def _counting_iou(a, b):
+        scored.append(1)
+        return _bbox_iou(a, b)
+
+    monkeypatch.setattr(forge_overlay, "_bbox_iou", _counting_iou)
+    resolve_overlay_selection(selection, manifest_elements)
+    # Only candidates from the spatial index are scored, not every selection x element pair.
+    assert 0 < len(scored) < len(selection) * len(manifest_elements) // 100
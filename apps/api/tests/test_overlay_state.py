@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from forge_api.schemas.patch import OverlayPatchReplaceElement, OverlayPatchUpdateStyle
+from forge_api.services import overlay_state
+from forge_api.services.forge_manifest import build_forge_manifest
+from forge_api.services.forge_overlay import (
+    append_overlay_patchset,
+    build_overlay_state,
+    load_overlay_custom_entries,
+    load_overlay_patch_log,
+    upsert_overlay_custom_entries,
+)
+
+
+def _full_replay(doc_id: str, manifest: dict) -> dict:
+    return build_overlay_state(
+        manifest,
+        load_overlay_patch_log(doc_id),
+        custom_entries=load_overlay_custom_entries(doc_id),
+    )
+
+
+def test_incremental_state_matches_full_replay(client: TestClient, upload_pdf, monkeypatch) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = build_forge_manifest(doc_id)
+    element_ids = [element["element_id"] for element in manifest["pages"][0]["elements"]]
+
+    rebuilds: list[str] = []
+    original = overlay_state.build_overlay_state
+
+    def _counting(*args, **kwargs):
+        rebuilds.append(doc_id)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(overlay_state, "build_overlay_state", _counting)
+
+    pages, version = overlay_state.load_overlay_pages(doc_id, manifest)
+    assert version == 0
+    assert pages == _full_replay(doc_id, manifest)
+    assert len(rebuilds) == 1
+
+    append_overlay_patchset(
+        doc_id,
+        [OverlayPatchReplaceElement(type="replace_element", element_id=element_ids[0], new_text="Changed")],
+    )
+    append_overlay_patchset(
+        doc_id,
+        [
+            OverlayPatchUpdateStyle(
+                type="update_style",
+                element_id=element_ids[1],
+                kind="text_run",
+                style={"color": "#ff0000"},
+            )
+        ],
+    )
+    upsert_overlay_custom_entries(
+        doc_id,
+        [{"element_id": "tr_custom", "page_index": 0, "bbox": [0.1, 0.1, 0.2, 0.2], "text": "Custom"}],
+    )
+    append_overlay_patchset(
+        doc_id,
+        [OverlayPatchReplaceElement(type="replace_element", element_id="tr_custom", new_text="Edited")],
+    )
+
+    pages, version = overlay_state.load_overlay_pages(doc_id, manifest)
+    assert version == 3
+    assert pages == _full_replay(doc_id, manifest)
+    assert len(rebuilds) == 1
+    masked = {mask["element_id"] for mask in pages[0]["masks"]}
+    assert masked == {element_ids[0], element_ids[1], "tr_custom"}
+
+    single, _ = overlay_state.load_overlay_pages(doc_id, manifest, [0])
+    assert single == {0: pages[0]}
+    assert len(rebuilds) == 1
+
+
+def test_changed_custom_entry_triggers_rebuild(client: TestClient, upload_pdf) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = build_forge_manifest(doc_id)
+    upsert_overlay_custom_entries(
+        doc_id,
+        [{"element_id": "tr_custom", "page_index": 0, "bbox": [0.1, 0.1, 0.2, 0.2], "text": "First"}],
+    )
+    overlay_state.load_overlay_pages(doc_id, manifest)
+
+    upsert_overlay_custom_entries(
+        doc_id,
+        [{"element_id": "tr_custom", "page_index": 0, "bbox": [0.1, 0.1, 0.2, 0.2], "text": "Second"}],
+    )
+    pages, _ = overlay_state.load_overlay_pages(doc_id, manifest, [0])
+    assert pages[0]["primitives"]["tr_custom"]["text"] == "Second"
+    assert pages == {0: _full_replay(doc_id, manifest)[0]}
+
+
+def test_losing_writer_leaves_the_committed_state_intact(
+    client: TestClient,
+    upload_pdf,
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = build_forge_manifest(doc_id)
+    element_id = manifest["pages"][0]["elements"][0]["element_id"]
+    overlay_state.load_overlay_pages(doc_id, manifest)
+    stale_head, stale_version = overlay_state._read_head(doc_id)
+
+    append_overlay_patchset(
+        doc_id,
+        [OverlayPatchReplaceElement(type="replace_element", element_id=element_id, new_text="Changed")],
+    )
+    overlay_state.load_overlay_pages(doc_id, manifest)
+    head, _ = overlay_state._read_head(doc_id)
+
+    # A writer that read the old head loses the swap and must not touch the winner's pages.
+    overlay_state._store_state(
+        doc_id,
+        manifest,
+        0,
+        {0: {"primitives": {}, "masks": []}},
+        {},
+        dict(stale_head["page_tokens"]),
+        stale_version,
+        dict(stale_head["page_tokens"]),
+    )
+    assert overlay_state._read_head(doc_id)[0] == head
+    state_dir = tmp_path / ".data" / "docs" / doc_id / "forge" / "overlay_state"
+    page_files = sorted(path.name for path in state_dir.glob("page_*.json"))
+    assert page_files == sorted(f"page_{idx}.{token}.json" for idx, token in head["page_tokens"].items())
+
+    monkeypatch.setattr(overlay_state, "_rebuild", None)
+    pages, version = overlay_state.load_overlay_pages(doc_id, manifest)
+    assert version == 1
+    assert pages == _full_replay(doc_id, manifest)
+
+
+def test_commits_only_touch_their_own_pages(client: TestClient, monkeypatch) -> None:
+    manifest = {
+        "generated_at_iso": "2024-01-01T00:00:00+00:00",
+        "pages": [
+            {
+                "page_index": page_index,
+                "elements": [
+                    {"element_id": f"p{page_index}_e{idx}", "bbox": [0.1, 0.2 * idx, 0.2, 0.2 * idx + 0.1], "text": "x"}
+                    for idx in range(3)
+                ],
+            }
+            for page_index in range(4)
+        ],
+    }
+    upsert_overlay_custom_entries(
+        "doc-pages",
+        [
+            {"element_id": f"tr_custom_{idx}", "page_index": idx, "bbox": [0.5, 0.5, 0.6, 0.6], "text": "Custom"}
+            for idx in range(4)
+        ],
+    )
+    overlay_state.load_overlay_pages("doc-pages", manifest)
+    head, _ = overlay_state._read_head("doc-pages")
+    assert set(head) == {"overlay_version", "manifest_generated_at_iso", "page_tokens"}
+
+    append_overlay_patchset(
+        "doc-pages",
+        [
+            OverlayPatchReplaceElement(type="replace_element", element_id="p2_e1", new_text="Changed"),
+            OverlayPatchReplaceElement(type="replace_element", element_id="tr_custom_2", new_text="Edited"),
+        ],
+    )
+    upsert_overlay_custom_entries(
+        "doc-pages",
+        [{"element_id": "tr_custom_extra", "page_index": 1, "bbox": [0.7, 0.7, 0.8, 0.8], "text": "Late"}],
+    )
+    read_pages: list[int] = []
+    custom_pages: list[int] = []
+    original_read = overlay_state._read_page
+    original_custom = overlay_state.load_overlay_custom_entries
+
+    def _recording_read(doc_id, page_index, token, styles=None):
+        read_pages.append(page_index)
+        return original_read(doc_id, page_index, token, styles)
+
+    def _recording_custom(doc_id, page_index=None):
+        custom_pages.append(page_index)
+        return original_custom(doc_id, page_index)
+
+    monkeypatch.setattr(overlay_state, "_read_page", _recording_read)
+    monkeypatch.setattr(overlay_state, "load_overlay_custom_entries", _recording_custom)
+    monkeypatch.setattr(overlay_state, "_rebuild", None)
+
+    pages, version = overlay_state.load_overlay_pages("doc-pages", manifest, [0])
+    assert version == 1
+    assert sorted(read_pages) == [0, 2]
+    assert sorted(custom_pages) == [0, 2]
+    assert pages == {0: _full_replay("doc-pages", manifest)[0]}
+
+    # The late entry on page 1 is picked up once page 1 is read.
+    monkeypatch.setattr(overlay_state, "load_overlay_custom_entries", original_custom)
+    assert overlay_state.load_overlay_pages("doc-pages", manifest)[0] == _full_replay("doc-pages", manifest)
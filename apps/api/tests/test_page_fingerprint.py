@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import fitz
+import pytest
+
+from forge_api.core.ir.fingerprint import fingerprint_page
+from forge_api.core.ir.normalize import normalize_page
+from forge_api.services.document_decoder import DocumentDecoder
+from forge_api.services.layer_cache import SharedLayerCache
+from forge_api.services.pdf_decode_v1 import decode_pdf_to_decoded_document
+from forge_api.settings import get_settings
+
+
+def _make_form_pdf(name: str) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=400)
+    page.draw_rect(fitz.Rect(40, 40, 360, 120), color=(0, 0, 0), width=1)
+    page.draw_line((40, 160), (360, 160), color=(0.2, 0.2, 0.2), width=0.5)
+    page.insert_text((50, 70), "Applicant name:", fontsize=12)
+    page.insert_text((50, 100), name, fontsize=12)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def _make_filled_form_pdf(value: str) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=400)
+    page.insert_text((50, 70), "Applicant name:", fontsize=12)
+    widget = fitz.Widget()
+    widget.field_name = "applicant"
+    widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    widget.rect = fitz.Rect(50, 80, 300, 100)
+    widget.field_value = value
+    page.add_widget(widget)
+    page.add_freetext_annot(fitz.Rect(50, 200, 300, 230), f"Reviewed: {value}", fontsize=11)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+@pytest.fixture()
+def layer_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> SharedLayerCache:
+    monkeypatch.setenv("FORGE_STORAGE_LOCAL_DIR", str(tmp_path / ".data"))
+    get_settings.cache_clear()
+    yield SharedLayerCache(max_entries=64)
+    get_settings.cache_clear()
+
+
+def test_template_fills_share_static_fingerprint() -> None:
+    first = fitz.open(stream=_make_form_pdf("Ada Lovelace"), filetype="pdf")
+    second = fitz.open(stream=_make_form_pdf("Alan Turing"), filetype="pdf")
+    try:
+        a = fingerprint_page(first[0])
+        b = fingerprint_page(second[0])
+    finally:
+        first.close()
+        second.close()
+
+    assert a.static_hash == b.static_hash
+    assert a.content_hash != b.content_hash
+
+
+def test_template_drawings_served_from_layer_cache(layer_cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    baseline = decode_pdf_to_decoded_document("doc-a", _make_form_pdf("Ada Lovelace"))
+    decode_pdf_to_decoded_document("doc-a", _make_form_pdf("Ada Lovelace"), layer_cache=layer_cache)
+
+    calls: list[int] = []
+    original = fitz.Page.get_drawings
+
+    def _counting_get_drawings(self, *args, **kwargs):
+        calls.append(self.number)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "get_drawings", _counting_get_drawings)
+    cached = decode_pdf_to_decoded_document("doc-b", _make_form_pdf("Alan Turing"), layer_cache=layer_cache)
+
+    assert calls == []
+    baseline_paths = [element for element in baseline.pages[0].elements if element.kind == "path"]
+    cached_paths = [element for element in cached.pages[0].elements if element.kind == "path"]
+    assert [element.content_hash for element in cached_paths] == [element.content_hash for element in baseline_paths]
+    assert any(element.kind == "text_run" and element.text == "Alan Turing" for element in cached.pages[0].elements)
+
+
+def test_identical_pages_reuse_ir_and_manifest(layer_cache, monkeypatch: pytest.MonkeyPatch) -> None:
+    pdf_bytes = _make_form_pdf("Ada Lovelace")
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        uncached = normalize_page("doc-a", 0, doc[0])
+        normalize_page("doc-a", 0, doc[0], layer_cache=layer_cache)
+        reused = normalize_page("doc-b", 0, doc[0], layer_cache=layer_cache)
+    finally:
+        doc.close()
+    assert [primitive.bbox for primitive in reused.primitives] == [primitive.bbox for primitive in uncached.primitives]
+    assert reused.primitives[0].signature_fields["doc_id"] == "doc-b"
+
+    decoder = DocumentDecoder(layer_cache=layer_cache)
+    first = decoder.decode_pdf(pdf_bytes)
+    monkeypatch.setattr(fitz.Page, "get_pixmap", lambda *args, **kwargs: pytest.fail("page was re-rendered"))
+    second = decoder.decode_pdf(pdf_bytes)
+
+    assert second["pages"][0]["elements"] == json.loads(json.dumps(first["pages"][0]["elements"]))
+    assert second["pages"][0]["background_png_bytes"] == first["pages"][0]["background_png_bytes"]
+
+
+def test_differently_filled_forms_do_not_share_cached_pages(layer_cache) -> None:
+    first_bytes = _make_filled_form_pdf("Ada Lovelace")
+    second_bytes = _make_filled_form_pdf("Alan Turing")
+    first = fitz.open(stream=first_bytes, filetype="pdf")
+    second = fitz.open(stream=second_bytes, filetype="pdf")
+    try:
+        assert fingerprint_page(first[0]).content_hash != fingerprint_page(second[0]).content_hash
+    finally:
+        first.close()
+        second.close()
+
+    decoder = DocumentDecoder(layer_cache=layer_cache)
+    decoder.decode_pdf(first_bytes)
+    cached = decoder.decode_pdf(second_bytes)["pages"][0]
+    uncached = DocumentDecoder().decode_pdf(second_bytes)["pages"][0]
+    assert cached["background_png_bytes"] == uncached["background_png_bytes"]
+    assert cached["elements"] == uncached["elements"]
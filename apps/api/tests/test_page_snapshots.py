@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.schemas.patch import OverlayPatchReplaceElement
+from forge_api.services import composite_ir, overlay_state
+from forge_api.services.forge_manifest import build_forge_manifest
+from forge_api.services.forge_overlay import (
+    append_overlay_patchset,
+    build_overlay_state,
+    load_overlay_custom_entries,
+    load_overlay_patch_log,
+)
+from forge_api.settings import get_settings
+
+
+@pytest.fixture()
+def snapshot_client(client: TestClient, monkeypatch) -> TestClient:
+    monkeypatch.setenv("FORGE_SNAPSHOT_INTERVAL", "3")
+    get_settings.cache_clear()
+    composite_ir.get_composite_cache.cache_clear()
+    yield client
+    get_settings.cache_clear()
+    composite_ir.get_composite_cache.cache_clear()
+
+
+def _data_dir(tmp_path: Path) -> Path:
+    return tmp_path / ".data"
+
+
+def _cold_composite(client: TestClient, doc_id: str, tmp_path: Path, monkeypatch) -> tuple[dict, list[int]]:
+    composite_ir.get_composite_cache.cache_clear()
+    (_data_dir(tmp_path) / "documents" / doc_id / "composite" / "page_0.json").unlink()
+    applied: list[int] = []
+
+    def _counting(page, ops, fonts=None):
+        applied.append(len(ops))
+        return apply_ops_to_page(page, ops, fonts)
+
+    monkeypatch.setattr(composite_ir, "apply_ops_to_page", _counting)
+    composite = client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+    monkeypatch.setattr(composite_ir, "apply_ops_to_page", apply_ops_to_page)
+    return composite, applied
+
+
+def test_cold_composite_replays_only_the_tail(
+    snapshot_client: TestClient,
+    upload_pdf,
+    tmp_path,
+    monkeypatch,
+    commit_text,
+    full_replay,
+) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    primitives = snapshot_client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    target = next(item["id"] for item in primitives if item["kind"] == "text")
+    for idx in range(7):
+        commit_text(snapshot_client, doc_id, target, f"Edit {idx}")
+
+    snapshots = _data_dir(tmp_path) / "documents" / doc_id / "composite" / "snapshots" / "page_0"
+    assert sorted(path.name for path in snapshots.iterdir()) == ["00000003.json", "00000006.json"]
+
+    composite, applied = _cold_composite(snapshot_client, doc_id, tmp_path, monkeypatch)
+    assert applied == [1]
+    assert composite == full_replay(doc_id)
+
+    # After reverting past a checkpoint the older one is used.
+    snapshot_client.post(f"/v1/patch/revert_last?doc_id={doc_id}")
+    snapshot_client.post(f"/v1/patch/revert_last?doc_id={doc_id}")
+    snapshot_client.get(f"/v1/composite/ir/{doc_id}?page=0")
+    composite, applied = _cold_composite(snapshot_client, doc_id, tmp_path, monkeypatch)
+    assert applied == [2]
+    assert composite == full_replay(doc_id)
+
+
+def test_overlay_rebuild_starts_from_the_newest_snapshot(snapshot_client: TestClient, upload_pdf, monkeypatch) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    manifest = build_forge_manifest(doc_id)
+    element_id = manifest["pages"][0]["elements"][0]["element_id"]
+    for idx in range(7):
+        append_overlay_patchset(
+            doc_id, [OverlayPatchReplaceElement(type="replace_element", element_id=element_id, new_text=f"v{idx}")]
+        )
+    # The first materialization replays from scratch and leaves a checkpoint at version 6.
+    overlay_state.load_overlay_pages(doc_id, manifest)
+
+    # A new manifest timestamp would invalidate snapshots too, so force a rebuild through the head instead.
+    monkeypatch.setattr(overlay_state, "_head_is_current", lambda *args: False)
+    replayed_from: list[int] = []
+    original = overlay_state.load_overlay_patchsets_since
+
+    def _recording(doc: str, version: int):
+        replayed_from.append(version)
+        return original(doc, version)
+
+    monkeypatch.setattr(overlay_state, "load_overlay_patchsets_since", _recording)
+    pages, version = overlay_state.load_overlay_pages(doc_id, manifest)
+
+    assert version == 7
+    assert replayed_from == [6]
+    expected = build_overlay_state(
+        manifest, load_overlay_patch_log(doc_id), custom_entries=load_overlay_custom_entries(doc_id)
+    )
+    assert pages == expected
+
+
+def test_snapshots_outside_the_lookback_are_pruned(
+    snapshot_client: TestClient,
+    upload_pdf,
+    tmp_path,
+    commit_text,
+) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    primitives = snapshot_client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    target = next(item["id"] for item in primitives if item["kind"] == "text")
+    manifest = build_forge_manifest(doc_id)
+    element_id = manifest["pages"][0]["elements"][0]["element_id"]
+    for idx in range(10):
+        commit_text(snapshot_client, doc_id, target, f"Edit {idx}")
+        append_overlay_patchset(
+            doc_id, [OverlayPatchReplaceElement(type="replace_element", element_id=element_id, new_text=f"v{idx}")]
+        )
+        overlay_state.load_overlay_pages(doc_id, manifest)
+
+    composite = _data_dir(tmp_path) / "documents" / doc_id / "composite" / "snapshots" / "page_0"
+    overlay = _data_dir(tmp_path) / "docs" / doc_id / "forge" / "overlay_state" / "snapshots"
+    assert sorted(path.name for path in composite.iterdir()) == ["00000006.json", "00000009.json"]
+    assert sorted(path.name for path in overlay.iterdir()) == ["00000006.json", "00000009.json"]
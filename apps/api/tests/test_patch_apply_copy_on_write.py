@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from forge_api.core.patch.apply import apply_ops_to_page
+from forge_api.schemas.ir import IRPage, IRPrimitive
+from forge_api.schemas.patch import PatchReplaceText, PatchSetStyle
+
+
+def _page() -> IRPage:
+    primitives = [
+        IRPrimitive(
+            id=f"t{idx}",
+            kind="text",
+            bbox=[10.0, 30.0 * idx, 200.0, 30.0 * idx + 20.0],
+            z_index=idx,
+            style={"font": "helv", "size": 12.0, "color": 0},
+            signature_fields={"ops": [idx]},
+            text=f"Line {idx}",
+        )
+        for idx in range(5)
+    ]
+    primitives.append(
+        IRPrimitive(
+            id="path",
+            kind="path",
+            bbox=[0.0, 400.0, 100.0, 420.0],
+            z_index=5,
+            style={"stroke_color": "#000000", "stroke_width": 1.0},
+            signature_fields={},
+        )
+    )
+    return IRPage(doc_id="doc", page_index=0, width_pt=612.0, height_pt=792.0, rotation=0, primitives=primitives)
+
+
+def test_untouched_primitives_are_shared_and_input_is_unchanged() -> None:
+    page = _page()
+    before = page.model_dump()
+
+    patched, results = apply_ops_to_page(
+        page,
+        [
+            PatchReplaceText(op="replace_text", target_id="t1", new_text="Edited", policy="FIT_IN_BOX"),
+            PatchReplaceText(op="replace_text", target_id="t1", new_text="Edited twice", policy="FIT_IN_BOX"),
+            PatchSetStyle(op="set_style", target_id="path", stroke_color=[1.0, 0.0, 0.0]),
+        ],
+    )
+
+    assert all(result.ok for result in results)
+    assert page.model_dump() == before
+    for original, patched_primitive in zip(page.primitives, patched.primitives):
+        if original.id in {"t1", "path"}:
+            assert patched_primitive is not original
+            assert patched_primitive.style is not original.style
+        else:
+            assert patched_primitive is original
+    assert patched.primitives[1].text == "Edited twice"
+    assert patched.primitives[5].style["stroke_color"] == [1.0, 0.0, 0.0]
+
+
+def test_result_matches_deep_copy_application() -> None:
+    page = _page()
+    ops = [
+        PatchReplaceText(op="replace_text", target_id="t3", new_text="A much longer replacement", policy="FIT_IN_BOX"),
+        PatchSetStyle(op="set_style", target_id="t0", fill_color=[0.0, 1.0, 0.0]),
+    ]
+    patched, _ = apply_ops_to_page(page, ops)
+    replayed, _ = apply_ops_to_page(page.model_copy(deep=True), ops)
+    assert patched.model_dump() == replayed.model_dump()
+    # set_style on a text primitive is ignored and must not clone it.
+    assert patched.primitives[0] is page.primitives[0]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import fitz
+from fastapi.testclient import TestClient
+
+from forge_api.routers import patches as patches_router
+from forge_api.schemas.patch import PatchsetRecord
+from forge_api.services import patch_store
+from forge_api.services.storage import LocalStorageDriver
+
+
+def _upload_pages(client: TestClient, pages: int) -> str:
+    doc = fitz.open()
+    for idx in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"Acme Corp page {idx}", fontsize=12, fontname="helv")
+    data = doc.tobytes()
+    doc.close()
+    response = client.post("/v1/documents/upload", files={"file": ("bulk.pdf", data, "application/pdf")})
+    return response.json()["document"]["doc_id"]
+
+
+def _text_id(client: TestClient, doc_id: str, page_index: int) -> str:
+    primitives = client.get(f"/v1/ir/{doc_id}?page={page_index}").json()["primitives"]
+    return next(item["id"] for item in primitives if item["kind"] == "text")
+
+
+def _patchset(target_id: str, page_index: int, text: str) -> dict:
+    return {
+        "ops": [{"op": "replace_text", "target_id": target_id, "new_text": text, "policy": "FIT_IN_BOX"}],
+        "page_index": page_index,
+        "selected_ids": [target_id],
+    }
+
+
+def test_bulk_commit_appends_every_page_in_one_write(client: TestClient, monkeypatch) -> None:
+    doc_id = _upload_pages(client, 3)
+    targets = [_text_id(client, doc_id, page_index) for page_index in range(3)]
+
+    writes: list[str] = []
+    original = LocalStorageDriver.put_bytes_if_match
+
+    def _recording(self, key, data, expected_version, content_type=None):
+        writes.append(key)
+        return original(self, key, data, expected_version, content_type=content_type)
+
+    monkeypatch.setattr(LocalStorageDriver, "put_bytes_if_match", _recording)
+    response = client.post(
+        "/v1/patch/commit_bulk",
+        json={
+            "doc_id": doc_id,
+            "patchsets": [_patchset(target, idx, f"Forge Inc page {idx}") for idx, target in enumerate(targets)],
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [record["page_index"] for record in body["patchsets"]] == [0, 1, 2]
+    assert len(body["applied_ops"]) == 3
+    assert writes == [f"documents/{doc_id}/patches.json"]
+
+    log = patch_store.load_patch_log(doc_id)
+    assert [record.patchset_id for record in log] == [record["patchset_id"] for record in body["patchsets"]]
+    for idx, target in enumerate(targets):
+        composite = client.get(f"/v1/composite/ir/{doc_id}?page={idx}").json()
+        assert next(item for item in composite["primitives"] if item["id"] == target)["text"] == f"Forge Inc page {idx}"
+
+
+def test_bulk_commit_is_all_or_nothing(client: TestClient) -> None:
+    doc_id = _upload_pages(client, 2)
+    target = _text_id(client, doc_id, 0)
+
+    response = client.post(
+        "/v1/patch/commit_bulk",
+        json={
+            "doc_id": doc_id,
+            "patchsets": [_patchset(target, 0, "Renamed"), _patchset("missing", 1, "Renamed")],
+        },
+    )
+    assert response.status_code == 409
+    assert patch_store.load_patch_log(doc_id) == []
+
+    duplicate = client.post(
+        "/v1/patch/commit_bulk",
+        json={"doc_id": doc_id, "patchsets": [_patchset(target, 0, "A"), _patchset(target, 0, "B")]},
+    )
+    assert duplicate.status_code == 400
+    assert duplicate.json()["error"] == "duplicate_page"
+
+
+def test_bulk_commit_fails_whole_when_one_page_changed_after_validation(client: TestClient, monkeypatch) -> None:
+    doc_id = _upload_pages(client, 2)
+    targets = [_text_id(client, doc_id, page_index) for page_index in range(2)]
+    rival = PatchsetRecord(patchset_id="rival", created_at_iso=datetime.now(timezone.utc), ops=[], page_index=1)
+    prepare = patches_router._prepare_commit
+
+    def _racing_prepare(doc_id_arg, patchset, *args):
+        prepared = prepare(doc_id_arg, patchset, *args)
+        if patchset.page_index == 1:
+            # A single-page commit lands on page 1 after the batch validated it.
+            patch_store.append_patchset_records(doc_id, [rival])
+        return prepared
+
+    monkeypatch.setattr(patches_router, "_prepare_commit", _racing_prepare)
+    response = client.post(
+        "/v1/patch/commit_bulk",
+        json={"doc_id": doc_id, "patchsets": [_patchset(target, idx, "Late") for idx, target in enumerate(targets)]},
+    )
+    assert response.status_code == 409
+    body = response.json()
+    assert body["error"] == "COMMIT_CONTENTION"
+    assert body["details"]["page_indexes"] == [1]
+    assert [record.patchset_id for record in patch_store.load_patch_log(doc_id)] == ["rival"]
+    composite = client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+    assert next(item for item in composite["primitives"] if item["id"] == targets[0])["text"] != "Late"
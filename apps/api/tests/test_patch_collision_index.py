@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import random
+
+import fitz
+
+from forge_api.core.patch.apply import COLLISION_MARGIN, CollisionIndex, _bbox_overlaps, apply_ops_to_page
+from forge_api.schemas.ir import IRPage, IRPrimitive
+from forge_api.schemas.patch import PatchReplaceText
+
+
+def _text(idx: int, bbox: list[float]) -> IRPrimitive:
+    return IRPrimitive(
+        id=f"t{idx}",
+        kind="text",
+        bbox=bbox,
+        z_index=idx,
+        style={"font": "helv", "size": 10.0, "color": 0},
+        signature_fields={},
+        text="word",
+    )
+
+
+def test_index_agrees_with_a_full_scan() -> None:
+    rng = random.Random(9)
+    primitives = []
+    for idx in range(400):
+        x0, y0 = rng.uniform(-20, 600), rng.uniform(-20, 780)
+        primitives.append(_text(idx, [x0, y0, x0 + rng.uniform(1, 200), y0 + rng.uniform(1, 30)]))
+    index = CollisionIndex(primitives, 612.0, 792.0)
+
+    for _ in range(300):
+        x0, y0 = rng.uniform(-50, 650), rng.uniform(-50, 820)
+        candidate = [x0, y0, x0 + rng.uniform(1, 150), y0 + rng.uniform(1, 20)]
+        target = f"t{rng.randrange(400)}"
+        expected = any(
+            primitive.id != target and _bbox_overlaps(candidate, primitive.bbox, COLLISION_MARGIN)
+            for primitive in primitives
+        )
+        assert index.collides(candidate, target, COLLISION_MARGIN) is expected
+
+
+def test_index_follows_moved_primitives() -> None:
+    primitives = [_text(0, [10.0, 10.0, 40.0, 20.0]), _text(1, [300.0, 300.0, 320.0, 310.0])]
+    index = CollisionIndex(primitives, 612.0, 792.0)
+    assert index.collides([500.0, 500.0, 520.0, 510.0], "t0", COLLISION_MARGIN) is False
+
+    moved = primitives[1].model_copy(update={"bbox": [490.0, 495.0, 530.0, 505.0]})
+    index.move(1, primitives[1].bbox, moved.bbox)
+    primitives[1] = moved
+    assert index.collides([500.0, 500.0, 520.0, 510.0], "t0", COLLISION_MARGIN) is True
+    assert index.collides([300.0, 300.0, 320.0, 310.0], "t0", COLLISION_MARGIN) is False
+
+
+def test_bulk_replacements_expand_around_neighbours() -> None:
+    text = "Replacement text that needs more room"
+    width = fitz.get_text_length(text, fontname="helv", fontsize=7.0) / 1.3
+    primitives = []
+    for row in range(40):
+        y0 = 10.0 + row * 18.0
+        primitives.append(_text(2 * row, [10.0, y0, 10.0 + width, y0 + 12.0]))
+        # Every other row has a neighbour inside the expansion zone.
+        x0 = 10.0 + width + 5.0 if row % 2 else 400.0
+        primitives.append(_text(2 * row + 1, [x0, y0, x0 + 20.0, y0 + 12.0]))
+    page = IRPage(doc_id="doc", page_index=0, width_pt=612.0, height_pt=792.0, rotation=0, primitives=primitives)
+    ops = [
+        PatchReplaceText(op="replace_text", target_id=f"t{2 * row}", new_text=text, policy="FIT_IN_BOX")
+        for row in range(40)
+    ]
+    _, results = apply_ops_to_page(page, ops)
+    assert [result.ok for result in results] == [row % 2 == 0 for row in range(40)]
@@ -1,6 +1,14 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
+
+import pytest
+
 from forge_api.core.patch.selection import compute_content_hash
+from forge_api.routers import patches as patches_router
+from forge_api.schemas.patch import PatchsetRecord
+from forge_api.services.patch_store import append_patchset_records, load_patch_log
+from forge_api.settings import get_settings
 
 
 def test_commit_patch_out_of_scope(client, upload_pdf):
@@ -104,3 +112,43 @@ def test_commit_patch_content_conflict(client, upload_pdf):
     assert commit_response.status_code == 409
     payload = commit_response.json()
     assert payload["error"] == "PATCH_CONFLICT"
+
+
+@pytest.mark.parametrize("driver", ["json", "sqlite"])
+def test_commit_rejects_a_page_that_changed_after_validation(client, upload_pdf, commit_text, monkeypatch, driver):
+    monkeypatch.setenv("FORGE_PATCH_STORE_DRIVER", driver)
+    get_settings.cache_clear()
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    base_ir = client.get(f"/v1/ir/{doc_id}?page=0").json()
+    text_item = next(item for item in base_ir["primitives"] if item["kind"] == "text")
+    rival = PatchsetRecord(patchset_id="rival", created_at_iso=datetime.now(timezone.utc), ops=[], page_index=0)
+    prepare = patches_router._prepare_commit
+
+    def _racing_prepare(*args, **kwargs):
+        prepared = prepare(*args, **kwargs)
+        # Another writer commits to the same page between validation and the append.
+        append_patchset_records(doc_id, [rival])
+        return prepared
+
+    monkeypatch.setattr(patches_router, "_prepare_commit", _racing_prepare)
+    response = client.post(
+        "/v1/patch/commit",
+        json={
+            "doc_id": doc_id,
+            "patchset": {
+                "ops": [
+                    {"op": "replace_text", "target_id": text_item["id"], "new_text": "Late", "policy": "FIT_IN_BOX"}
+                ],
+                "page_index": 0,
+                "selected_ids": [text_item["id"]],
+            },
+        },
+    )
+    assert response.status_code == 409
+    assert response.json()["error"] == "COMMIT_CONTENTION"
+    assert [record.patchset_id for record in load_patch_log(doc_id)] == ["rival"]
+
+    monkeypatch.setattr(patches_router, "_prepare_commit", prepare)
+    commit_text(client, doc_id, text_item["id"], "Retried")
+    assert [record.patchset_id for record in load_patch_log(doc_id)][0] == "rival"
+    get_settings.cache_clear()
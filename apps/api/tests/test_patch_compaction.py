@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import fitz
+from fastapi.testclient import TestClient
+
+from forge_api.schemas.patch import PatchReplaceText, PatchSetStyle
+from forge_api.services import composite_ir
+from forge_api.services.patch_compaction import compact_patch_log, maybe_schedule_compaction, squash_ops
+from forge_api.services.patch_store import load_patch_archive, load_patch_log
+from forge_api.services.redecode import get_redecode_scheduler
+from forge_api.settings import get_settings
+
+
+def _composite(client: TestClient, doc_id: str) -> dict:
+    return client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+
+
+def _text_ids(client: TestClient, doc_id: str) -> list[str]:
+    primitives = client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    return [item["id"] for item in primitives if item["kind"] == "text"]
+
+
+def test_squash_keeps_last_text_and_merges_styles() -> None:
+    ops = [
+        PatchReplaceText(op="replace_text", target_id="a", new_text="one", policy="FIT_IN_BOX"),
+        PatchSetStyle(op="set_style", target_id="p", stroke_width_pt=2.0),
+        PatchReplaceText(op="replace_text", target_id="a", new_text="two", policy="FIT_IN_BOX"),
+        PatchSetStyle(op="set_style", target_id="p", opacity=0.5),
+    ]
+    squashed = squash_ops(ops)
+    assert [(op.op, op.target_id) for op in squashed] == [("replace_text", "a"), ("set_style", "p")]
+    assert squashed[0].new_text == "two"
+    assert (squashed[1].stroke_width_pt, squashed[1].opacity) == (2.0, 0.5)
+
+
+def test_compaction_preserves_composite_and_revert_history(
+    client: TestClient,
+    upload_pdf,
+    commit_text,
+    full_replay,
+) -> None:
+    composite_ir.get_composite_cache.cache_clear()
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    first, second = _text_ids(client, doc_id)[:2]
+    for idx in range(4):
+        commit_text(client, doc_id, first, f"Edit {idx}")
+    commit_text(client, doc_id, second, "Other")
+    commit_text(client, doc_id, first, "Final")
+    original = load_patch_log(doc_id)
+    before = _composite(client, doc_id)
+
+    result = compact_patch_log(doc_id, keep_tail=1)
+    assert result.compacted_patchsets == 5
+    compacted = load_patch_log(doc_id)
+    assert len(compacted) == 2
+    assert compacted[0].archive_id == result.archive_id
+    assert [op.new_text for op in compacted[0].ops] == ["Edit 3", "Other"]
+    assert [record.patchset_id for record in load_patch_archive(doc_id, result.archive_id)] == [
+        record.patchset_id for record in original[:5]
+    ]
+    assert _composite(client, doc_id) == before
+
+    # Reverting into the compacted record restores the archived originals, one patchset at a time.
+    for remaining in range(len(original) - 1, -1, -1):
+        reverted = client.post(f"/v1/patch/revert_last?doc_id={doc_id}").json()["patchsets"]
+        if remaining < 5:
+            assert [item["patchset_id"] for item in reverted] == [record.patchset_id for record in original[:remaining]]
+        assert _composite(client, doc_id) == full_replay(doc_id, original[:remaining])
+    composite_ir.get_composite_cache.cache_clear()
+
+
+def test_pages_whose_squash_changes_the_result_are_kept(
+    client: TestClient,
+    upload_pdf,
+    monkeypatch,
+    commit_text,
+) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    item = next(item for item in client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"] if item["kind"] == "text")
+    size = item["style"]["size"]
+    width = item["bbox"][2] - item["bbox"][0]
+    longer = item["text"]
+    while fitz.get_text_length(longer, fontname="helv", fontsize=size) <= width * 1.1:
+        longer += "x"
+    # The longer edit shrinks the font, and the next edit starts from the shrunken size.
+    commit_text(client, doc_id, item["id"], longer)
+    commit_text(client, doc_id, item["id"], item["text"][:3])
+    original = load_patch_log(doc_id)
+    assert original[0].results[0].font_adjusted is True
+
+    result = compact_patch_log(doc_id, keep_tail=0)
+    assert result.unchanged_pages == [0]
+    assert result.compacted_patchsets == 0
+    kept = load_patch_log(doc_id)
+    assert [record.patchset_id for record in kept] == [record.patchset_id for record in original]
+
+    # The scanned prefix is marked, so the next commit does not queue the same replay again.
+    assert {record.archive_id for record in kept} == {result.archive_id}
+    monkeypatch.setenv("FORGE_PATCH_COMPACT_THRESHOLD", "2")
+    get_settings.cache_clear()
+    assert maybe_schedule_compaction(doc_id, original) is True
+    assert get_redecode_scheduler().drain(timeout=10)
+    assert maybe_schedule_compaction(doc_id, kept) is False
+    reverted = client.post(f"/v1/patch/revert_last?doc_id={doc_id}").json()["patchsets"]
+    assert [item["patchset_id"] for item in reverted] == [original[0].patchset_id]
+    get_settings.cache_clear()
+
+
+def test_commits_past_the_threshold_compact_in_the_background(
+    client: TestClient,
+    upload_pdf,
+    monkeypatch,
+    commit_text,
+) -> None:
+    monkeypatch.setenv("FORGE_PATCH_COMPACT_THRESHOLD", "4")
+    monkeypatch.setenv("FORGE_PATCH_COMPACT_KEEP_TAIL", "1")
+    get_settings.cache_clear()
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    target = _text_ids(client, doc_id)[0]
+    for idx in range(4):
+        commit_text(client, doc_id, target, f"Edit {idx}")
+
+    assert get_redecode_scheduler().drain(timeout=10)
+    patchsets = load_patch_log(doc_id)
+    assert len(patchsets) == 2
+    assert patchsets[0].archive_id is not None
+    assert patchsets[-1].archive_id is None
+    get_settings.cache_clear()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from forge_api.services.patch_store import load_patch_log
+from forge_api.settings import get_settings
+
+
+def _doc_with_commits(client: TestClient, upload_pdf, commit_text, count: int) -> tuple[str, list[str]]:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    primitives = client.get(f"/v1/ir/{doc_id}?page=0").json()["primitives"]
+    target = next(item["id"] for item in primitives if item["kind"] == "text")
+    ids = [commit_text(client, doc_id, target, f"Edit {idx}")["patchset"]["patchset_id"] for idx in range(count)]
+    return doc_id, ids
+
+
+def test_commit_returns_only_the_new_record(client: TestClient, upload_pdf, commit_text) -> None:
+    doc_id, ids = _doc_with_commits(client, upload_pdf, commit_text, 3)
+    body = commit_text(client, doc_id, load_patch_log(doc_id)[0].ops[0].target_id, "Edit 3")
+    assert set(body) == {"patchset", "version", "applied_ops", "rejected_ops"}
+    assert body["version"] == 4
+    assert body["patchset"]["patchset_id"] == load_patch_log(doc_id)[-1].patchset_id
+
+
+def test_cursor_pages_cover_the_log_in_order(client: TestClient, upload_pdf, commit_text) -> None:
+    doc_id, ids = _doc_with_commits(client, upload_pdf, commit_text, 5)
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        body = client.get(f"/v1/patches/{doc_id}", params=params).json()
+        assert body["version"] == 5
+        assert len(body["patchsets"]) <= 2
+        seen.extend(record["patchset_id"] for record in body["patchsets"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids
+
+    unpaged = client.get(f"/v1/patches/{doc_id}").json()
+    assert [record["patchset_id"] for record in unpaged["patchsets"]] == ids
+    assert unpaged["next_cursor"] is None
+
+
+def test_since_returns_newer_records_and_expires_after_revert(client: TestClient, upload_pdf, commit_text) -> None:
+    doc_id, ids = _doc_with_commits(client, upload_pdf, commit_text, 3)
+
+    body = client.get(f"/v1/patches/{doc_id}", params={"since": ids[0]}).json()
+    assert [record["patchset_id"] for record in body["patchsets"]] == ids[1:]
+    assert client.get(f"/v1/patches/{doc_id}", params={"since": ids[-1]}).json()["patchsets"] == []
+
+    reverted = client.post(f"/v1/patch/revert_last?doc_id={doc_id}").json()
+    # Revisions keep counting through reverts, so a later commit never reuses an earlier version.
+    assert reverted["version"] == 4
+    expired = client.get(f"/v1/patches/{doc_id}", params={"since": ids[-1]})
+    assert expired.status_code == 410
+    assert expired.json()["error"] == "PATCH_CURSOR_EXPIRED"
+
+    both = client.get(f"/v1/patches/{doc_id}", params={"since": ids[0], "cursor": ids[0]})
+    assert both.status_code == 400
+
+    again = commit_text(client, doc_id, load_patch_log(doc_id)[0].ops[0].target_id, "Edit 3")
+    assert again["version"] == 5
+
+
+def test_logs_without_a_revision_start_from_their_length(client: TestClient, upload_pdf, commit_text) -> None:
+    doc_id, ids = _doc_with_commits(client, upload_pdf, commit_text, 2)
+    log_path = Path(get_settings().FORGE_STORAGE_LOCAL_DIR) / "documents" / doc_id / "patches.json"
+    log_path.write_text(json.dumps(json.loads(log_path.read_text())["patchsets"]))
+
+    assert client.get(f"/v1/patches/{doc_id}").json()["version"] == 2
+    body = commit_text(client, doc_id, load_patch_log(doc_id)[0].ops[0].target_id, "Edit 2")
+    assert body["version"] == 3
+    assert [record.patchset_id for record in load_patch_log(doc_id)][:2] == ids
+
+
+def test_sqlite_store_pages_by_seq(client: TestClient, upload_pdf, monkeypatch, commit_text) -> None:
+    monkeypatch.setenv("FORGE_PATCH_STORE_DRIVER", "sqlite")
+    get_settings.cache_clear()
+    doc_id, ids = _doc_with_commits(client, upload_pdf, commit_text, 4)
+
+    first = client.get(f"/v1/patches/{doc_id}", params={"limit": 3}).json()
+    assert [record["patchset_id"] for record in first["patchsets"]] == ids[:3]
+    assert first["version"] == 4
+    assert first["next_cursor"] == ids[2]
+    rest = client.get(f"/v1/patches/{doc_id}", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert [record["patchset_id"] for record in rest["patchsets"]] == ids[3:]
+    assert rest["next_cursor"] is None
+
+    missing = client.get(f"/v1/patches/{doc_id}", params={"since": "gone"})
+    assert missing.status_code == 410
+    get_settings.cache_clear()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Thread
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.patch.selection import compute_content_hash
+from forge_api.schemas.patch import PatchsetRecord
+from forge_api.services.patch_store import append_patchset, load_page_patchsets, load_patch_log, revert_last_patchset
+from forge_api.services.patch_store_sqlite import SQLitePatchStore
+from forge_api.services.storage import LocalStorageDriver, S3StorageDriver, get_patch_storage
+from forge_api.settings import get_settings
+
+
+@pytest.fixture()
+def sqlite_client(client: TestClient, monkeypatch) -> TestClient:
+    monkeypatch.setenv("FORGE_PATCH_STORE_DRIVER", "sqlite")
+    get_settings.cache_clear()
+    yield client
+    get_settings.cache_clear()
+
+
+def _record(page_index: int, patchset_id: str) -> PatchsetRecord:
+    return PatchsetRecord(
+        patchset_id=patchset_id,
+        created_at_iso=datetime.now(timezone.utc),
+        ops=[],
+        page_index=page_index,
+    )
+
+
+def test_commit_composite_and_revert_through_sqlite(sqlite_client: TestClient, upload_pdf, tmp_path: Path) -> None:
+    doc_id = upload_pdf("contract").json()["document"]["doc_id"]
+    base = sqlite_client.get(f"/v1/ir/{doc_id}?page=0").json()
+    text_item = next(item for item in base["primitives"] if item["kind"] == "text")
+
+    commit = sqlite_client.post(
+        "/v1/patch/commit",
+        json={
+            "doc_id": doc_id,
+            "allowed_targets": [
+                {
+                    "element_id": text_item["id"],
+                    "page_index": 0,
+                    "content_hash": compute_content_hash(text_item.get("text")),
+                    "bbox": text_item["bbox"],
+                    "parent_id": None,
+                }
+            ],
+            "patchset": {
+                "ops": [
+                    {"op": "replace_text", "target_id": text_item["id"], "new_text": "Updated", "policy": "FIT_IN_BOX"}
+                ],
+                "page_index": 0,
+                "selected_ids": [text_item["id"]],
+            },
+        },
+    )
+    assert commit.status_code == 200
+    assert (tmp_path / ".data" / "patches.sqlite3").exists()
+    assert not (tmp_path / ".data" / "documents" / doc_id / "patches.json").exists()
+
+    composite = sqlite_client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+    assert next(item for item in composite["primitives"] if item["id"] == text_item["id"])["text"] == "Updated"
+    assert len(sqlite_client.get(f"/v1/patches/{doc_id}").json()["patchsets"]) == 1
+
+    reverted = sqlite_client.post(f"/v1/patch/revert_last?doc_id={doc_id}")
+    assert reverted.json()["patchsets"] == []
+    composite = sqlite_client.get(f"/v1/composite/ir/{doc_id}?page=0").json()
+    assert next(item for item in composite["primitives"] if item["id"] == text_item["id"])["text"] == text_item["text"]
+
+
+def test_page_reads_and_revert_are_ordered(sqlite_client: TestClient, monkeypatch) -> None:
+    for idx in range(6):
+        append_patchset("doc-a", [], idx % 2, None, None, [], [])
+    append_patchset("doc-b", [], 0, None, None, [], [])
+
+    page_zero = load_page_patchsets("doc-a", 0)
+    full = load_patch_log("doc-a")
+    assert [record.patchset_id for record in page_zero] == [record.patchset_id for record in full[0::2]]
+
+    # A plain revert deletes the last row instead of rewriting the log.
+    monkeypatch.setattr(SQLitePatchStore, "update", None)
+    remaining = revert_last_patchset("doc-a")
+    assert remaining.version == 7
+    assert [record.patchset_id for record in remaining.patchsets] == [record.patchset_id for record in full[:-1]]
+    assert len(load_page_patchsets("doc-a", 1)) == 2
+    assert len(load_patch_log("doc-b")) == 1
+
+
+def test_concurrent_appends_get_distinct_sequence_numbers(tmp_path: Path) -> None:
+    store = SQLitePatchStore(tmp_path / "patches.sqlite3")
+
+    def _append(worker: int) -> None:
+        for idx in range(20):
+            store.append("doc", _record(worker, f"{worker}-{idx}"))
+
+    threads = [Thread(target=_append, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records = store.load("doc")
+    assert len(records) == 80
+    assert len({record.patchset_id for record in records}) == 80
+    assert [record.patchset_id for record in store.load_page("doc", 2)] == [f"2-{idx}" for idx in range(20)]
+
+
+def test_revert_last_leaves_compacted_rows_to_the_caller(tmp_path: Path) -> None:
+    store = SQLitePatchStore(tmp_path / "patches.sqlite3")
+    store.append_many("doc", [_record(0, "a"), _record(0, "b").model_copy(update={"archive_id": "run"})])
+
+    assert store.revert_last("doc") is None
+    assert [record.patchset_id for record in store.load("doc")] == ["a", "b"]
+    store.replace("doc", [_record(0, "a")])
+    assert store.revert_last("doc") == 3
+    assert store.load("doc") == []
+    assert store.revert_last("doc") == 3
+
+
+def test_other_patch_artifacts_follow_the_storage_driver(sqlite_client: TestClient, monkeypatch) -> None:
+    assert isinstance(get_patch_storage(), LocalStorageDriver)
+
+    for name, value in {
+        "FORGE_STORAGE_DRIVER": "s3",
+        "FORGE_S3_BUCKET": "forge-test",
+        "FORGE_S3_ACCESS_KEY": "key",
+        "FORGE_S3_SECRET_KEY": "secret",
+        "FORGE_S3_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    assert isinstance(get_patch_storage(), S3StorageDriver)
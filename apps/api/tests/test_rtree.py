@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.ir.columnar import ColumnarPage
+from forge_api.core.ir.rtree import PackedRTree
+from forge_api.core.ir.spatial_index import SPATIAL_INDEX_KINDS, build_spatial_index, hit_test_point, hit_test_rect
+from forge_api.schemas.ir import IRPage, IRPrimitive
+from forge_api.services.ir_index import get_page_index_cache
+from forge_api.settings import get_settings
+
+
+def _random_boxes(count: int, seed: int = 7) -> list[tuple[float, float, float, float]]:
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(count):
+        x0 = rng.uniform(0, 600)
+        y0 = rng.uniform(0, 800)
+        boxes.append((x0, y0, x0 + rng.uniform(1, 80), y0 + rng.uniform(1, 20)))
+    boxes.append((0.0, 0.0, 612.0, 792.0))
+    return boxes
+
+
+def _intersects(box, x0, y0, x1, y1) -> bool:
+    return not (box[2] < x0 or box[0] > x1 or box[3] < y0 or box[1] > y1)
+
+
+def _box_distance(box, x, y) -> float:
+    dx = max(box[0] - x, 0.0, x - box[2])
+    dy = max(box[1] - y, 0.0, y - box[3])
+    return dx * dx + dy * dy
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 700])
+def test_rtree_matches_brute_force(count: int) -> None:
+    boxes = _random_boxes(count)[:count]
+    tree = PackedRTree.from_boxes(boxes, node_size=8)
+    rng = random.Random(count)
+    for _ in range(50):
+        x0, x1 = sorted((rng.uniform(0, 620), rng.uniform(0, 620)))
+        y0, y1 = sorted((rng.uniform(0, 800), rng.uniform(0, 800)))
+        assert tree.query_rect(x0, y0, x1, y1) == [i for i, box in enumerate(boxes) if _intersects(box, x0, y0, x1, y1)]
+        assert tree.query_contained(x0, y0, x1, y1) == [
+            i for i, box in enumerate(boxes) if box[0] >= x0 and box[1] >= y0 and box[2] <= x1 and box[3] <= y1
+        ]
+        assert tree.query_point(x0, y0) == [i for i, box in enumerate(boxes) if _intersects(box, x0, y0, x0, y0)]
+        nearest = tree.nearest(x0, y0, k=5)
+        expected = sorted(_box_distance(box, x0, y0) for box in boxes)[:5]
+        assert [_box_distance(boxes[i], x0, y0) for i in nearest] == expected
+
+
+def test_rtree_payload_round_trip() -> None:
+    tree = PackedRTree.from_boxes(_random_boxes(300))
+    restored = PackedRTree.from_payload(tree.to_payload())
+    assert restored.query_rect(100, 100, 300, 300) == tree.query_rect(100, 100, 300, 300)
+    assert restored.nearest(50, 50, k=3) == tree.nearest(50, 50, k=3)
+
+
+def test_hittest_with_rtree_index(client: TestClient, upload_pdf, monkeypatch: pytest.MonkeyPatch) -> None:
+    doc_id = upload_pdf("overlap").json()["document"]["doc_id"]
+    get_page_index_cache.cache_clear()
+    grid = client.post(f"/v1/hittest/{doc_id}?page=0", json={"point": {"x": 160.0, "y": 160.0}}).json()
+
+    monkeypatch.setenv("FORGE_SPATIAL_INDEX", "rtree")
+    get_settings.cache_clear()
+    get_page_index_cache.cache_clear()
+    try:
+        rtree = client.post(f"/v1/hittest/{doc_id}?page=0", json={"point": {"x": 160.0, "y": 160.0}}).json()
+        rect = client.post(
+            f"/v1/hittest/{doc_id}?page=0",
+            json={"rect": {"x0": 140.0, "y0": 140.0, "x1": 230.0, "y1": 230.0}},
+        ).json()
+    finally:
+        get_page_index_cache.cache_clear()
+
+    assert rtree["candidates"][0]["id"] == grid["candidates"][0]["id"]
+    assert len(rect["candidates"]) >= 2
+
+
+class _EveryPrimitive:
+    """Reference index that offers every primitive as a candidate."""
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+    def candidate_indices_for_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        return list(range(self.count))
+
+
+def _edge_case_page() -> ColumnarPage:
+    rng = random.Random(11)
+    boxes = _random_boxes(300)
+    z_indexes = [rng.randint(0, 3) for _ in boxes] + [1] * 6
+    boxes += [
+        (100.0, 300.0, 400.0, 300.0),  # zero-height rule
+        (100.0, 300.0, 400.0, 300.0),  # duplicate: ties fall back to page order
+        (580.0, 760.0, 700.0, 900.0),  # reaches past the page edge
+        (-40.0, -40.0, -10.0, -10.0),  # entirely off the page
+        (200.0, 200.0, 250.0, 250.0),
+        (250.0, 250.0, 300.0, 300.0),  # touches the previous box at one corner
+    ]
+    primitives = [
+        IRPrimitive(
+            id=f"p{idx}",
+            kind="path",
+            bbox=list(box),
+            z_index=z_indexes[idx],
+            style={},
+            signature_fields={},
+        )
+        for idx, box in enumerate(boxes)
+    ]
+    page = IRPage(doc_id="doc", page_index=0, width_pt=612.0, height_pt=792.0, rotation=0, primitives=primitives)
+    return ColumnarPage.from_ir_page(page)
+
+
+@pytest.mark.parametrize("kind", SPATIAL_INDEX_KINDS)
+def test_backends_return_identical_hits(kind: str) -> None:
+    page = _edge_case_page()
+    index = build_spatial_index(page, kind)
+    reference = _EveryPrimitive(len(page))
+    rng = random.Random(3)
+    points = [(rng.uniform(-60, 720), rng.uniform(-60, 900)) for _ in range(200)]
+    points += [(250.0, 250.0), (120.0, 312.0), (-25.0, -25.0), (690.0, 890.0), (612.0, 792.0)]
+    rects = [(x, y, x + rng.uniform(0, 150), y - rng.uniform(0, 150)) for x, y in points]
+    rects += [(250.0, 250.0, 250.0, 250.0), (0.0, 300.0, 612.0, 300.0), (650.0, 850.0, 680.0, 880.0)]
+    for x, y in points:
+        assert hit_test_point(page, index, x, y) == hit_test_point(page, reference, x, y)
+    for rect in rects:
+        assert hit_test_rect(page, index, *rect) == hit_test_rect(page, reference, *rect)
+
+    tie = hit_test_rect(page, index, 0.0, 290.0, 612.0, 310.0)
+    duplicates = [candidate.id for candidate in tie if candidate.bbox == (100.0, 300.0, 400.0, 300.0)]
+    assert duplicates == ["p301", "p302"]
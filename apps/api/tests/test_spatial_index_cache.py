@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.core.ir.spatial_index import SpatialIndex
+from forge_api.services import ir_index
+from forge_api.services.ir_index import PageIndexCache, get_page_index_cache
+from forge_api.services.storage import get_storage
+
+
+def _no_build(*args, **kwargs):
+    raise AssertionError("spatial index was rebuilt")
+
+
+def test_hittest_reuses_cached_index(client: TestClient, upload_pdf, monkeypatch: pytest.MonkeyPatch) -> None:
+    get_page_index_cache.cache_clear()
+    doc_id = upload_pdf("overlap").json()["document"]["doc_id"]
+
+    first = client.post(f"/v1/hittest/{doc_id}?page=0", json={"point": {"x": 160.0, "y": 160.0}})
+    assert first.status_code == 200
+
+    monkeypatch.setattr(SpatialIndex, "build", _no_build)
+    monkeypatch.setattr(ir_index, "get_columnar_page", _no_build)
+    second = client.post(f"/v1/hittest/{doc_id}?page=0", json={"point": {"x": 160.0, "y": 160.0}})
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    get_page_index_cache.cache_clear()
+
+
+def test_persisted_index_survives_process_cache(client: TestClient, upload_pdf, monkeypatch: pytest.MonkeyPatch) -> None:
+    doc_id = upload_pdf("overlap").json()["document"]["doc_id"]
+    built = PageIndexCache(max_entries=4, persist=True).get(doc_id, 0)
+    assert get_storage().exists(f"documents/{doc_id}/ir/page_0.index.json")
+
+    monkeypatch.setattr(SpatialIndex, "build", _no_build)
+    reloaded = PageIndexCache(max_entries=4, persist=True).get(doc_id, 0)
+    assert reloaded.index == built.index
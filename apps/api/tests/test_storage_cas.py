@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from threading import Thread
+
+import pytest
+from fastapi.testclient import TestClient
+
+from forge_api.schemas.patch import OverlayPatchReplaceElement
+from forge_api.services.forge_overlay import (
+    OverlayVersionConflict,
+    append_overlay_patchset,
+    load_overlay_patch_log,
+    load_overlay_version,
+)
+from forge_api.services.patch_store import append_patchset, load_patch_log
+from forge_api.services.storage import LocalStorageDriver, PreconditionFailed, compare_and_swap
+from forge_api.settings import get_settings
+
+
+def _run_concurrently(target, workers: int = 4) -> None:
+    threads = [Thread(target=target, args=(worker,)) for worker in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_local_conditional_put(tmp_path: Path) -> None:
+    storage = LocalStorageDriver(tmp_path)
+    storage.ensure_root()
+
+    version = storage.put_bytes_if_match("a.json", b"one", None)
+    with pytest.raises(PreconditionFailed):
+        storage.put_bytes_if_match("a.json", b"two", None)
+    with pytest.raises(PreconditionFailed):
+        storage.put_bytes_if_match("a.json", b"two", "stale")
+
+    data, current = storage.get_bytes_versioned("a.json")
+    assert (data, current) == (b"one", version)
+    storage.put_bytes_if_match("a.json", b"two", current)
+    assert storage.get_bytes("a.json") == b"two"
+
+
+def test_compare_and_swap_never_loses_updates(tmp_path: Path) -> None:
+    storage = LocalStorageDriver(tmp_path)
+    storage.ensure_root()
+
+    def _increment(current: bytes | None) -> bytes:
+        value = json.loads(current) if current is not None else 0
+        return json.dumps(value + 1).encode("utf-8")
+
+    def _worker(_: int) -> None:
+        for _ in range(25):
+            compare_and_swap(storage, "counter.json", _increment, attempts=1000)
+
+    _run_concurrently(_worker)
+    assert json.loads(storage.get_bytes("counter.json")) == 100
+
+
+def test_concurrent_commits_keep_every_patchset(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setenv("FORGE_STORAGE_CAS_ATTEMPTS", "1000")
+
+    def _overlay_worker(worker: int) -> None:
+        for idx in range(10):
+            op = OverlayPatchReplaceElement(type="replace_element", element_id="p0_e0", new_text=f"{worker}-{idx}")
+            append_overlay_patchset("doc-cas", [op])
+
+    def _patch_worker(worker: int) -> None:
+        for _ in range(10):
+            append_patchset("doc-cas", [], worker, None, None, [], [])
+
+    get_settings.cache_clear()
+    _run_concurrently(_overlay_worker)
+    _run_concurrently(_patch_worker)
+    get_settings.cache_clear()
+
+    assert load_overlay_version("doc-cas") == 40
+    overlay_log = load_overlay_patch_log("doc-cas")
+    assert len({record.patch_id for record in overlay_log}) == 40
+    assert len({record.patchset_id for record in load_patch_log("doc-cas")}) == 40
+
+
+def test_overlay_append_rejects_stale_base_version(client: TestClient) -> None:
+    op = OverlayPatchReplaceElement(type="replace_element", element_id="p0_e0", new_text="first")
+    append_overlay_patchset("doc-base", [op], base_version=0)
+    with pytest.raises(OverlayVersionConflict) as excinfo:
+        append_overlay_patchset("doc-base", [op], base_version=0)
+    assert excinfo.value.current_version == 1
+    assert load_overlay_version("doc-base") == 1
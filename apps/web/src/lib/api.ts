@@ -128,6 +128,32 @@ export type HitTestResponse = {
   candidates: HitTestCandidate[];
 };
 
+export type HitTestBatchQuery = HitTestRequest & {
+  page_index: number;
+};
+
+export type ElementQueryRequest = {
+  source?: "manifest" | "decoded";
+  page_index: number;
+  profile?: "text" | "text_vector" | "full";
+  point?: HitTestPoint;
+  rect?: HitTestRect;
+  k?: number;
+  contained?: boolean;
+};
+
+export type ElementQueryResponse = {
+  doc_id: string;
+  page_index: number;
+  source: "manifest" | "decoded";
+  elements: Record<string, unknown>[];
+};
+
+export type HitTestBatchResponse = {
+  doc_id: string;
+  results: { page_index: number; candidates: HitTestCandidate[] }[];
+};
+
 export type PatchOp =
   | {
       op: "set_style";
@@ -201,11 +227,20 @@ export type PatchsetRecord = {
 export type PatchsetListResponse = {
   doc_id: string;
   patchsets: PatchsetRecord[];
+  // Log revision: bumped by every append, revert and compaction, never reused.
+  version: number;
+  next_cursor?: string | null;
+};
+
+export type PatchsetListOptions = {
+  since?: string;
+  cursor?: string;
+  limit?: number;
 };
 
 export type PatchCommitResponse = {
   patchset: PatchsetRecord;
-  patch_log: PatchsetRecord[];
+  version: number;
   applied_ops?: PatchsetRecord["results"];
   rejected_ops?: PatchsetRecord["results"];
 };
@@ -642,6 +677,44 @@ export async function hitTest(
   return (await response.json()) as HitTestResponse;
 }
 
+export async function hitTestBatch(docId: string, queries: HitTestBatchQuery[]): Promise<HitTestBatchResponse> {
+  const response = await fetch(apiUrl(`/v1/hittest/${docId}/batch`), {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json"
+    },
+    body: JSON.stringify({ queries })
+  });
+  if (!response.ok) {
+    const detail = await readErrorDetail(response);
+    const suffix = [response.status, detail.code].filter(Boolean).join(" ");
+    throw new Error(
+      detail.message ? `Failed to hit-test (${suffix}): ${detail.message}` : `Failed to hit-test (${suffix})`
+    );
+  }
+  return (await response.json()) as HitTestBatchResponse;
+}
+
+export async function queryElements(docId: string, payload: ElementQueryRequest): Promise<ElementQueryResponse> {
+  const response = await fetch(apiUrl(`/v1/documents/${docId}/elements/query`), {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json"
+    },
+    body: JSON.stringify(payload)
+  });
+  if (!response.ok) {
+    const detail = await readErrorDetail(response);
+    const suffix = [response.status, detail.code].filter(Boolean).join(" ");
+    throw new Error(
+      detail.message
+        ? `Failed to query elements (${suffix}): ${detail.message}`
+        : `Failed to query elements (${suffix})`
+    );
+  }
+  return (await response.json()) as ElementQueryResponse;
+}
+
 export async function planPatch(payload: {
   doc_id: string;
   page_index: number;
@@ -702,8 +775,19 @@ export async function commitPatch(
   return (await response.json()) as PatchCommitResponse;
 }
 
-export async function getPatches(docId: string): Promise<PatchsetListResponse> {
-  const response = await fetch(apiUrl(`/v1/patches/${docId}`));
+export async function getPatches(docId: string, options: PatchsetListOptions = {}): Promise<PatchsetListResponse> {
+  const params = new URLSearchParams();
+  if (options.since) {
+    params.set("since", options.since);
+  }
+  if (options.cursor) {
+    params.set("cursor", options.cursor);
+  }
+  if (options.limit) {
+    params.set("limit", String(options.limit));
+  }
+  const query = params.toString();
+  const response = await fetch(apiUrl(`/v1/patches/${docId}${query ? `?${query}` : ""}`));
   if (!response.ok) {
     const detail = await readErrorDetail(response);
     const suffix = [response.status, detail.code].filter(Boolean).join(" ");
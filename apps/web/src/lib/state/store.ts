@@ -3,6 +3,7 @@ import { create } from "zustand";
 import type {
   HitTestCandidate,
   IRPage,
+  PatchCommitResponse,
   PatchOp,
   PatchsetRecord,
   PatchsetInput,
@@ -13,6 +14,8 @@ import { commitPatch, getCompositeIR, getIR, getPatches, planPatch, revertLastPa
 
 type PatchVisibility = Record<string, boolean>;
 
+const PATCHSET_PAGE_SIZE = 200;
+
 interface SelectionState {
   irPages: Record<number, IRPage>;
   basePages: Record<number, IRPage>;
@@ -22,6 +25,8 @@ interface SelectionState {
   activeCandidateIndex: number;
   activePageIndex: number | null;
   patchsets: PatchsetRecord[];
+  // Log revision the loaded patchsets are known to include; null until loaded.
+  patchLogVersion: number | null;
   pendingProposal: {
     patchset_id: string;
     ops: PatchOp[];
@@ -38,6 +43,8 @@ interface SelectionState {
   clearSelection: () => void;
   setPatchsets: (patchsets: PatchsetRecord[]) => void;
   loadPatchsets: (docId: string) => Promise<void>;
+  appendPatchset: (patchset: PatchsetRecord) => void;
+  syncPatchsets: (docId: string, committed: PatchCommitResponse) => Promise<void>;
   togglePatchVisibility: (docId: string, pageIndex: number, patchsetId: string) => Promise<void>;
   proposePatch: (docId: string, instruction: string) => Promise<void>;
   clearProposal: () => void;
@@ -154,6 +161,7 @@ export const useSelectionStore = create<SelectionState>((set, get) => ({
   activeCandidateIndex: 0,
   activePageIndex: null,
   patchsets: [],
+  patchLogVersion: null,
   pendingProposal: null,
   patchVisibility: {},
   pendingSelection: null,
@@ -200,26 +208,44 @@ export const useSelectionStore = create<SelectionState>((set, get) => ({
   setPatchsets: (patchsets) =>
     set(() => ({
       patchsets,
+      patchLogVersion: null,
       patchVisibility: patchsets.reduce<PatchVisibility>((acc, patchset) => {
         acc[patchset.patchset_id] = true;
         return acc;
       }, {})
     })),
   loadPatchsets: async (docId) => {
-    const response = await getPatches(docId);
+    const patchsets: PatchsetRecord[] = [];
+    let cursor: string | undefined;
+    let patchLogVersion: number | null = null;
+    do {
+      const response = await getPatches(docId, { cursor, limit: PATCHSET_PAGE_SIZE });
+      // Later pages may include newer writes; only the first revision is covered for certain.
+      if (patchLogVersion === null) {
+        patchLogVersion = response.version;
+      }
+      patchsets.push(...response.patchsets);
+      cursor = response.next_cursor ?? undefined;
+    } while (cursor);
     set((state) => {
       const nextVisibility = { ...state.patchVisibility };
-      response.patchsets.forEach((patchset) => {
+      patchsets.forEach((patchset) => {
         if (!(patchset.patchset_id in nextVisibility)) {
           nextVisibility[patchset.patchset_id] = true;
         }
       });
       return {
-        patchsets: response.patchsets,
+        patchsets,
+        patchLogVersion,
         patchVisibility: nextVisibility
       };
     });
   },
+  appendPatchset: (patchset) =>
+    set((state) => ({
+      patchsets: [...state.patchsets, patchset],
+      patchVisibility: { ...state.patchVisibility, [patchset.patchset_id]: true }
+    })),
   togglePatchVisibility: async (docId, pageIndex, patchsetId) => {
     set((state) => ({
       patchVisibility: {
@@ -265,14 +291,14 @@ export const useSelectionStore = create<SelectionState>((set, get) => ({
       return;
     }
     const allowedTargets = await buildSelectionFingerprints([pendingSelection]);
-    await commitPatch(docId, {
+    const committed = await commitPatch(docId, {
       ops: pendingProposal.ops,
       page_index: pendingProposal.page_index,
       selected_ids: pendingProposal.ops.map((op) => op.target_id),
       rationale_short: pendingProposal.rationale_short
     }, allowedTargets);
     set({ pendingProposal: null, pendingSelection: null });
-    await get().loadPatchsets(docId);
+    await get().syncPatchsets(docId, committed);
     await get().previewComposite(docId, pendingProposal.page_index);
   },
   commitManualPatch: async (docId, patchset) => {
@@ -286,10 +312,21 @@ export const useSelectionStore = create<SelectionState>((set, get) => ({
         allowedTargets = await buildSelectionFingerprints([selection]);
       }
     }
-    await commitPatch(docId, patchset, allowedTargets);
-    await get().loadPatchsets(docId);
+    const committed = await commitPatch(docId, patchset, allowedTargets);
+    await get().syncPatchsets(docId, committed);
     await get().previewComposite(docId, patchset.page_index);
   },
+  syncPatchsets: async (docId, committed) => {
+    // The commit is the only change unless someone else wrote the log in between. Revisions
+    // never repeat, so a revert followed by another commit cannot look like our own.
+    const { patchLogVersion } = get();
+    if (patchLogVersion !== null && patchLogVersion + 1 === committed.version) {
+      get().appendPatchset(committed.patchset);
+      set({ patchLogVersion: committed.version });
+      return;
+    }
+    await get().loadPatchsets(docId);
+  },
   refreshComposite: async (docId, pageIndex) => {
     const page = await getCompositeIR(docId, pageIndex);
     set((state) => ({